@@ -0,0 +1,162 @@
+"""
+admission.py - Admission control and load shedding
+===================================================
+Bounded concurrency limiter for the /correct* routes.
+
+- At most `max_concurrent` requests run correction at the same time.
+- Up to `max_queue` more requests wait in FIFO order.
+- Anything beyond that gets an immediate 503 with Retry-After.
+- A request that waited longer than `max_wait_ms` is dropped with 503,
+  because the client has most likely given up already.
+
+Admitted requests are then ordered per plan by scheduler.py, which owns
+the actual correction slots; its wait is bounded the same way
+(SCHEDULER_MAX_WAIT_MS, 503 with Retry-After).
+
+Waitress queues requests it has no thread for, and that queue is
+invisible to us. run.py therefore sizes the waitress thread pool with
+`thread_budget()`, so waiting happens here where it is bounded.
+
+Configuration (environment):
+    ADMISSION_MAX_CONCURRENT  (default: 16)
+    ADMISSION_MAX_QUEUE       (default: 16)
+    ADMISSION_MAX_WAIT_MS     (default: 2000)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import jsonify
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+
+    def __init__(self, max_concurrent=16, max_queue=16, max_wait_ms=2000):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_ms = max_wait_ms
+
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.active = 0
+
+        # Counters (only touched under the lock)
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.expired_total = 0
+
+        # Exponentially weighted average service time, used for Retry-After
+        self._avg_service_s = 0.05
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "16")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "16")),
+            max_wait_ms=int(os.getenv("ADMISSION_MAX_WAIT_MS", "2000")),
+        )
+
+    def thread_budget(self, spare=4):
+        """
+        Server threads needed so that every admitted or queued request has
+        one, plus a few spare threads that answer the fast 503s.
+        """
+        return self.max_concurrent + self.max_queue + spare
+
+    def acquire(self):
+        """
+        Try to get a slot. Returns None when admitted, otherwise the
+        rejection reason ('queue_full' or 'queue_timeout').
+        """
+        with self._lock:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                self.admitted_total += 1
+                return None
+
+            if len(self._waiters) >= self.max_queue:
+                self.rejected_total += 1
+                return "queue_full"
+
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+
+        if not waiter.event.wait(self.max_wait_ms / 1000):
+            with self._lock:
+                # The slot may have been handed over right after the timeout
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    self.expired_total += 1
+                    return "queue_timeout"
+
+        with self._lock:
+            self.admitted_total += 1
+        return None
+
+    def release(self, service_s):
+        with self._lock:
+            self._avg_service_s += 0.1 * (service_s - self._avg_service_s)
+
+            if self._waiters:
+                # Hand the slot directly to the oldest waiter (active stays the same)
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.active -= 1
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free (at least 1)."""
+        backlog = len(self._waiters) + self.active
+        return max(1, math.ceil(backlog * self._avg_service_s / self.max_concurrent))
+
+    def limit(self, f):
+        """Route decorator: admit, queue or shed the request."""
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            reason = self.acquire()
+            if reason:
+                response = jsonify({
+                    "error": "Server busy, please retry later",
+                    "reason": reason,
+                    "status": "error"
+                })
+                return response, 503, {"Retry-After": str(self.retry_after())}
+
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self.release(time.perf_counter() - start)
+
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "queued": len(self._waiters),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_wait_ms": self.max_wait_ms,
+                "admitted_total": self.admitted_total,
+                "rejected_total": self.rejected_total,
+                "expired_total": self.expired_total,
+                "avg_service_ms": round(self._avg_service_s * 1000, 2),
+            }
+
+
+limiter = AdmissionController.from_env()
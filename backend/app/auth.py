@@ -1,6 +1,12 @@
 from functools import wraps
 from flask import request, jsonify
+import hashlib
+import hmac
+import json
 import os
+import time
+
+from .usage import usage_meter
 
 # Minimalna verzija za MVP — ključevi iz .env
 VALID_API_KEYS = {
@@ -9,24 +15,101 @@ VALID_API_KEYS = {
     "enterprise": os.getenv("API_KEY_ENTERPRISE", "enterprise_key_789"),
 }
 
+# Admin endpoints (profiler, diagnostics) are disabled unless this is set
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+# Customer keys: JSON object {"<api key>": "<plan>"}.
+# Keys may also be stored pre-hashed as "sha256:<hex digest>".
+API_KEYS_FILE = os.getenv("API_KEYS_FILE", "")
+
+# The /correct* routes stay open by default: requests without X-API-Key
+# are metered as "anonymous" on ANONYMOUS_PLAN. REQUIRE_API_KEY=1 answers
+# them with 401 instead. A key that is sent must be valid either way.
+REQUIRE_API_KEY = os.getenv("REQUIRE_API_KEY", "0") == "1"
+ANONYMOUS_PLAN = os.getenv("ANONYMOUS_PLAN", "basic")
+ANONYMOUS_KEY_ID = "anonymous"
+
+
+def key_digest(api_key):
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def load_api_keys(path=API_KEYS_FILE):
+    """Build the lookup index: sha256(key) -> plan."""
+    index = {key_digest(key): plan for plan, key in VALID_API_KEYS.items()}
+
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for key, plan in json.load(f).items():
+                if key.startswith("sha256:"):
+                    index[key[len("sha256:"):].lower()] = plan
+                else:
+                    index[key_digest(key)] = plan
+
+    return index
+
+
+_KEY_INDEX = load_api_keys()
+
+
+def reload_api_keys(path=API_KEYS_FILE):
+    """Re-read the key file; the new index is swapped in atomically."""
+    global _KEY_INDEX
+    _KEY_INDEX = load_api_keys(path)
+    return len(_KEY_INDEX)
+
+
+def _request_chars():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return 0
+    text = data.get("text")
+    if isinstance(text, str):
+        return len(text)
+    texts = data.get("texts")
+    if isinstance(texts, list):
+        return sum(len(t) for t in texts if isinstance(t, str))
+    return 0
+
+
 def require_api_key(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
         api_key = request.headers.get("X-API-Key")
 
-        if not api_key:
+        if api_key:
+            digest = key_digest(api_key)
+            key_id = digest[:16]
+            plan = _KEY_INDEX.get(digest)
+            if not plan:
+                return jsonify({"error": "Invalid API key"}), 401
+        elif REQUIRE_API_KEY:
             return jsonify({"error": "API key required"}), 401
+        else:
+            key_id, plan = ANONYMOUS_KEY_ID, ANONYMOUS_PLAN
 
-        plan = None
-        for p, key in VALID_API_KEYS.items():
-            if api_key == key:
-                plan = p
-                break
+        # scheduler.py queues the request's corrections under its plan
+        request.current_plan = plan
 
-        if not plan:
-            return jsonify({"error": "Invalid API key"}), 401
+        cpu_start = time.thread_time_ns()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            usage_meter.record(key_id, plan, time.thread_time_ns() - cpu_start, _request_chars())
+
+    return wrapper
+
+
+def require_admin_key(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_API_KEY:
+            return jsonify({"error": "Admin endpoints are disabled"}), 404
+
+        admin_key = request.headers.get("X-Admin-Key", "")
+        if not hmac.compare_digest(admin_key.encode("utf-8"), ADMIN_API_KEY.encode("utf-8")):
+            return jsonify({"error": "Invalid admin key"}), 403
 
-        request.current_plan = plan
         return f(*args, **kwargs)
 
     return wrapper
@@ -5,6 +5,13 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
 
+from time import perf_counter_ns
+
+from .instrumentation import stage_timer, collect_hits, rule_hits, with_hits
+from .deadline import StageCosts, POST_CORE
+from .patterns import PATTERNS
+from .language_id import ENGLISH
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -24,10 +31,55 @@ class CorrectionResult:
     processing_time_ms: float
     corrections_applied: List[str] = None
     confidence_score: float = 1.0
+    rule_hits: Dict[str, Dict[str, int]] = None
+    hits: List[dict] = None
+    skipped_stages: List[str] = None
+    language: str = ENGLISH
 
     def __post_init__(self):
         if self.corrections_applied is None:
             self.corrections_applied = []
+        if self.rule_hits is None:
+            self.rule_hits = {}
+        if self.hits is None:
+            self.hits = []
+        if self.skipped_stages is None:
+            self.skipped_stages = []
+
+
+def _changed_span(before: str, after: str) -> Tuple[int, int, int]:
+    """(start, end in before, end in after) of the region that differs."""
+    limit = min(len(before), len(after))
+    lo, hi = 0, limit
+    while lo < hi:  # longest common prefix, by binary search on slices
+        mid = (lo + hi + 1) // 2
+        if before[:mid] == after[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+
+    lo, hi = 0, limit - prefix
+    while lo < hi:  # longest common suffix that does not overlap it
+        mid = (lo + hi + 1) // 2
+        if before[len(before) - mid:] == after[len(after) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, len(before) - lo, len(after) - lo
+
+
+# Extra core passes AGGRESSIVE may run while the text keeps changing
+AGGRESSIVE_MAX_PASSES = 3
+
+
+@dataclass(frozen=True)
+class Pipeline:
+    """The stage set one CorrectionLevel runs; built once per corrector."""
+    level: CorrectionLevel
+    stages: tuple
+    punctuation: bool = True
+    max_passes: int = 1
 
 
 # ============================================================
@@ -36,13 +88,18 @@ class CorrectionResult:
 
 class TextPreservation:
     SPECIAL_PATTERNS = {
-        'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        # Same matches as r'\b[A-Za-z0-9._%+-]+@...' but linear: only the
+        # first word boundary of each run of local-part characters is tried
+        # (the lookahead is atomic), instead of every boundary in "a.a.a...".
+        'email': (r'(?<![A-Za-z0-9._%+-])(?=([A-Za-z0-9._%+-]*?)\b[A-Za-z0-9._%+-])\1'
+                  r'(?P<match>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'),
         'url': r'https?://[^\s<>{}|\\^~\[\]`]+',
         'hashtag': r'#\w+',
         'mention': r'@\w+',
     }
 
-    COMPILED_PATTERNS = {name: re.compile(pattern) for name, pattern in SPECIAL_PATTERNS.items()}
+    COMPILED_PATTERNS = {name: PATTERNS.register(f"preservation.{name}", pattern)
+                         for name, pattern in SPECIAL_PATTERNS.items()}
 
     @classmethod
     def preserve_special_formats(cls, text: str) -> Tuple[str, Dict[str, str]]:
@@ -50,7 +107,8 @@ class TextPreservation:
         preserved_text = text
 
         for format_type, pattern in cls.COMPILED_PATTERNS.items():
-            matches = pattern.findall(preserved_text)
+            # Patterns with groups name the preserved part "match"
+            matches = [m.group(m.lastgroup or 0) for m in pattern.finditer(preserved_text)]
             for idx, match in enumerate(matches):
                 placeholder = f"__{format_type.upper()}_{idx}__"
                 preserved[placeholder] = match
@@ -70,8 +128,8 @@ class TextPreservation:
 # ================================
 
 class TextNormalizer:
-    WHITESPACE_PATTERN = re.compile(r'\s+')
-    ZERO_WIDTH_PATTERN = re.compile(r'[\u200B-\u200D\uFEFF]')
+    WHITESPACE_PATTERN = PATTERNS.register("normalizer.whitespace", r'\s+')
+    ZERO_WIDTH_PATTERN = PATTERNS.register("normalizer.zero_width", r'[\u200B-\u200D\uFEFF]')
 
     @staticmethod
     def normalize_whitespace(text: str) -> str:
@@ -124,8 +182,9 @@ class TextNormalizer:
 # ================================
 
 class SentenceCapitalizer:
-    ALPHA_PATTERN = re.compile(r'[A-Za-zА-Яа-я]')
-    STANDALONE_I_PATTERN = re.compile(r'\bi\b')
+    ALPHA_PATTERN = PATTERNS.register("capitalizer.alpha", r'[A-Za-zА-Яа-я]')
+    STANDALONE_I_PATTERN = PATTERNS.register("capitalizer.standalone_i", r'\bi\b')
+    SENTENCE_START_PATTERN = PATTERNS.register("capitalizer.sentence_start", r'([.!?])(\s+)([a-z])')
 
     @staticmethod
     def smart_capitalize(text: str) -> str:
@@ -153,15 +212,14 @@ class SentenceCapitalizer:
                 if punctuation == '.':
                     # Check if this is part of ellipsis
                     recent_chars = before_text[-5:] if len(before_text) > 5 else before_text
-                    if re.search(r'\.{2,}$', recent_chars):  # Ellipsis detected
+                    if recent_chars.endswith(('..', '..\n')):  # Ellipsis detected
                         return match.group(0)  # Don't capitalize
 
                 # Capitalize after normal sentence endings
                 return punctuation + space + next_char.upper()
 
             # Apply balanced capitalization
-            pattern = r'([.!?])(\s+)([a-z])'
-            text = re.sub(pattern, capitalize_after_sentence, text)
+            text = SentenceCapitalizer.SENTENCE_START_PATTERN.sub(capitalize_after_sentence, text)
 
         except Exception as e:
             logger.warning(f"Capitalization error: {e}")
@@ -204,14 +262,14 @@ class SentenceCapitalizer:
 
 class PunctuationHandler:
     # 🔥 BALANCED: Preserve ellipsis but fix basic cases
-    MULTIPLE_DOTS = re.compile(r'\.{4,}')  # Collapse 4+ dots to 3 (preserve ...)
-    MULTIPLE_EXCLAMATION = re.compile(r'!{2,}')
-    MULTIPLE_QUESTION = re.compile(r'\?{2,}')
-    MISSING_SPACE_AFTER = re.compile(r'([,!;:])(?=[^\s])')
-    APOSTROPHE_FIX = re.compile(r"(?<!\w)'(?!\w|s\b)")
+    MULTIPLE_DOTS = PATTERNS.register("punctuation.multiple_dots", r'\.{4,}')  # Collapse 4+ dots to 3 (preserve ...)
+    MULTIPLE_EXCLAMATION = PATTERNS.register("punctuation.multiple_exclamation", r'!{2,}')
+    MULTIPLE_QUESTION = PATTERNS.register("punctuation.multiple_question", r'\?{2,}')
+    MISSING_SPACE_AFTER = PATTERNS.register("punctuation.missing_space_after", r'([,!;:])(?=[^\s])')
+    APOSTROPHE_FIX = PATTERNS.register("punctuation.apostrophe_fix", r"(?<!\w)'(?!\w|s\b)")
 
     # 🔥 NEW: Fix double periods but preserve ellipsis
-    DOUBLE_PERIODS = re.compile(r'\.{2,3}(?!\.)')  # 2-3 dots not followed by another dot
+    DOUBLE_PERIODS = PATTERNS.register("punctuation.double_periods", r'\.{2,3}(?!\.)')  # 2-3 dots not followed by another dot
 
     @staticmethod
     def add_proper_spacing(text: str) -> str:
@@ -255,19 +313,54 @@ class PunctuationHandler:
             return text
 
 
+# ================================
+# AGGRESSIVE-ONLY HEURISTICS
+# ================================
+
+class AggressiveFixes:
+    """
+    Stages only CorrectionLevel.AGGRESSIVE runs: usually right, but they
+    can change text the writer meant ("that that", a heading without a
+    period), so the default level leaves them out.
+    """
+    # "the the" -> "the"; spaces/tabs only, a line break may be a layout choice
+    REPEATED_WORD = PATTERNS.register("aggressive.repeated_word", r'\b(\w+)(?:[ \t]+\1\b)+', re.IGNORECASE)
+    INTENDED_REPEATS = frozenset({'had', 'that', 'is', 'no', 'so', 'very', 'really', 'ha', 'bye'})
+
+    @staticmethod
+    def remove_repeated_words(text: str) -> str:
+        return AggressiveFixes.REPEATED_WORD.sub(
+            with_hits(AggressiveFixes._first_of_repeat, rule="repeated word"), text)
+
+    @staticmethod
+    def _first_of_repeat(match):
+        word = match.group(1)
+        if word.isdigit() or word.lower() in AggressiveFixes.INTENDED_REPEATS:
+            return match.group()
+        return word
+
+    @staticmethod
+    def add_final_period(text: str) -> str:
+        """End a multi-word text that stops on a letter or digit with a period."""
+        stripped = text.rstrip()
+        if stripped and stripped[-1].isalnum() and ' ' in stripped:
+            return stripped + '.' + text[len(stripped):]
+        return text
+
+
 # ================================
 # SECURITY CHECK
 # ================================
 
 class SecuritySanitizer:
     SECURITY_PATTERNS = [
-        re.compile(r'<script.*?>', re.IGNORECASE),
-        re.compile(r'javascript:', re.IGNORECASE),
-        re.compile(r'vbscript:', re.IGNORECASE),
-        re.compile(r'\b(SELECT|INSERT|UPDATE|DELETE|DROP|UNION)\b', re.IGNORECASE),
-        re.compile(r'rm\s+-rf', re.IGNORECASE),
-        re.compile(r'wget\s+http', re.IGNORECASE),
-        re.compile(r'curl\s+http', re.IGNORECASE),
+        PATTERNS.register("security.script", r'<script(?:(?!<script)[^>\n])*>', re.IGNORECASE),  # linear <script.*?>
+        PATTERNS.register("security.javascript", r'javascript:', re.IGNORECASE),
+        PATTERNS.register("security.vbscript", r'vbscript:', re.IGNORECASE),
+        PATTERNS.register("security.sql", r'\b(SELECT|INSERT|UPDATE|DELETE|DROP|UNION)\b', re.IGNORECASE),
+        PATTERNS.register("security.rm_rf", r'rm\s+-rf', re.IGNORECASE),
+        PATTERNS.register("security.wget", r'wget\s+http', re.IGNORECASE),
+        PATTERNS.register("security.curl", r'curl\s+http', re.IGNORECASE),
     ]
 
     @staticmethod
@@ -281,9 +374,24 @@ class SecuritySanitizer:
 
 class BaseCorrector(ABC):
 
-    def __init__(self, correction_level=CorrectionLevel.STANDARD):
+    # Stages run_stages may skip when a deadline runs short
+    optional_stages = ()
+
+    # Core stages CorrectionLevel.MINIMAL keeps
+    minimal_stages = ("spelling",)
+
+    # Stages CorrectionLevel.AGGRESSIVE adds after the full stage table
+    aggressive_stages = (
+        ("repeated_words", "repeated word", AggressiveFixes.remove_repeated_words),
+        ("final_period", "final period", AggressiveFixes.add_final_period),
+    )
+
+    def __init__(self, correction_level=CorrectionLevel.STANDARD, rules_dir=None):
         self.correction_level = correction_level
+        self.rules_dir = rules_dir
+        self.stage_costs = StageCosts()
         self.setup_dictionaries()
+        self.pipelines = {level: self.build_pipeline(level) for level in CorrectionLevel}
 
         self.normalizer = TextNormalizer()
         self.preservation_handler = TextPreservation()
@@ -296,10 +404,140 @@ class BaseCorrector(ABC):
         pass
 
     @abstractmethod
-    def core_correction_logic(self, text: str) -> Tuple[str, List[str]]:
+    def core_correction_logic(self, text: str, deadline=None, stages=None) -> Tuple[str, List[str]]:
         pass
 
-    def correct(self, text: str) -> str:
+    def build_pipeline(self, level: CorrectionLevel) -> Pipeline:
+        """
+        MINIMAL:    normalization, spelling and capitalization only
+        STANDARD:   the full stage table
+        AGGRESSIVE: the full stage table plus aggressive_stages (repeated
+                    words, final period), re-run while it keeps changing
+                    the text (fixes that expose further fixes)
+        """
+        stages = tuple(self.stages)
+        if level is CorrectionLevel.MINIMAL:
+            return Pipeline(level, tuple(s for s in stages if s[0] in self.minimal_stages),
+                            punctuation=False)
+        if level is CorrectionLevel.AGGRESSIVE:
+            return Pipeline(level, stages + self.aggressive_stages, max_passes=AGGRESSIVE_MAX_PASSES)
+        return Pipeline(level, stages)
+
+    def pipeline_for(self, level=None) -> Pipeline:
+        """Cached pipeline for a CorrectionLevel or its value ("minimal", ...)."""
+        if level is None:
+            level = self.correction_level
+        elif not isinstance(level, CorrectionLevel):
+            level = CorrectionLevel(level)
+        return self.pipelines[level]
+
+    def run_stages(self, text: str, stages, deadline=None) -> Tuple[str, List[str]]:
+        """
+        Run an ordered (name, change label, function) stage table.
+        Returns the corrected text and the labels of stages that changed it.
+        With a deadline, optional stages that no longer fit are skipped.
+        """
+        corrected = text
+        changes = []
+        timer = stage_timer(type(self).__name__)
+        collector = rule_hits()
+        costs = self.stage_costs
+        chars = len(text)
+
+        for name, label, stage in stages:
+            # A fused stage (rule_analyzer.FusedStage) has a tuple of labels
+            # and returns the labels of the members that changed the text
+            fused = label.__class__ is tuple
+            if deadline is not None:
+                if name in self.optional_stages and not deadline.allows(
+                        costs.estimate_ns(name, chars) + costs.estimate_ns(POST_CORE, chars)):
+                    for skipped in (stage.names if fused else (name,)):
+                        deadline.skip(skipped)
+                    continue
+                start = perf_counter_ns()
+
+            if collector is not None:
+                first_hit = len(collector.hits)
+
+            if fused:
+                tmp, labels = stage(corrected)
+            else:
+                tmp = stage(corrected)
+
+            if deadline is not None:
+                costs.observe(name, perf_counter_ns() - start, chars)
+            if tmp != corrected:
+                if not fused:
+                    labels = (label,)
+                changes.extend(labels)
+                if collector is not None:
+                    self._tag_hits(collector, first_hit, name, labels, corrected, tmp)
+            corrected = tmp
+            if timer:
+                timer.lap("stage", name)
+
+        if timer:
+            timer.finish()
+        return corrected, changes
+
+    @staticmethod
+    def _tag_hits(collector, first_hit, name, labels, before, after):
+        """Attribute a changing stage's hits to it (one coarse hit if it recorded none)."""
+        new_hits = collector.hits[first_hit:]
+        if new_hits:
+            for hit in new_hits:
+                if hit["stage"] is None:
+                    hit["stage"] = name
+        else:
+            start, end_before, end_after = _changed_span(before, after)
+            collector.hits.append({"stage": name, "rule": name, "start": start, "end": end_before,
+                                   "before": before[start:end_before], "after": after[start:end_after]})
+        for label in labels:
+            if label not in collector.applied:
+                collector.applied.append(label)
+
+    def correct_detailed(self, text: str, deadline=None, level=None, language=None) -> CorrectionResult:
+        """
+        correct() plus what it did: change labels, per-rule hit counts and
+        spans (recorded by the stages as they run, no diffing), timing and
+        the language it was corrected as.
+        """
+        pipeline = self.pipeline_for(level)
+        start = perf_counter_ns()
+        if language is None:
+            language = ENGLISH
+        with collect_hits() as collector:
+            corrected = self.correct(text, deadline=deadline, level=pipeline.level, language=language)
+        elapsed_ms = (perf_counter_ns() - start) / 1e6
+
+        return CorrectionResult(
+            original=text,
+            corrected=corrected,
+            changes_made=corrected != text,
+            correction_level=pipeline.level,
+            processing_time_ms=round(elapsed_ms, 3),
+            corrections_applied=collector.applied,
+            rule_hits=collector.counts(),
+            hits=collector.hits,
+            skipped_stages=list(deadline.skipped) if deadline is not None else [],
+            language=language,
+        )
+
+    def normalize_only(self, text: str) -> str:
+        """The pipeline for non-English text: quotes, whitespace, zero-width characters."""
+        t = self.normalizer.normalize_quotes(text)
+        t = self.normalizer.normalize_whitespace(t)
+        return self.normalizer.remove_zero_width(t)
+
+    def correct(self, text: str, deadline=None, level=None, language=None) -> str:
+        """
+        `language` is detect_language(text), run once by the caller at the
+        request boundary (main.py, streaming.py); English rules run only on
+        English text, anything else is just normalized. None - the caller
+        did not detect - corrects the text as English, so library calls,
+        nested correctors and benchmarks don't pay for detection.
+        """
+        pipeline = self.pipeline_for(level)
         try:
             if not text or not isinstance(text, str):
                 return text
@@ -307,6 +545,8 @@ class BaseCorrector(ABC):
             if text.strip() == "":
                 return ""
 
+            timer = stage_timer(type(self).__name__)
+
             if self.security_sanitizer.contains_suspicious_patterns(text):
                 return text
 
@@ -314,6 +554,16 @@ class BaseCorrector(ABC):
             if len(text) < 3:
                 return text.capitalize() if text else text
 
+            if timer:
+                timer.lap("phase", "security")
+
+            if language is not None and language != ENGLISH:
+                t = self.normalize_only(text)
+                if timer:
+                    timer.lap("phase", "normalize")
+                    timer.finish()
+                return t
+
             # Apply normalizations in order
             t = self.normalizer.normalize_quotes(text)
             t = self.normalizer.normalize_whitespace(t)
@@ -324,24 +574,68 @@ class BaseCorrector(ABC):
             # Capitalize standalone 'i' early
             t = self.capitalizer.capitalize_standalone_i(t)
 
+            if timer:
+                timer.lap("phase", "normalize")
+
             # Preserve special formats
             t, preserved = self.preservation_handler.preserve_special_formats(t)
 
+            if timer:
+                timer.lap("phase", "preserve")
+
             # Core correction logic
-            t, _ = self.core_correction_logic(t)
+            if deadline is not None:
+                skipped_mark = len(deadline.skipped)
+            t, _ = self.core_correction_logic(t, deadline, pipeline.stages)
+            for _ in range(pipeline.max_passes - 1):
+                if deadline is not None and deadline.expired():
+                    break
+                # Compare text, not change labels: some stages undo each other
+                before = t
+                if deadline is not None:
+                    skipped_so_far = deadline.skipped[skipped_mark:]
+                    del deadline.skipped[skipped_mark:]
+                t, _ = self.core_correction_logic(t, deadline, pipeline.stages)
+                if deadline is not None:
+                    # A stage is skipped once per request, and only if no
+                    # pass ran it
+                    this_pass = set(deadline.skipped[skipped_mark:])
+                    deadline.skipped[skipped_mark:] = [s for s in skipped_so_far if s in this_pass]
+                if t == before:
+                    break
+
+            if timer:
+                timer.lap("phase", "core")
+
+            if deadline is not None:
+                post_core_start = perf_counter_ns()
 
             # Punctuation fixes
-            t = self.punctuation_handler.add_proper_spacing(t)
-            t = self.punctuation_handler.fix_apostrophes(t)
+            if pipeline.punctuation:
+                t = self.punctuation_handler.add_proper_spacing(t)
+                t = self.punctuation_handler.fix_apostrophes(t)
+
+                if timer:
+                    timer.lap("phase", "punctuation")
 
             # Smart capitalization
             t = self.capitalizer.smart_capitalize(t)
 
+            if timer:
+                timer.lap("phase", "capitalize")
+
             # Restore preserved formats
             t = self.preservation_handler.restore_special_formats(t, preserved)
 
+            if deadline is not None:
+                self.stage_costs.observe(POST_CORE, perf_counter_ns() - post_core_start, len(text))
+
+            if timer:
+                timer.lap("phase", "restore")
+                timer.finish()
+
             return t
 
         except Exception as e:
             logger.error(f"Error in corrector: {e}")
-            return text.capitalize() if text else text
\ No newline at end of file
+            return text.capitalize() if text else text
@@ -8,56 +8,35 @@ Handles: their/there/they're, your/you're, its/it's, etc.
 import re
 from typing import List, Tuple
 
+from .instrumentation import with_hits
+from .rule_data import load_rules
+from .patterns import PATTERNS
+
 
 class ContextualCorrector:
     """
     Fixes contextually confused homophones based on grammar patterns.
     """
 
-    def __init__(self):
+    # Every word correct() can write (rule_analyzer)
+    WRITES = ("your", "you're", "their", "there", "they're", "its", "it's")
+
+    def __init__(self, rules_dir=None):
+        self.rules_dir = rules_dir
         self.setup_patterns()
 
     def setup_patterns(self):
         """Define patterns for contextual corrections"""
 
-        # Words that typically follow "you're" (verbs, adjectives, adverbs)
-        self.youre_indicators = [
-            'going', 'welcome', 'right', 'wrong', 'awesome', 'amazing',
-            'beautiful', 'crazy', 'doing', 'getting', 'being', 'looking',
-            'feeling', 'thinking', 'saying', 'making', 'having', 'coming',
-            'leaving', 'running', 'walking', 'talking', 'working', 'playing',
-            'here', 'there', 'sure', 'not', 'so', 'very', 'really', 'quite',
-            'about', 'probably', 'definitely', 'certainly', 'likely'
-        ]
-
-        # Words that typically follow "your" (nouns, possessive contexts)
-        self.your_indicators = [
-            'car', 'house', 'book', 'phone', 'computer', 'dog', 'cat',
-            'friend', 'family', 'mother', 'father', 'brother', 'sister',
-            'name', 'email', 'address', 'time', 'money', 'job', 'life',
-            'idea', 'problem', 'question', 'answer', 'work', 'home',
-            'room', 'bed', 'desk', 'chair', 'table', 'own', 'turn',
-            'head', 'eyes', 'hand', 'body', 'mind', 'heart', 'soul'
-        ]
-
-        # Words that follow "they're" (verbs, adjectives, adverbs)
-        self.theyre_indicators = [
-            'going', 'coming', 'here', 'there', 'not', 'so', 'very',
-            'happy', 'sad', 'angry', 'excited', 'ready', 'doing',
-            'making', 'having', 'being', 'getting', 'saying', 'thinking',
-            'working', 'playing', 'running', 'walking', 'talking',
-            'right', 'wrong', 'sure', 'fine', 'okay', 'great', 'good',
-            'bad', 'amazing', 'awesome', 'beautiful', 'crazy'
-        ]
-
-        # Words that follow "their" (nouns)
-        self.their_indicators = [
-            'car', 'house', 'dog', 'cat', 'friend', 'family', 'children',
-            'parents', 'room', 'home', 'work', 'job', 'life', 'time',
-            'money', 'idea', 'problem', 'question', 'answer', 'name',
-            'phone', 'computer', 'book', 'own', 'turn', 'way', 'place',
-            'head', 'eyes', 'hands', 'body', 'minds', 'hearts'
-        ]
+        # Indicator words (rules/contextual.json):
+        # - youre/theyre: verbs, adjectives, adverbs that follow "you're"/"they're"
+        # - your/their:   nouns that follow the possessive
+        self.rules = load_rules("contextual", self.rules_dir)
+        tables = self.rules.tables
+        self.youre_indicators = tables["youre_indicators"]
+        self.your_indicators = tables["your_indicators"]
+        self.theyre_indicators = tables["theyre_indicators"]
+        self.their_indicators = tables["their_indicators"]
 
         # Compile regex patterns for efficiency
         self._compile_patterns()
@@ -66,19 +45,22 @@ class ContextualCorrector:
         """Compile regex patterns for better performance"""
 
         # YOUR/YOU'RE patterns
-        self.your_pattern = re.compile(
+        self.your_pattern = PATTERNS.register(
+            "contextual.your",
             r'\b(your|you\'?re)\s+(\w+)',
             re.IGNORECASE
         )
 
         # THEIR/THERE/THEY'RE patterns
-        self.their_pattern = re.compile(
+        self.their_pattern = PATTERNS.register(
+            "contextual.their",
             r'\b(their|there|they\'?re)\s+(\w+)',
             re.IGNORECASE
         )
 
         # ITS/IT'S patterns
-        self.its_pattern = re.compile(
+        self.its_pattern = PATTERNS.register(
+            "contextual.its",
             r'\b(its|it\'?s)\s+(\w+)',
             re.IGNORECASE
         )
@@ -123,7 +105,7 @@ class ContextualCorrector:
 
             return f"{correct} {match.group(2)}"
 
-        return self.your_pattern.sub(replacement, text)
+        return self.your_pattern.sub(with_hits(replacement, "your/you're"), text)
 
     def correct_their_there_theyre(self, text: str) -> str:
         """
@@ -165,7 +147,7 @@ class ContextualCorrector:
 
             return f"{correct} {match.group(2)}"
 
-        return self.their_pattern.sub(replacement, text)
+        return self.their_pattern.sub(with_hits(replacement, "their/there/they're"), text)
 
     def correct_its_its(self, text: str) -> str:
         """
@@ -194,7 +176,7 @@ class ContextualCorrector:
 
             return f"{correct} {match.group(2)}"
 
-        return self.its_pattern.sub(replacement, text)
+        return self.its_pattern.sub(with_hits(replacement, "its/it's"), text)
 
     def correct(self, text: str) -> str:
         """
@@ -0,0 +1,65 @@
+"""
+correctors/deadline.py
+
+Per-request time budgets for the correction pipeline.
+
+A caller that needs an answer within N ms passes a Deadline to
+correct(). Before every optional stage (see BaseCorrector.optional_stages)
+run_stages asks the deadline whether the stage - plus the phases that
+still have to run after the core - fits in the remaining time; stages
+that do not fit are skipped and listed in deadline.skipped. Mandatory
+stages always run, so the answer is less thorough, never broken. When
+CorrectionLevel.AGGRESSIVE re-runs the core, a stage is listed once, and
+only if every pass skipped it.
+
+Stage costs are learned per corrector as a moving average of ns per
+input character, measured only on calls that carry a deadline.
+"""
+
+from time import perf_counter_ns
+
+# Weight of the newest observation in the moving averages
+_ALPHA = 0.2
+
+# Cost key for everything correct() runs after the core stages
+POST_CORE = "post_core"
+
+
+class Deadline:
+    __slots__ = ("budget_ms", "expires_ns", "skipped")
+
+    def __init__(self, budget_ms, start_ns=None):
+        self.budget_ms = budget_ms
+        start_ns = perf_counter_ns() if start_ns is None else start_ns
+        self.expires_ns = start_ns + int(budget_ms * 1e6)
+        self.skipped = []
+
+    def remaining_ns(self):
+        return self.expires_ns - perf_counter_ns()
+
+    def expired(self):
+        return self.remaining_ns() <= 0
+
+    def allows(self, cost_ns):
+        """True when work estimated at cost_ns still fits in the budget."""
+        return perf_counter_ns() + cost_ns <= self.expires_ns
+
+    def skip(self, stage):
+        self.skipped.append(stage)
+
+
+class StageCosts:
+    """Moving-average cost (ns per input char) of each stage/phase."""
+
+    def __init__(self):
+        self._per_char = {}
+
+    def estimate_ns(self, name, chars):
+        return int(self._per_char.get(name, 0.0) * chars)
+
+    def observe(self, name, ns, chars):
+        # Races between threads only lose an update; no lock needed
+        per_char = ns / max(chars, 1)
+        previous = self._per_char.get(name)
+        self._per_char[name] = per_char if previous is None else \
+            previous + _ALPHA * (per_char - previous)
@@ -4,483 +4,242 @@ correctors/grammar_corrector.py
 Grammar correction with contextual spelling support.
 """
 
-from .base_corrector import BaseCorrector
+from .base_corrector import BaseCorrector, SentenceCapitalizer
 from .spelling_corrector import SpellingCorrector
 from .contextual_corrector import ContextualCorrector
+from .instrumentation import with_hits
+from .rule_data import load_rules
+from .pattern_cache import PatternCache
+from .rule_analyzer import RULE_OPTIMIZER_ENABLED, StageModel, FusedStage, analyze, sequential_runs
+from .patterns import PATTERNS
+from .replacements import CasedReplacements
 import re
 from typing import Tuple, List
 
 
 class GrammarCorrector(BaseCorrector):
 
+    # Heuristic, lowest-value stages: the first to go under a deadline
+    optional_stages = ("missing_articles", "word_order", "prepositions")
+
+    # fix_overcorrection_articles: 'a/an' the missing-articles heuristic
+    # must not leave before these adjectives
+    ARTICLE_OVERCORRECTIONS = {
+        'a young': 'young',
+        'an young': 'young',
+        'a old': 'old',
+        'an old': 'old',
+        'a big': 'big',
+        'an big': 'big',
+        'a small': 'small',
+        'an small': 'small',
+        'a rich': 'rich',
+        'an rich': 'rich',
+        'a poor': 'poor',
+        'an poor': 'poor',
+    }
+
+    # prevent_well_correction: one literal scan (fast prefix search); the
+    # callback checks for the start of the text or ". ", "! ", "? ", ", "
+    WELL_PATTERN = PATTERNS.register("grammar.prevent_well", r"We'll\b")
+    WELL_CONTEXT = (". ", "! ", "? ", ", ")
+
+    def __init__(self, *args, optimize_rules=RULE_OPTIMIZER_ENABLED, **kwargs):
+        # Drop dead rules and fuse independent stages (rule_analyzer.py)
+        self.optimize_rules = optimize_rules
+        super().__init__(*args, **kwargs)
+
     def setup_dictionaries(self):
         try:
-            self.spelling_corrector = SpellingCorrector()
+            self.spelling_corrector = SpellingCorrector(rules_dir=self.rules_dir)
         except Exception:
             self.spelling_corrector = None
 
         # Initialize contextual corrector
         try:
-            self.contextual_corrector = ContextualCorrector()
+            self.contextual_corrector = ContextualCorrector(rules_dir=self.rules_dir)
         except Exception:
             self.contextual_corrector = None
 
-        # ========================================
-        # CONTRACTIONS - EXPANDED
-        # ========================================
-        self.contractions = {
-            'dont': "don't",
-            'doesnt': "doesn't",
-            'didnt': "didn't",
-            'wont': "won't",
-            'cant': "can't",
-            'couldnt': "couldn't",
-            'shouldnt': "shouldn't",
-            'wouldnt': "wouldn't",
-            'isnt': "isn't",
-            'arent': "aren't",
-            'wasnt': "wasn't",
-            'werent': "weren't",
-            'hasnt': "hasn't",
-            'havent': "haven't",
-            'hadnt': "hadn't",
-            'im': "I'm",
-            'youre': "you're",
-            'hes': "he's",
-            'shes': "she's",
-            'its': "it's",
-            'were': "we're",  # OVO JE PROBLEM - treba da se izbegne
-            'theyre': "they're",
-            'ive': "I've",
-            'youve': "you've",
-            'weve': "we've",
-            'theyve': "they've",
-            'ill': "I'll",
-            'youll': "you'll",
-            'hell': "he'll",
-            'shell': "she'll",
-            'well': "we'll",  # OVO JE PROBLEM - treba da se izbegne
-            'theyll': "they'll",
-            'id': "I'd",
-        }
-
-        # ========================================
-        # IRREGULAR VERBS - EXPANDED
-        # ========================================
-        self.irregular_verbs = {
-            'goed': 'went',
-            'runned': 'ran',
-            'eated': 'ate',
-            'drinked': 'drank',
-            'buyed': 'bought',
-            'thinked': 'thought',
-            'comed': 'came',
-            'sayed': 'said',
-            'maked': 'made',
-            'taked': 'took',
-            'gived': 'gave',
-            'sended': 'sent',
-            'finded': 'found',
-            'knowed': 'knew',
-            'writed': 'wrote',
-
-            # Perfect tense
-            'has ate': 'has eaten',
-            'have ate': 'have eaten',
-            'has went': 'has gone',
-            'have went': 'have gone',
-            'has ran': 'has run',
-            'have ran': 'have run',
-            'has came': 'has come',
-            'have came': 'have come',
-            'has wrote': 'has written',
-            'have wrote': 'have written',
-
-            # Negative past
-            "didn't went": "didn't go",
-            "didn't ate": "didn't eat",
-            "didn't drank": "didn't drink",
-            "didn't came": "didn't come",
-            "didn't ran": "didn't run",
-            "didn't saw": "didn't see",
-            "didn't wrote": "didn't write",
-
-            # Was/were constructions
-            'was went': 'went',
-            'was ate': 'ate',
-            'was came': 'came',
-            'were went': 'went',
-        }
-
-        # ========================================
-        # VERB AGREEMENT - GREATLY EXPANDED
-        # ========================================
-        self.verb_agreements = {
-            # Have/Has
-            'he have': 'he has',
-            'she have': 'she has',
-            'it have': 'it has',
-            'they has': 'they have',
-            'we has': 'we have',
-            'you has': 'you have',
-            'i has': 'i have',
-
-            # Do/Does
-            'he do': 'he does',
-            'she do': 'she does',
-            'it do': 'it does',
-            'they does': 'they do',
-            'we does': 'we do',
-            'you does': 'you do',
-
-            # Go/Goes
-            'he go': 'he goes',
-            'she go': 'she goes',
-            'it go': 'it goes',
-
-            # Is/Are/Am
-            'he are': 'he is',
-            'she are': 'she is',
-            'it are': 'it is',
-            'they is': 'they are',
-            'we is': 'we are',
-            'you is': 'you are',
-            'i is': 'i am',
-
-            # Was/Were
-            'i were': 'i was',  # OVO JE KLJUČNO - popravlja "i were" → "I was"
-            'he were': 'he was',
-            'she were': 'she was',
-            'it were': 'it was',
-            'we was': 'we were',
-            'they was': 'they were',
-            'you was': 'you were',
-
-            # Don't/Doesn't
-            'she dont': "she doesn't",
-            'he dont': "he doesn't",
-            'it dont': "it doesn't",
-            "he don't": "he doesn't",
-            "she don't": "she doesn't",
-            "it don't": "it doesn't",
-            "we doesn't": "we don't",
-            "they doesn't": "they don't",
-            "i doesn't": "i don't",
-            "you doesn't": "you don't",
-
-            # NEW - Demonstratives (this/that/these/those) - CRITICAL FIX
-            'this are': 'this is',
-            'that are': 'that is',
-            'this were': 'this was',
-            'that were': 'that was',
-            'these is': 'these are',
-            'those is': 'those are',
-            'these was': 'these were',
-            'those was': 'those were',
-        }
-
-        # ========================================
-        # COMPOUND SUBJECT + VERB AGREEMENT
-        # ========================================
-        self.compound_subject_fixes = {
-            'he and i was': 'he and i were',
-            'she and i was': 'she and i were',
-            'you and i was': 'you and i were',
-            'they and i was': 'they and i were',
-            'we and i was': 'we and i were',
-            'he and she was': 'he and she were',
-            'him and i was': 'he and i were',
-            'her and i was': 'she and i were',
-
-            # 🔥 FIX #2: "I and I" patterns (after pronoun correction "me and i" → "i and i")
-            'i and i was': 'i and i were',
-            'i and i is': 'i and i are',
-
-            # 🔥 FIX #2: More compound patterns with "was"
-            'me and you was': 'you and i were',
-            'me and he was': 'he and i were',
-            'me and she was': 'she and i were',
-            'me and him was': 'he and i were',
-            'me and her was': 'she and i were',
-        }
-
-        # ========================================
-        # PRONOUN SUBJECT/OBJECT
-        # ========================================
-        self.pronoun_corrections = {
-            'me am': 'i am',
-            'me is': 'i am',
-            'me was': 'i was',
-            'me were': 'i was',
-            'me have': 'i have',
-            'me do': 'i do',
-            'me go': 'i go',
-            'me like': 'i like',
-            'me want': 'i want',
-            'me need': 'i need',
-            'me think': 'i think',
-            'me know': 'i know',
-            'me understand': 'i understand',
-
-            # 🔥 FIX #2: "me and [pronoun]" patterns
-            'me and i': 'i and i',
-            'me and you': 'you and i',
-            'me and he': 'he and i',
-            'me and she': 'she and i',
-            'me and him': 'he and i',
-            'me and her': 'she and i',
-            'me and they': 'they and i',
-            'me and we': 'we and i',
-
-            # 🔥 FIX #2: Reverse order
-            'i and me': 'i and i',
-            'you and me': 'you and i',
-            'he and me': 'he and i',
-            'she and me': 'she and i',
-            'him and me': 'he and i',
-            'her and me': 'she and i',
-            'they and me': 'they and i',
-            'we and me': 'we and i',
-        }
-
-        # ========================================
-        # ARTICLES - EXPANDED
-        # ========================================
-        self.article_corrections = {
-            'a apple': 'an apple',
-            'a orange': 'an orange',
-            'a umbrella': 'an umbrella',
-            'a hour': 'an hour',
-            'a honest': 'an honest',
-            'a interesting': 'an interesting',
-            'a elephant': 'an elephant',
-            'a eagle': 'an eagle',
-            'a onion': 'an onion',
-            'a octopus': 'an octopus',
-
-            'an book': 'a book',
-            'an house': 'a house',
-            'an car': 'a car',
-            'an dog': 'a dog',
-            'an table': 'a table',
-            'an university': 'a university',
-            'an user': 'a user',
-            'an european': 'a european',
-            'an one': 'a one',
-        }
-
-        # ========================================
-        # WORD ORDER - EXPANDED
-        # ========================================
-        self.word_order_rules = {
-            'i tomorrow will': 'i will tomorrow',
-            'always he': 'he always',
-            'never i': 'i never',
-            'often she': 'she often',
-            'sometimes they': 'they sometimes',
-            'always we': 'we always',
-            'usually he': 'he usually',
-            'yesterday i go': 'yesterday i went',  # 🔥 FIX #3: Keep "yesterday" at start
-
-            # Question word order fixes
-            'why she dont': 'why doesn\'t she',
-            'why she doesn\'t': 'why doesn\'t she',
-            'why he dont': 'why doesn\'t he',
-            'why he doesn\'t': 'why doesn\'t he',
-            'why they doesnt': 'why don\'t they',
-            'why they doesn\'t': 'why don\'t they',
-        }
-
-        # ========================================
-        # PREPOSITIONS - EXPANDED
-        # ========================================
-        self.preposition_rules = {
-            'arrived to': 'arrived at',
-            'listen me': 'listen to me',
-            'wait to': 'wait for',
-            'discuss about': 'discuss',
-            'married with': 'married to',
-            'different than': 'different from',
-            'depend of': 'depend on',
-        }
-
-        # ========================================
-        # COMMON PHRASES - EXPANDED
-        # NOTE: Removed "their"->"there" and "your"->"you're"
-        # These are now handled by contextual_corrector
-        # ========================================
-        self.common_phrases = {
-            "it's me": "it's I",
-            "me and him": "he and I",
-            "me and her": "she and I",
-            "him and me": "he and I",
-            "her and me": "she and I",
-            "me and you": "you and I",
-
-            "more better": "better",
-            "most easiest": "easiest",
-            "more faster": "faster",
-            "most biggest": "biggest",
-
-            "could of": "could have",
-            "should of": "should have",
-            "would of": "would have",
-            "must of": "must have",
-            "might of": "might have",
-
-            "alot": "a lot",
-            "incase": "in case",
-            "atleast": "at least",
-            "aswell": "as well",
-        }
-
-        # ========================================
-        # NEW - Common adjectives that need article before noun
-        # ========================================
-        self.common_adjectives = {
-            'bad', 'good', 'great', 'big', 'small', 'new', 'old', 'nice',
-            'beautiful', 'ugly', 'happy', 'sad', 'fast', 'slow', 'hot', 'cold',
-            'long', 'short', 'high', 'low', 'strong', 'weak', 'clean', 'dirty',
-            'easy', 'hard', 'simple', 'complex', 'true', 'false', 'correct', 'wrong',
-            'real', 'fake', 'rich', 'poor', 'young', 'wise', 'foolish', 'brave',
-            'smart', 'stupid', 'funny', 'serious', 'important', 'dangerous', 'safe'
-        }
-
-        self._compile_combined_patterns()
-
-    def _compile_combined_patterns(self):
+        # Rule tables live in rules/grammar.json (see rule_data.py)
+        self.rules = load_rules("grammar", self.rules_dir)
+        tables = self.rules.tables
+        self.contractions = tables["contractions"]
+        self.irregular_verbs = tables["irregular_verbs"]
+        self.verb_agreements = tables["verb_agreements"]
+        self.compound_subject_fixes = tables["compound_subject_fixes"]
+        self.pronoun_corrections = tables["pronoun_corrections"]
+        self.article_corrections = tables["article_corrections"]
+        self.word_order_rules = tables["word_order_rules"]
+        self.preposition_rules = tables["preposition_rules"]
+        self.common_phrases = tables["common_phrases"]
+        # Adjectives that need an article before a noun (add_missing_articles)
+        self.common_adjectives = frozenset(tables["common_adjectives"])
+
+        self._build_replacements()
+        # Stage name -> its table without the dead rules, for the pipeline
+        # only; the tables above and the per-stage methods keep every rule
+        self.stage_tables = {}
+        self.rule_plan = None
+        if self.optimize_rules:
+            self.rule_plan = analyze(self.stage_models(), self._drop_rules)
+
+        # Compiled programs are cached on disk per grammar.json version
+        cache = PatternCache("grammar", self.rules.digest)
+        self._compile_combined_patterns(cache)
+        self.stages = self._build_stages(cache)
+        if self.rule_plan is not None and self.rule_plan.groups:
+            self.stages = self._fuse_stages(self.rule_plan.groups, cache)
+        cache.save()
+
+    def _compile_combined_patterns(self, cache):
         try:
             # Contractions pattern - IZBACUJEMO 'were' i 'well' iz kontrakcija
             contractions_without_problems = {k: v for k, v in self.contractions.items()
                                            if k not in ['were', 'well']}
-            self.contractions_pattern = re.compile(
+            self.contractions_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, contractions_without_problems.keys())) + r')\b',
                 re.IGNORECASE
             )
 
             # 🔥 FIX #2: Recompile pronoun pattern with new entries
-            self.pronoun_pattern = re.compile(
+            self.pronoun_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.pronoun_corrections.keys())) + r')\b',
                 re.IGNORECASE
             )
 
             # 🔥 FIX #2: Recompile compound subject pattern with new entries
-            self.compound_subject_pattern = re.compile(
+            self.compound_subject_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.compound_subject_fixes.keys())) + r')\b',
                 re.IGNORECASE
             )
 
-            self.combined_verb_pattern = re.compile(
+            self.combined_verb_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.verb_agreements.keys())) + r')\b',
                 re.IGNORECASE
             )
-            self.combined_irregular_pattern = re.compile(
+            self.combined_irregular_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.irregular_verbs.keys())) + r')\b',
                 re.IGNORECASE
             )
-            self.combined_word_order_pattern = re.compile(
+            self.combined_word_order_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.word_order_rules.keys())) + r')\b',
                 re.IGNORECASE
             )
-            self.combined_preposition_pattern = re.compile(
+            self.combined_preposition_pattern = cache.compile(
                 r'\b(' + '|'.join(map(re.escape, self.preposition_rules.keys())) + r')\b',
                 re.IGNORECASE
             )
         except Exception:
             pass
 
+        # Tables applied entry by entry, as a few alternations (see sequential_runs)
+        self.common_phrase_passes = self._literal_passes(self.common_phrases, cache)
+        self.overcorrection_passes = self._literal_passes(self.ARTICLE_OVERCORRECTIONS, cache)
+
+    @staticmethod
+    def _literal_passes(rules, cache):
+        passes = []
+        for run in sequential_runs(rules):
+            pattern = cache.compile(r'\b(' + '|'.join(map(re.escape, run.keys())) + r')\b', re.IGNORECASE)
+            lowered = {wrong.lower(): correct for wrong, correct in run.items()}
+            replacements = CasedReplacements(run, lambda matched, lowered=lowered: lowered[matched.lower()])
+            passes.append((pattern, replacements.callback))
+        return passes
+
+    def _build_replacements(self):
+        """Casing-aware replacement tables of the table stages (replacements.py)."""
+        self.replacements = {
+            "contractions": CasedReplacements(
+                [k for k in self.contractions if k not in ['were', 'well']], self._contraction_for),
+            "pronouns": CasedReplacements(self.pronoun_corrections, self._pronoun_for),
+        }
+        for name, mapping in (("verb_agreement", self.verb_agreements),
+                              ("irregular_verbs", self.irregular_verbs),
+                              ("compound_subject", self.compound_subject_fixes),
+                              ("word_order", self.word_order_rules),
+                              ("prepositions", self.preposition_rules)):
+            self.replacements[name] = CasedReplacements(mapping, self._table_replacement(mapping))
+
     def correct_contractions(self, text: str) -> str:
         """Fix missing apostrophes in contractions - POBOLJŠANA VERZIJA"""
+        return self.contractions_pattern.sub(with_hits(self.replacements["contractions"].callback), text)
 
-        def replacement(match):
-            word = match.group().lower()
+    def _contraction_for(self, matched):
+        word = matched.lower()
 
-            # 🔥 FIX: Sprečava "were" → "we're" grešku
-            if word == 'were':
-                return match.group()  # Vrati original "were"
+        # 🔥 FIX: Sprečava "were" → "we're" grešku
+        if word == 'were':
+            return matched  # Vrati original "were"
 
-            # 🔥 NOVI FIX: Sprečava "well" → "we'll" grešku
-            if word == 'well':
-                return match.group()  # Vrati original "well"
+        # 🔥 NOVI FIX: Sprečava "well" → "we'll" grešku
+        if word == 'well':
+            return matched  # Vrati original "well"
 
-            correct = self.contractions.get(word, word)
+        correct = self.contractions.get(word, word)
 
-            # 🔥 POBOLJŠANJE: Uvek kapitalizuj "I" u kontrakcijama
-            if correct.lower().startswith("i"):
-                correct = correct.replace('i', 'I')
+        # 🔥 POBOLJŠANJE: Uvek kapitalizuj "I" u kontrakcijama
+        if correct.lower().startswith("i"):
+            correct = correct.replace('i', 'I')
 
-                # Poseban slučaj za kontrakcije u sredini rečenice
-                if match.group()[0].islower() and not match.group()[0].isupper():
-                    # Ovo je "i'm" u sredini - kapitalizuj samo "I"
-                    correct = 'I' + correct[1:]
-
-            # Preserve original casing for first character
-            elif match.group()[0].isupper():
-                correct = correct.capitalize()
+            # Poseban slučaj za kontrakcije u sredini rečenice
+            if matched[0].islower() and not matched[0].isupper():
+                # Ovo je "i'm" u sredini - kapitalizuj samo "I"
+                correct = 'I' + correct[1:]
 
-            return correct
+        # Preserve original casing for first character
+        elif matched[0].isupper():
+            correct = correct.capitalize()
 
-        return self.contractions_pattern.sub(replacement, text)
+        return correct
 
     def prevent_well_correction(self, text: str) -> str:
         """
         Sprečava korekciju 'well' → 'we'll' koja je pogrešna.
         """
         # Koristimo regex da zamenimo 'We'll' nazad u 'Well' kada je na početku rečenice
-        text = re.sub(r'^We\'ll\b', 'Well', text)
-        text = re.sub(r'\. We\'ll\b', '. Well', text)
-        text = re.sub(r'\! We\'ll\b', '! Well', text)
-        text = re.sub(r'\? We\'ll\b', '? Well', text)
-        text = re.sub(r'\, We\'ll\b', ', Well', text)
-        return text
+        return self.WELL_PATTERN.sub(self._well_replacement, text)
+
+    def _well_replacement(self, match):
+        start = match.start()
+        if start == 0 or match.string[start - 2:start] in self.WELL_CONTEXT:
+            return 'Well'
+        return match.group()
 
     def fix_overcorrection_articles(self, text: str) -> str:
         """
         Popravlja preterano dodavanje članova ispred pridjeva.
         """
         # Uklanja 'a/an' ispred pridjeva koji ne trebaju član
-        overcorrections = {
-            'a young': 'young',
-            'an young': 'young',
-            'a old': 'old',
-            'an old': 'old',
-            'a big': 'big',
-            'an big': 'big',
-            'a small': 'small',
-            'an small': 'small',
-            'a rich': 'rich',
-            'an rich': 'rich',
-            'a poor': 'poor',
-            'an poor': 'poor',
-        }
-
-        for wrong, correct in overcorrections.items():
-            text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text, flags=re.IGNORECASE)
-
+        for pattern, replacement in self.overcorrection_passes:
+            text = pattern.sub(with_hits(replacement), text)
         return text
 
     def correct_pronouns(self, text: str) -> str:
         """Fix subject pronoun errors like 'me am' -> 'i am' and 'me and i' -> 'i and i'"""
+        return self.pronoun_pattern.sub(with_hits(self.replacements["pronouns"].callback), text)
 
-        def replacement(match):
-            phrase = match.group().lower()
-            correct = self.pronoun_corrections.get(phrase, phrase)
-
-            # Always capitalize I
-            if correct.startswith('i '):
-                correct = 'I' + correct[1:]
+    def _pronoun_for(self, matched):
+        phrase = matched.lower()
+        correct = self.pronoun_corrections.get(phrase, phrase)
 
-            # Handle "I and I" pattern
-            if 'i and i' in correct:
-                correct = correct.replace('i and i', 'I and I')
+        # Always capitalize I
+        if correct.startswith('i '):
+            correct = 'I' + correct[1:]
 
-            return correct
+        # Handle "I and I" pattern
+        if 'i and i' in correct:
+            correct = correct.replace('i and i', 'I and I')
 
-        return self.pronoun_pattern.sub(replacement, text)
+        return correct
 
     def correct_common_phrases(self, text: str) -> str:
-        for wrong, correct in self.common_phrases.items():
-            text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text, flags=re.IGNORECASE)
+        return self._apply_passes(text, self.common_phrase_passes)
+
+    @staticmethod
+    def _apply_passes(text, passes):
+        for pattern, replacement in passes:
+            text = pattern.sub(with_hits(replacement), text)
         return text
 
     def correct_articles(self, text):
@@ -539,115 +298,185 @@ class GrammarCorrector(BaseCorrector):
 
         return ' '.join(result)
 
-    def apply_pattern_replacement(self, text, mapping, pattern):
-        def repl(m):
-            result = mapping.get(m.group().lower(), m.group())
+    def apply_pattern_replacement(self, text, replacements, pattern):
+        return pattern.sub(with_hits(replacements.callback), text)
+
+    @staticmethod
+    def _table_replacement(mapping):
+        def repl(matched):
+            result = mapping.get(matched.lower(), matched)
             # Always capitalize standalone "I"
-            result = re.sub(r'\bi\b', 'I', result)
+            result = SentenceCapitalizer.STANDALONE_I_PATTERN.sub('I', result)
             return result
 
-        return pattern.sub(repl, text)
-
-    def core_correction_logic(self, text: str) -> Tuple[str, List[str]]:
-        corrected = text
-        changes = []
+        return repl
+
+    def _table_stage(self, name, pattern):
+        replacements = self.replacements[name]
+        return lambda t: self.apply_pattern_replacement(t, replacements, pattern)
+
+    def _pipeline_stage(self, name, stage, cache):
+        """`stage`, or the same pass over the table _drop_rules pruned for it."""
+        rules = self.stage_tables.get(name)
+        if rules is None:
+            return stage
+        if name == "common_phrases":
+            passes = self._literal_passes(rules, cache)
+            return lambda t: self._apply_passes(t, passes)
+        pattern = cache.compile(r'\b(' + '|'.join(map(re.escape, rules.keys())) + r')\b', re.IGNORECASE)
+        return self._table_stage(name, pattern)
+
+    def stage_models(self):
+        """How each stage of _build_stages rewrites text, for rule_analyzer."""
+        optional = set(self.optional_stages)
+        pruned = self.stage_tables
+
+        def table(name, label, rules, callback, attr):
+            return StageModel(name, label, "table", pruned.get(name, rules), callback, attr,
+                              optional=name in optional)
+
+        models = []
+        if self.spelling_corrector:
+            models.append(StageModel("spelling", "spelling", "table", self.spelling_corrector.spelling_rules))
+        if self.contextual_corrector:
+            # Rewrites the homophone and the whitespace after it
+            models.append(StageModel("contextual", "contextual spelling", "code", passes=3, joins=True,
+                                     writes=self.contextual_corrector.WRITES))
+        models += [
+            table("contractions", "contractions",
+                  {k: v for k, v in self.contractions.items() if k not in ['were', 'well']},
+                  self.replacements["contractions"].callback, "contractions"),
+            StageModel("prevent_well", "prevent well overcorrection", "code", writes=("well",)),
+            table("pronouns", "pronouns", self.pronoun_corrections, self.replacements["pronouns"].callback,
+                  "pronoun_corrections"),
+            table("verb_agreement", "verb agreement", self.verb_agreements,
+                  self.replacements["verb_agreement"].callback, "verb_agreements"),
+            table("irregular_verbs", "irregular verb", self.irregular_verbs,
+                  self.replacements["irregular_verbs"].callback, "irregular_verbs"),
+            StageModel("common_phrases", "common phrase", "sequential",
+                       pruned.get("common_phrases", self.common_phrases), table="common_phrases"),
+            table("compound_subject", "compound subject", self.compound_subject_fixes,
+                  self.replacements["compound_subject"].callback, "compound_subject_fixes"),
+            StageModel("articles", "article", "code", joins=True,
+                       writes=self.article_corrections.values()),
+            StageModel("missing_articles", "missing article", "code", joins=True, writes=("a", "an"),
+                       optional="missing_articles" in optional),
+            StageModel("article_overcorrection", "fix article overcorrection", "sequential",
+                       self.ARTICLE_OVERCORRECTIONS),
+            table("word_order", "word order", self.word_order_rules,
+                  self.replacements["word_order"].callback, "word_order_rules"),
+            table("prepositions", "preposition", self.preposition_rules,
+                  self.replacements["prepositions"].callback, "preposition_rules"),
+        ]
+        return models
+
+    def _drop_rules(self, models, dead):
+        """
+        Copy the stages' tables without their dead rules into stage_tables;
+        returns the models of the pruned stages. The tables themselves are
+        left alone, so the per-stage methods keep every rule (the
+        replacement callbacks, built from the full tables, cover the
+        pruned ones).
+        """
+        for model in models:
+            keys = dead.get(model.name)
+            if keys and model.table:
+                self.stage_tables[model.name] = {k: v for k, v in model.rules.items()
+                                                 if k.lower() not in keys}
+        return self.stage_models()
+
+    def _fuse_stages(self, groups, cache):
+        """Replace each group of independent table stages with one FusedStage."""
+        models = {model.name: model for model in self.stage_models()}
+        fused = {}
+        for group in groups:
+            stage = FusedStage([models[name] for name in group], cache.compile)
+            for name in group:
+                fused[name] = stage
+            if stage.optional:
+                self.optional_stages = self.optional_stages + (stage.name,)
+
+        stages = []
+        for entry in self.stages:
+            stage = fused.get(entry[0])
+            if stage is None:
+                stages.append(entry)
+            elif stage.names[0] == entry[0]:
+                stages.append(stage.stage())
+        return stages
+
+    def _build_stages(self, cache):
+        """
+        Ordered stage table for core_correction_logic:
+        (metric name, change label, function). Order matters.
+        """
+        stages = []
 
         # 1. Spelling corrections
         if self.spelling_corrector:
-            tmp = self.spelling_corrector.correct_spelling(corrected)
-            if tmp != corrected:
-                changes.append("spelling")
-            corrected = tmp
+            stages.append(("spelling", "spelling", self.spelling_corrector.correct_spelling))
 
         # 2. CONTEXTUAL SPELLING (before contractions!)
         if self.contextual_corrector:
-            tmp = self.contextual_corrector.correct(corrected)
-            if tmp != corrected:
-                changes.append("contextual spelling")
-            corrected = tmp
-
-        # 3. Contractions (high priority) - POBOLJŠANO
-        tmp = self.correct_contractions(corrected)
-        if tmp != corrected:
-            changes.append("contractions")
-        corrected = tmp
-
-        # 🔥 NOVI FIX: Sprečava 'well' → 'we'll' grešku
-        tmp = self.prevent_well_correction(corrected)
-        if tmp != corrected:
-            changes.append("prevent well overcorrection")
-        corrected = tmp
-
-        # 4. 🔥 FIX #2: Pronoun corrections (BEFORE compound subjects)
-        # This converts "me and i" -> "i and i" first
-        tmp = self.correct_pronouns(corrected)
-        if tmp != corrected:
-            changes.append("pronouns")
-        corrected = tmp
-
-        # 5. Verb agreement
-        tmp = self.apply_pattern_replacement(corrected, self.verb_agreements, self.combined_verb_pattern)
-        if tmp != corrected:
-            changes.append("verb agreement")
-        corrected = tmp
-
-        # 6. Irregular verbs
-        tmp = self.apply_pattern_replacement(corrected, self.irregular_verbs, self.combined_irregular_pattern)
-        if tmp != corrected:
-            changes.append("irregular verb")
-        corrected = tmp
-
-        # 7. Common phrases (includes "me and him" → "he and I")
-        tmp = self.correct_common_phrases(corrected)
-        if tmp != corrected:
-            changes.append("common phrase")
-        corrected = tmp
-
-        # 8. 🔥 FIX #2: Compound subject + verb agreement (AFTER pronouns)
-        # Now "i and i was" becomes "i and i were"
-        tmp = self.apply_pattern_replacement(corrected, self.compound_subject_fixes, self.compound_subject_pattern)
-        if tmp != corrected:
-            changes.append("compound subject")
-        corrected = tmp
-
-        # 9. Articles (a/an corrections)
-        tmp = self.correct_articles(corrected)
-        if tmp != corrected:
-            changes.append("article")
-        corrected = tmp
-
-        # 10. Add missing articles before adjective + noun
-        tmp = self.add_missing_articles(corrected)
-        if tmp != corrected:
-            changes.append("missing article")
-        corrected = tmp
-
-        # 🔥 NOVI FIX: Popravlja preterano dodavanje članova
-        tmp = self.fix_overcorrection_articles(corrected)
-        if tmp != corrected:
-            changes.append("fix article overcorrection")
-        corrected = tmp
-
-        # 11. Word order (includes question fixes)
-        tmp = self.apply_pattern_replacement(corrected, self.word_order_rules, self.combined_word_order_pattern)
-        if tmp != corrected:
-            changes.append("word order")
-        corrected = tmp
-
-        # 12. Prepositions
-        tmp = self.apply_pattern_replacement(corrected, self.preposition_rules, self.combined_preposition_pattern)
-        if tmp != corrected:
-            changes.append("preposition")
-        corrected = tmp
-
-        return corrected, changes
-
-    def correct(self, text: str, safe_mode: bool = True) -> str:
+            stages.append(("contextual", "contextual spelling", self.contextual_corrector.correct))
+
+        stages += [
+            # 3. Contractions (high priority) - POBOLJŠANO
+            ("contractions", "contractions", self.correct_contractions),
+
+            # 🔥 NOVI FIX: Sprečava 'well' → 'we'll' grešku
+            ("prevent_well", "prevent well overcorrection", self.prevent_well_correction),
+
+            # 4. 🔥 FIX #2: Pronoun corrections (BEFORE compound subjects)
+            # This converts "me and i" -> "i and i" first
+            ("pronouns", "pronouns", self.correct_pronouns),
+
+            # 5. Verb agreement
+            ("verb_agreement", "verb agreement",
+             self._table_stage("verb_agreement", self.combined_verb_pattern)),
+
+            # 6. Irregular verbs
+            ("irregular_verbs", "irregular verb",
+             self._table_stage("irregular_verbs", self.combined_irregular_pattern)),
+
+            # 7. Common phrases (includes "me and him" → "he and I")
+            ("common_phrases", "common phrase", self.correct_common_phrases),
+
+            # 8. 🔥 FIX #2: Compound subject + verb agreement (AFTER pronouns)
+            # Now "i and i was" becomes "i and i were"
+            ("compound_subject", "compound subject",
+             self._table_stage("compound_subject", self.compound_subject_pattern)),
+
+            # 9. Articles (a/an corrections)
+            ("articles", "article", self.correct_articles),
+
+            # 10. Add missing articles before adjective + noun
+            ("missing_articles", "missing article", self.add_missing_articles),
+
+            # 🔥 NOVI FIX: Popravlja preterano dodavanje članova
+            ("article_overcorrection", "fix article overcorrection", self.fix_overcorrection_articles),
+
+            # 11. Word order (includes question fixes)
+            ("word_order", "word order",
+             self._table_stage("word_order", self.combined_word_order_pattern)),
+
+            # 12. Prepositions
+            ("prepositions", "preposition",
+             self._table_stage("prepositions", self.combined_preposition_pattern)),
+        ]
+
+        # Stages whose table lost dead rules run a pass over the pruned copy
+        return [(name, label, self._pipeline_stage(name, stage, cache)) for name, label, stage in stages]
+
+    def core_correction_logic(self, text: str, deadline=None, stages=None) -> Tuple[str, List[str]]:
+        return self.run_stages(text, self.stages if stages is None else stages, deadline)
+
+    def correct(self, text: str, safe_mode: bool = True, deadline=None, level=None, language=None) -> str:
         """
         Enhanced with optional safe mode for production.
         """
         # Existing correction logic...
-        corrected = super().correct(text)
+        corrected = super().correct(text, deadline, level, language)
 
         # 🔥 SAFETY LAYER: Apply safe mode if enabled (default: True)
         # Za sada samo vratimo corrected, kasnije ćemo dodati SafeMode
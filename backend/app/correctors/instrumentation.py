@@ -0,0 +1,154 @@
+"""
+correctors/instrumentation.py
+
+Stage timing hooks for the correction pipeline.
+
+The correctors know nothing about metrics backends. They ask for a
+StageTimer, call lap() after every phase/stage and finish() at the end;
+the collected (kind, name, ns) laps are then handed to every registered
+observer in one call, and to the per-request trace opened with
+collect_timings(), if any. When nobody is listening, stage_timer()
+returns None and the pipeline skips all timing work.
+
+Rule hits work the same way: inside collect_hits(), replacement
+callbacks record every rule that changed the text (rule_hits() returns
+None otherwise, so callbacks skip the bookkeeping).
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter_ns
+
+# Copy-on-write list, so readers never need a lock
+_observers = ()
+
+# Per-request trace: list of (corrector, kind, name, ns), or None
+_trace = ContextVar("stage_trace", default=None)
+
+# Per-call rule hit collector (RuleHits), or None
+_hits = ContextVar("rule_hits", default=None)
+
+
+def add_observer(observer):
+    """Register observer(corrector_name, laps), laps = [(kind, name, ns), ...]."""
+    global _observers
+    if observer not in _observers:
+        _observers = _observers + (observer,)
+
+
+def remove_observer(observer):
+    global _observers
+    _observers = tuple(o for o in _observers if o is not observer)
+
+
+@contextmanager
+def collect_timings():
+    """
+    Record every phase/stage lap of the corrections run inside the block
+    (in the current thread/context). Yields the list the laps go into.
+    Blocks can nest; an enclosing block also receives the inner laps.
+    """
+    outer = _trace.get()
+    laps = []
+    token = _trace.set(laps)
+    try:
+        yield laps
+    finally:
+        _trace.reset(token)
+        if outer is not None:
+            outer.extend(laps)
+
+
+class StageTimer:
+    __slots__ = ("owner", "laps", "_last", "_observers", "_trace")
+
+    def __init__(self, owner, observers, trace):
+        self.owner = owner
+        self.laps = []
+        self._observers = observers
+        self._trace = trace
+        self._last = perf_counter_ns()
+
+    def lap(self, kind, name):
+        """Record the time since the previous lap under (kind, name)."""
+        now = perf_counter_ns()
+        self.laps.append((kind, name, now - self._last))
+        self._last = now
+
+    def finish(self):
+        for observer in self._observers:
+            observer(self.owner, self.laps)
+        if self._trace is not None:
+            self._trace.extend((self.owner, kind, name, ns) for kind, name, ns in self.laps)
+
+
+def stage_timer(owner):
+    """Return a StageTimer for `owner`, or None when nobody is listening."""
+    observers = _observers
+    trace = _trace.get()
+    if not observers and trace is None:
+        return None
+    return StageTimer(owner, observers, trace)
+
+
+class RuleHits:
+    """
+    Rules that changed the text during one correction. Every hit is a
+    dict {stage, rule, start, end, before, after}; start/end are offsets
+    into the text as that stage received it. run_stages fills in the
+    stage (unless a fused stage already named its member) and the change
+    labels (applied).
+    """
+    __slots__ = ("hits", "applied")
+
+    def __init__(self):
+        self.hits = []
+        self.applied = []
+
+    def record(self, rule, match, after, stage=None):
+        """Record a regex replacement callback's result, if it changed anything."""
+        if after != match.group():
+            self.hits.append({"stage": stage, "rule": rule, "start": match.start(),
+                              "end": match.end(), "before": match.group(), "after": after})
+
+    def counts(self):
+        """{stage: {rule: hits}}"""
+        counts = {}
+        for hit in self.hits:
+            rules = counts.setdefault(hit["stage"], {})
+            rules[hit["rule"]] = rules.get(hit["rule"], 0) + 1
+        return counts
+
+
+@contextmanager
+def collect_hits():
+    """Collect the rule hits of the corrections run inside the block."""
+    collector = RuleHits()
+    token = _hits.set(collector)
+    try:
+        yield collector
+    finally:
+        _hits.reset(token)
+
+
+def rule_hits():
+    """The active RuleHits collector, or None."""
+    return _hits.get()
+
+
+def with_hits(callback, rule=None):
+    """
+    Wrap a re.sub replacement callback so the replacements it makes are
+    recorded as hits of `rule` (default: the lowercased matched text).
+    Returns the callback itself when no collector is active.
+    """
+    collector = _hits.get()
+    if collector is None:
+        return callback
+
+    def recorded(match):
+        after = callback(match)
+        collector.record(rule or match.group().lower(), match, after)
+        return after
+
+    return recorded
@@ -0,0 +1,97 @@
+"""
+correctors/patterns.py
+
+One registry for every regex the correctors use, so nothing is compiled
+on the request path.
+
+re.sub(str, ...) and friends look the pattern up in re's internal cache
+on every call (512 entries, cleared wholesale when full) - with one
+pattern per rule-table entry that cache thrashes and the patterns get
+recompiled under load. Instead:
+
+- fixed patterns are registered by name at import time:
+      WHITESPACE = PATTERNS.register("normalizer.whitespace", r'\\s+')
+- patterns built from rule tables go through PATTERNS.shared(), keyed by
+  (source, flags): correctors built from the same rules (the spelling
+  corrector inside the grammar corrector, the next snapshot after a
+  reload that didn't touch a table) reuse one compiled object. Those are
+  held weakly and go away with the last corrector using them.
+
+record_compiles() is the test hook: it lists every compilation made
+inside the block, including the implicit ones of re.sub(str, ...).
+app/tests/test_pattern_registry.py runs the correctors under it and
+expects the list to be empty.
+"""
+
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+class PatternRegistry:
+
+    def __init__(self):
+        self._named = {}
+        self._sources = {}
+        self._shared = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, name, pattern, flags=0):
+        """Compile a fixed pattern under a unique name; kept for the life of the process."""
+        with self._lock:
+            if name in self._named:
+                if self._sources[name] != (pattern, int(flags)):
+                    raise ValueError(f"Pattern '{name}' is already registered with another source")
+                return self._named[name]
+            self._sources[name] = (pattern, int(flags))
+            compiled = self._named[name] = re.compile(pattern, flags)
+            return compiled
+
+    def shared(self, pattern, flags=0, compile=re.compile):
+        """The compiled pattern for (pattern, flags), compiling it with `compile` if no one holds it."""
+        key = (pattern, int(flags))
+        compiled = self._shared.get(key)
+        if compiled is None:
+            compiled = compile(pattern, flags)
+            with self._lock:
+                compiled = self._shared.setdefault(key, compiled)
+        return compiled
+
+    def __getitem__(self, name):
+        return self._named[name]
+
+    def names(self):
+        return sorted(self._named)
+
+    def shared_patterns(self):
+        """The shared patterns some corrector still holds."""
+        return list(self._shared.values())
+
+    def stats(self):
+        return {"named": len(self._named), "shared": len(self._shared)}
+
+
+PATTERNS = PatternRegistry()
+
+
+@contextmanager
+def record_compiles():
+    """
+    Test hook: yields a list that collects the (pattern, flags) of every
+    regex compiled inside the block - re.compile and the string-pattern
+    calls (re.sub, re.search, ...) alike. Not thread safe; tests only.
+    """
+    compiled = []
+    original = re._compile
+
+    def recording(pattern, flags):
+        if not isinstance(pattern, re.Pattern):
+            compiled.append((pattern, flags))
+        return original(pattern, flags)
+
+    re._compile = recording
+    try:
+        yield compiled
+    finally:
+        re._compile = original
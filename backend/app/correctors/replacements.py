@@ -0,0 +1,58 @@
+"""
+correctors/replacements.py
+
+Casing-aware replacement tables for the rule-table callbacks.
+
+A table stage's callback used to work out every replacement per match:
+lowercase the match, look it up, then restore the casing (and, for some
+tables, capitalize a standalone "i" with a regex). The result depends
+only on the matched string, and nearly every match is written in one of
+a few casings of its key, so CasedReplacements computes those once when
+the table is built:
+
+    lowercase        "dont"     "he and i was"
+    Capitalized      "Dont"     "He and i was"
+    UPPER            "DONT"     "HE AND I WAS"
+    "I" forms        "he and I was", "He and I was"
+
+The callback is then a dict lookup keyed by the exact matched string.
+Any other casing ("dOnT") falls back to the stage's own function, so the
+output is the same for every input.
+"""
+
+from .patterns import PATTERNS
+
+_STANDALONE_I = PATTERNS.register("capitalizer.standalone_i", r'\bi\b')
+
+
+def casings(key):
+    """The spellings of `key` the table precomputes."""
+    lower = key.lower()
+    i_form = _STANDALONE_I.sub('I', lower)
+    return {lower, lower[:1].upper() + lower[1:], lower.upper(),
+            i_form, i_form[:1].upper() + i_form[1:]}
+
+
+class CasedReplacements:
+    """
+    replace(matched) for every casing of every key, precomputed.
+    `callback` is the re.sub callback; `replace` the fallback (and the
+    per-match computation the table replaces).
+    """
+    __slots__ = ("replace", "exact", "callback")
+
+    def __init__(self, keys, replace):
+        self.replace = replace
+        self.exact = {variant: replace(variant) for key in keys for variant in casings(key)}
+
+        lookup = self.exact.get
+
+        def callback(match):
+            matched = match.group()
+            result = lookup(matched)
+            return replace(matched) if result is None else result
+
+        self.callback = callback
+
+    def __len__(self):
+        return len(self.exact)
@@ -0,0 +1,318 @@
+"""
+correctors/rule_analyzer.py
+
+Build-time analysis of the grammar pipeline's rule tables.
+
+Most grammar stages are one pass of a rule table: a `\\b(key|key|...)\\b`
+alternation (ignoring case) whose matches are replaced by the key's
+value. Looking only at the tables, the analyzer finds
+
+- dead rules: keys an earlier stage always rewrites, with no stage in
+  between able to write them back ("alot" is fixed by spelling long
+  before common_phrases could see it). Dropping them cannot change any
+  output.
+- independent neighbours: consecutive table stages whose keys never
+  overlap and whose values never form a key of a later one. Their passes
+  are fused into one `\\b(?:(?P<s0>...)|(?P<s1>...))\\b` scan that hands
+  every match to its own stage's callback: the same output, one pass over
+  the text instead of several.
+
+Text is compared as sequences of lowercased \\w+ tokens: a key can only
+appear in text containing its tokens in order, so "could this stage have
+written that key" becomes a token-overlap test. It errs on the safe
+side: a rule with punctuation at an edge, or a stage that is code rather
+than a table (only the words it can write are known), counts as
+interacting with everything it might touch, and is left alone.
+
+app/tests/rule_optimizer_check.py runs the optimized and the plain
+pipeline over the test corpora and fails on any difference.
+RULE_OPTIMIZER=0 builds the plain pipeline.
+"""
+
+import os
+import re
+
+from .instrumentation import rule_hits
+from .patterns import PATTERNS
+
+RULE_OPTIMIZER_ENABLED = os.getenv("RULE_OPTIMIZER", "1") != "0"
+
+_TOKEN = PATTERNS.register("analyzer.token", r"\w+")
+_WORD_CHAR = PATTERNS.register("analyzer.word_char", r"\w")
+
+
+class StageModel:
+    """
+    What one stage can do to the text.
+
+    kind "table":       one pass of the `rules` alternation; `callback`
+                        (None if the stage can't be fused) replaces a match
+         "sequential":  the `rules` entries one by one, in order (run as
+                        the alternations of sequential_runs)
+         "code":        anything else; `writes` are the words it can put
+                        into the text, `joins` whether it can collapse
+                        whitespace (and so form multi-word keys)
+
+    `table` names the corrector attribute holding the rules (marks the
+    stage as prunable; dead rules are dropped from a copy the pipeline
+    runs, not from the attribute); `passes` counts its scans over the
+    text.
+    """
+    __slots__ = ("name", "label", "kind", "rules", "callback", "table",
+                 "writes", "joins", "optional", "passes")
+
+    def __init__(self, name, label, kind, rules=None, callback=None, table=None,
+                 writes=(), joins=False, optional=False, passes=1):
+        self.name = name
+        self.label = label
+        self.kind = kind
+        self.rules = rules
+        self.callback = callback
+        self.table = table
+        self.writes = frozenset(t for word in writes for t in tokens(word))
+        self.joins = joins
+        self.optional = optional
+        self.passes = len(sequential_runs(rules)) if kind == "sequential" else passes
+
+
+class Plan:
+    """The analyzer's result: rules to drop and stages to fuse."""
+    __slots__ = ("dead", "groups", "passes_before", "passes_after")
+
+    def __init__(self, dead, groups, passes_before, passes_after):
+        self.dead = dead          # {stage: [keys]}
+        self.groups = groups      # [[stage, ...]] fused, in pipeline order
+        self.passes_before = passes_before
+        self.passes_after = passes_after
+
+    def summary(self):
+        return {
+            "dead_rules": {stage: list(keys) for stage, keys in self.dead.items()},
+            "fused_stages": ["+".join(group) for group in self.groups],
+            "passes_before": self.passes_before,
+            "passes_after": self.passes_after,
+        }
+
+
+def tokens(phrase):
+    return tuple(_TOKEN.findall(phrase.lower()))
+
+
+def word_edged(phrase):
+    """Starts and ends with a word character: \\b behaves the same around it and its value."""
+    return bool(phrase) and bool(_WORD_CHAR.match(phrase[0]) and _WORD_CHAR.match(phrase[-1]))
+
+
+def overlaps(a, b):
+    """Can token sequences a and b share text: one inside the other, or one running into the other?"""
+    la, lb = len(a), len(b)
+    for shift in range(1 - lb, la):  # b starts at a[shift]
+        lo, hi = max(0, shift), min(la, shift + lb)
+        if a[lo:hi] == b[lo - shift:hi - shift]:
+            return True
+    return False
+
+
+class _Step:
+    """One rewrite in pipeline order: a table pass, or one entry of a sequential stage."""
+    __slots__ = ("model", "rules", "wild", "by_token")
+
+    def __init__(self, model, rules):
+        self.model = model
+        self.rules = rules  # {key: value}, lowercased; None for code
+        self.wild = False
+        self.by_token = {}
+        if rules is None:
+            return
+        for key, value in rules.items():
+            if not (word_edged(key) and word_edged(value)):
+                self.wild = True  # can't reason about its matches: interacts with everything
+            for token in set(tokens(value)):
+                self.by_token.setdefault(token, []).append(tokens(value))
+
+    def can_write(self, key_tokens):
+        """Can this step leave an occurrence of the key in its output that it didn't get as input?"""
+        if self.rules is None:
+            model = self.model
+            return (model.joins and len(key_tokens) > 1) or not model.writes.isdisjoint(key_tokens)
+        if self.wild:
+            return True
+        for token in set(key_tokens):
+            for value in self.by_token.get(token, ()):
+                if overlaps(value, key_tokens):
+                    return True
+        return False
+
+
+def commute(first, second):
+    """
+    Do two literal rules (key, value) give the same text applied in either
+    order - and so in one alternation? Keys that can't overlap, and
+    neither value can form the other's key.
+    """
+    (first_key, first_value), (second_key, second_value) = first, second
+    if not all(map(word_edged, (first_key, first_value, second_key, second_value))):
+        return False
+    first_key, first_value = tokens(first_key), tokens(first_value)
+    second_key, second_value = tokens(second_key), tokens(second_value)
+    return not (overlaps(first_key, second_key) or overlaps(first_value, second_key)
+                or overlaps(second_value, first_key))
+
+
+def sequential_runs(rules):
+    """
+    Split rules applied one by one into as few alternations as possible,
+    keeping the result: an entry joins the run right after the last run
+    holding an earlier entry it doesn't commute with. Entries of a run
+    commute with each other, so one scan over their alternation equals
+    applying them in turn, and no entry moves past one it doesn't commute
+    with.
+    """
+    runs = []
+    placed = []
+    for rule in rules.items():
+        run = 0
+        for other, other_run in placed:
+            if other_run >= run and not commute(other, rule):
+                run = other_run + 1
+        if run == len(runs):
+            runs.append({})
+        runs[run][rule[0]] = rule[1]
+        placed.append((rule, run))
+    return runs
+
+
+def _steps(models):
+    steps = []
+    for model in models:
+        if model.kind == "code":
+            steps.append(_Step(model, None))
+        elif model.kind == "table":
+            steps.append(_Step(model, {k.lower(): v.lower() for k, v in model.rules.items()}))
+        else:
+            steps += [_Step(model, {k.lower(): v.lower()}) for k, v in model.rules.items()]
+    return steps
+
+
+def dead_rules(models):
+    """
+    {stage: [keys]} of rules that can never match. A key is dead when the
+    nearest earlier step that knows it is a non-optional table pass or
+    sequential entry, and neither that step nor any after it can write
+    the key again: every occurrence is consumed by some match there (the
+    key's own, or an overlapping rule's) and nothing puts one back.
+    """
+    steps = _steps(models)
+    dead = {}
+    for j, step in enumerate(steps):
+        if step.rules is None:
+            continue
+        for key in step.rules:
+            if not word_edged(key):
+                continue
+            key_tokens = tokens(key)
+            for earlier in reversed(steps[:j]):
+                if earlier.can_write(key_tokens):
+                    break
+                if (earlier.rules is not None and key in earlier.rules
+                        and not earlier.model.optional):
+                    dead.setdefault(step.model.name, []).append(key)
+                    break
+    return dead
+
+
+def independent(first, second):
+    """Is one pass over `first`'s and `second`'s keys the same as first's pass, then second's?"""
+    first_rules = {k.lower(): v.lower() for k, v in first.rules.items()}
+    second_rules = {k.lower(): v.lower() for k, v in second.rules.items()}
+    if not all(map(word_edged, [*first_rules, *first_rules.values(),
+                                *second_rules, *second_rules.values()])):
+        return False
+
+    # Neither stage's matches can overlap the other's (in the same text)...
+    second_keys = {}
+    for key in second_rules:
+        for token in set(tokens(key)):
+            second_keys.setdefault(token, []).append(tokens(key))
+    for phrase in [*first_rules, *first_rules.values()]:
+        # ...and first's replacements never form a key of second
+        phrase_tokens = tokens(phrase)
+        for token in set(phrase_tokens):
+            for key in second_keys.get(token, ()):
+                if overlaps(phrase_tokens, key):
+                    return False
+    return True
+
+
+def fusion_groups(models):
+    """Runs of two or more consecutive fusible table stages, each independent of the ones before it."""
+    groups, run = [], []
+    for model in models:
+        if model.kind == "table" and model.callback is not None and all(
+                independent(member, model) for member in run):
+            run.append(model)
+            continue
+        if len(run) > 1:
+            groups.append([m.name for m in run])
+        run = [model] if model.kind == "table" and model.callback is not None else []
+    if len(run) > 1:
+        groups.append([m.name for m in run])
+    return groups
+
+
+def analyze(models, prune):
+    """
+    Plan for the stage models (pipeline order). `prune(models, dead)`
+    returns the models with the dead rules removed; fusion is decided on
+    those, as the pipeline will run them.
+    """
+    passes_before = sum(m.passes for m in models)
+    dead = dead_rules(models)
+    if dead:
+        models = prune(models, dead)
+    groups = fusion_groups(models)
+    passes_after = sum(m.passes for m in models) - sum(len(g) - 1 for g in groups)
+    return Plan(dead, groups, passes_before, passes_after)
+
+
+class FusedStage:
+    """
+    One scan standing in for consecutive independent table stages. Called
+    like a stage function, but returns (text, labels of the members that
+    changed it); run_stages knows fused stages by their tuple label.
+    """
+
+    def __init__(self, members, compile):
+        self.names = tuple(m.name for m in members)
+        self.name = "+".join(self.names)
+        self.labels = tuple(m.label for m in members)
+        self.optional = all(m.optional for m in members)
+        self._members = {f"s{i}": (m.name, m.label, m.callback) for i, m in enumerate(members)}
+        self.pattern = compile(
+            r'\b(?:' + '|'.join(
+                f"(?P<s{i}>" + '|'.join(map(re.escape, m.rules.keys())) + ")"
+                for i, m in enumerate(members)
+            ) + r')\b',
+            re.IGNORECASE
+        )
+
+    def __call__(self, text):
+        changed = set()
+        collector = rule_hits()
+        members = self._members
+
+        def dispatch(match):
+            name, label, callback = members[match.lastgroup]
+            after = callback(match)
+            if after != match.group():
+                changed.add(label)
+                if collector is not None:
+                    collector.record(match.group().lower(), match, after, stage=name)
+            return after
+
+        text = self.pattern.sub(dispatch, text)
+        return text, [label for label in self.labels if label in changed]
+
+    def stage(self):
+        """The (name, labels, function) entry for a stage table."""
+        return self.name, self.labels, self
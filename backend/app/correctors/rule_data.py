@@ -0,0 +1,59 @@
+"""
+correctors/rule_data.py
+
+Rule tables as versioned data files.
+
+Every corrector reads its tables from rules/<name>.json:
+
+    {"version": "2026.10.19", "tables": {"spelling_rules": {...}, ...}}
+
+Editing a table is a data change, not a code change; app.rule_reloader
+picks it up without restarting the worker. RULES_DIR points the
+correctors at another directory (e.g. a mounted config volume).
+"""
+
+import hashlib
+import json
+import os
+
+RULES_DIR = os.path.join(os.path.dirname(__file__), "rules")
+RULE_FILES = ("spelling", "grammar", "contextual")
+
+
+class RuleData:
+    __slots__ = ("name", "version", "digest", "tables")
+
+    def __init__(self, name, version, digest, tables):
+        self.name = name
+        self.version = version
+        self.digest = digest
+        self.tables = tables
+
+
+def rules_dir(directory=None):
+    return directory or os.getenv("RULES_DIR") or RULES_DIR
+
+
+def load_rules(name, directory=None):
+    """Read rules/<name>.json; digest is the sha256 of the file content."""
+    path = os.path.join(rules_dir(directory), f"{name}.json")
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    data = json.loads(raw)
+    if not isinstance(data.get("tables"), dict) or "version" not in data:
+        raise ValueError(f"{path}: expected {{'version': ..., 'tables': {{...}}}}")
+    return RuleData(name, str(data["version"]), hashlib.sha256(raw).hexdigest(), data["tables"])
+
+
+def rules_signature(directory=None):
+    """Cheap change detector: (name, mtime_ns, size) of every rule file."""
+    signature = []
+    for name in RULE_FILES:
+        try:
+            st = os.stat(os.path.join(rules_dir(directory), f"{name}.json"))
+        except OSError:
+            signature.append((name, None, None))
+            continue
+        signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
@@ -6,6 +6,10 @@ Contextual words (their/your) are handled by contextual_corrector.py
 """
 
 from .base_corrector import BaseCorrector
+from .instrumentation import with_hits
+from .rule_data import load_rules
+from .pattern_cache import PatternCache
+from .replacements import CasedReplacements
 import re
 from typing import Tuple, List
 
@@ -13,84 +17,39 @@ from typing import Tuple, List
 class SpellingCorrector(BaseCorrector):
 
     def setup_dictionaries(self):
-        self.spelling_rules = {
-            # Original rules
-            "teh": "the",
-            "adress": "address",
-            "recieve": "receive",
-            "occurence": "occurrence",
-            "accomodate": "accommodate",
-            "definately": "definitely",
-            "seperate": "separate",
-            "wich": "which",
-            "becuase": "because",
-            "alot": "a lot",
-            "truely": "truly",
-            "goverment": "government",
-            "enviroment": "environment",
-            "untill": "until",
-            "wiches": "which",
-
-            # NEW - Missing words that caused test failures
-            "beleive": "believe",
-            "beleve": "believe",
-            "corect": "correct",
-            "correkt": "correct",
-            "terrble": "terrible",
-            "terrable": "terrible",
-
-            # BONUS - Additional common misspellings
-            "awsome": "awesome",
-            "freind": "friend",
-            "occured": "occurred",
-            "reccomend": "recommend",
-            "necesary": "necessary",
-            "tommorow": "tomorrow",
-            "succesful": "successful",
-            "embarass": "embarrass",
-            "occassion": "occasion",
-            "persue": "pursue",
-            "arguement": "argument",
-            "wierd": "weird",
-            "foriegn": "foreign",
-            "heighth": "height",
-            "greatful": "grateful",
-            "concious": "conscious",
-            "posession": "possession",
-            "cemetary": "cemetery",
-            "millenium": "millennium",
-
-            # REMOVED: "their": "there" - now handled by contextual_corrector
-            # REMOVED: "your": "you're" - now handled by contextual_corrector
-        }
+        # rules/spelling.json. Homophones (their/your) are not spelling
+        # rules; contextual_corrector handles them.
+        self.rules = load_rules("spelling", self.rules_dir)
+        self.spelling_rules = self.rules.tables["spelling_rules"]
 
         all_wrong = '|'.join(re.escape(w) for w in self.spelling_rules.keys())
-        self.combined_spelling_pattern = re.compile(r'\b(' + all_wrong + r')\b', re.IGNORECASE)
+        cache = PatternCache("spelling", self.rules.digest)
+        self.combined_spelling_pattern = cache.compile(r'\b(' + all_wrong + r')\b', re.IGNORECASE)
+        cache.save()
+        self.spelling_replacements = CasedReplacements(self.spelling_rules, self._spelling_for)
+
+        self.stages = [
+            ("spelling", "Applied spelling corrections", self.correct_spelling),
+        ]
 
     def correct_spelling(self, text: str) -> str:
         if not text or not isinstance(text, str):
             return text
 
-        def replacement(match):
-            word = match.group()
-            wrong = word.lower()
-            correct = self.spelling_rules.get(wrong, word)
-
-            # Preserve original casing
-            if word.isupper():
-                return correct.upper()
-            if word[0].isupper():
-                return correct.capitalize()
-            return correct
-
         try:
-            return self.combined_spelling_pattern.sub(replacement, text)
+            return self.combined_spelling_pattern.sub(with_hits(self.spelling_replacements.callback), text)
         except Exception:
             return text
 
-    def core_correction_logic(self, text: str) -> Tuple[str, List[str]]:
-        corrected = self.correct_spelling(text)
-        changes = []
-        if corrected != text:
-            changes.append("Applied spelling corrections")
-        return corrected, changes
\ No newline at end of file
+    def _spelling_for(self, word):
+        correct = self.spelling_rules.get(word.lower(), word)
+
+        # Preserve original casing
+        if word.isupper():
+            return correct.upper()
+        if word[0].isupper():
+            return correct.capitalize()
+        return correct
+
+    def core_correction_logic(self, text: str, deadline=None, stages=None) -> Tuple[str, List[str]]:
+        return self.run_stages(text, self.stages if stages is None else stages, deadline)
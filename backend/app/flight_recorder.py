@@ -0,0 +1,233 @@
+"""
+flight_recorder.py - Slow-request flight recorder
+=================================================
+Keeps the slowest corrections of the current and the previous time
+window, so the inputs behind a latency spike can be pulled out of a
+running worker and replayed locally.
+
+Every entry holds the route, the corrector, the correction level and
+detected language (replay runs the same pipeline), the duration,
+per-phase and per-stage timings, the input length and its sha256, and -
+only when enabled - the input text itself, raw or redacted.
+
+"redacted" is not anonymous: it masks URLs, email addresses and digits,
+but keeps every word - names and other free text included - because the
+words are what the rules match and what makes an input slow. Leave the
+text off wherever inputs may carry personal data; the dump is only
+served to the admin key.
+
+The hot path is one comparison against the current window's floor;
+only requests slower than the N-th slowest take the lock.
+
+Configuration (environment):
+    FLIGHT_RECORDER_SIZE      entries kept per window (default: 20, 0 = off)
+    FLIGHT_RECORDER_WINDOW_S  window length in seconds (default: 60)
+    FLIGHT_RECORDER_TEXT      off | redacted (URLs, emails, digits masked;
+                              words kept) | raw (default: off)
+
+Dump:   GET /admin/flight-recorder (X-Admin-Key)
+Replay: python -m app.flight_recorder dump.json [--repeat 3] [--sort tottime]
+"""
+
+import argparse
+import cProfile
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+
+TEXT_MODES = ("off", "redacted", "raw")
+
+# Masks URLs, emails and digit runs; words, punctuation and casing stay
+# as they are (see the module docstring).
+_REDACTIONS = [
+    (re.compile(r"https?://\S+|www\.\S+"), "<url>"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"\d"), "0"),
+]
+
+
+def redact(text):
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class FlightRecorder:
+
+    def __init__(self, size=20, window_s=60, text_mode="off"):
+        if text_mode not in TEXT_MODES:
+            raise ValueError(f"text_mode must be one of {TEXT_MODES}")
+        self.size = size
+        self.window_s = window_s
+        self.text_mode = text_mode
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._window_start = time.time()
+        self._current = []   # min-heap of (duration_ns, seq, entry)
+        self._previous = []
+        self._previous_start = None
+        # Duration a request must exceed to enter the full current window
+        self._floor = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            size=int(os.getenv("FLIGHT_RECORDER_SIZE", "20")),
+            window_s=float(os.getenv("FLIGHT_RECORDER_WINDOW_S", "60")),
+            text_mode=os.getenv("FLIGHT_RECORDER_TEXT", "off"),
+        )
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def _rotate(self, now):
+        if now - self._window_start < self.window_s:
+            return
+        self._previous = self._current
+        self._previous_start = self._window_start
+        self._current = []
+        self._window_start = now
+        self._floor = 0
+
+    def offer(self, route, corrector, text, duration_ns, laps, level=None, language=None):
+        """Record a finished correction if it is among the slowest N."""
+        now = time.time()
+        if duration_ns <= self._floor and now - self._window_start < self.window_s:
+            return
+
+        with self._lock:
+            self._rotate(now)
+            if len(self._current) >= self.size and duration_ns <= self._current[0][0]:
+                return
+
+            entry = {
+                "ts": round(now, 3),
+                "route": route,
+                "corrector": corrector,
+                "level": getattr(level, "value", level),
+                "language": language,
+                "duration_ms": round(duration_ns / 1e6, 3),
+                "length": len(text),
+                "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                "laps": [
+                    {"corrector": owner, "kind": kind, "name": name, "ms": round(ns / 1e6, 3)}
+                    for owner, kind, name, ns in laps
+                ],
+            }
+            if self.text_mode == "raw":
+                entry["text"] = text
+            elif self.text_mode == "redacted":
+                entry["text"] = redact(text)
+
+            item = (duration_ns, next(self._seq), entry)
+            if len(self._current) < self.size:
+                heapq.heappush(self._current, item)
+            else:
+                heapq.heapreplace(self._current, item)
+            if len(self._current) >= self.size:
+                self._floor = self._current[0][0]
+
+    def dump(self):
+        with self._lock:
+            self._rotate(time.time())
+            windows = []
+            for start, heap in ((self._window_start, self._current),
+                                (self._previous_start, self._previous)):
+                if start is None:
+                    continue
+                windows.append({
+                    "start": round(start, 3),
+                    "entries": [entry for _, _, entry in sorted(heap, reverse=True)],
+                })
+
+        return {
+            "size": self.size,
+            "window_s": self.window_s,
+            "text_mode": self.text_mode,
+            "windows": windows,
+        }
+
+
+recorder = FlightRecorder.from_env()
+
+
+# ---------------- replay CLI ----------------
+
+def _correctors():
+    from .correctors.grammar_corrector import GrammarCorrector
+    from .correctors.spelling_corrector import SpellingCorrector
+    return {"GrammarCorrector": GrammarCorrector, "SpellingCorrector": SpellingCorrector}
+
+
+def replay(dump, repeat=3, sort="cumulative", limit=25, out=sys.stdout):
+    """Re-run every dumped entry that has text, in-process under cProfile."""
+    classes = _correctors()
+    instances = {}
+
+    entries = [entry for window in dump.get("windows", []) for entry in window["entries"]]
+    replayed = 0
+    for entry in entries:
+        level, language = entry.get("level"), entry.get("language")
+        label = (f"{entry['route']} {entry['corrector']} level={level} language={language} "
+                 f"len={entry['length']} sha256={entry['sha256'][:12]}")
+        if "text" not in entry:
+            out.write(f"SKIP {label}: no text captured (FLIGHT_RECORDER_TEXT=off)\n")
+            continue
+        cls = classes.get(entry["corrector"])
+        if cls is None:
+            out.write(f"SKIP {label}: unknown corrector\n")
+            continue
+
+        corrector = instances.get(cls)
+        if corrector is None:
+            corrector = instances[cls] = cls()
+
+        text = entry["text"]
+        times = []
+        profile = cProfile.Profile()
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            profile.enable()
+            corrector.correct(text, level=level, language=language)
+            profile.disable()
+            times.append((time.perf_counter_ns() - start) / 1e6)
+
+        out.write(f"\n=== {label}\n")
+        out.write(f"recorded {entry['duration_ms']:.3f}ms, replayed "
+                  f"min {min(times):.3f}ms / max {max(times):.3f}ms over {repeat} runs\n")
+        slowest = sorted(entry.get("laps", []), key=lambda lap: lap["ms"], reverse=True)[:5]
+        if slowest:
+            out.write("recorded slowest laps: " + ", ".join(
+                f"{lap['kind']}.{lap['name']}={lap['ms']}ms" for lap in slowest) + "\n")
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        replayed += 1
+
+    out.write(f"\nReplayed {replayed} of {len(entries)} entries\n")
+    return replayed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a flight recorder dump under cProfile")
+    parser.add_argument("dump", help="JSON from GET /admin/flight-recorder")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sort", default="cumulative")
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+
+    with open(args.dump, "r", encoding="utf-8") as f:
+        dump = json.load(f)
+    replay(dump, repeat=args.repeat, sort=args.sort, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
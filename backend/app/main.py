@@ -5,30 +5,245 @@ Sada je ovo glavni fajl unutar Python paketa `app`
 Svi importi su relativni → radi savršeno posle reorganizacije
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import logging
+import math
+import time
 
 # RELATIVNI IMPORTI – obavezni jer smo unutar paketa `app`
 from .simple_error_handler import setup_simple_logging, handle_errors, validate_request
-from .correctors.spelling_corrector import SpellingCorrector
-from .correctors.grammar_corrector import GrammarCorrector
+from .admission import limiter
+from .scheduler import scheduler, DEFAULT_PLAN, SchedulerTimeout
+from .metrics import registry as metrics_registry, STAGES_SKIPPED_TOTAL, LANGUAGES_TOTAL
+from .profiler import profiler
+from .request_timing import RequestTimingMiddleware, timed
+from .flight_recorder import recorder
+from . import gc_tuning
+from .auth import require_admin_key, require_api_key
+from .rule_reloader import reloader as rule_reloader
+from .correctors.instrumentation import collect_timings
+from .correctors.deadline import Deadline
+from .correctors.base_corrector import CorrectionLevel
+from .correctors.language_id import detect_language
+
+# Upper bound for the deadline_ms request option
+MAX_DEADLINE_MS = 60000
 
 # Kreiraj Flask aplikaciju
 app = Flask(__name__)
+app.wsgi_app = RequestTimingMiddleware(app)
 
 # Postavi čisto logovanje (bez emojija)
 setup_simple_logging()
 logger = logging.getLogger(__name__)
 
-# Inicijalizacija korektora
+# Inicijalizacija korektora (rule snapshot; reloaded in the background)
 try:
-    spelling_corrector = SpellingCorrector()
-    grammar_corrector = GrammarCorrector()
+    rule_reloader.load()
     logger.info("All correctors loaded successfully")
 except Exception as e:
     logger.critical(f"Failed to initialize correctors: {e}")
-    spelling_corrector = None
-    grammar_corrector = None
+
+# GC telemetry; GC_MODE=serving also freezes everything loaded so far
+gc_tuning.configure()
+
+rule_reloader.start()
+
+
+def current_corrector(kind):
+    """The active snapshot's 'grammar' or 'spelling' corrector (read once per request)."""
+    snapshot = rule_reloader.current
+    if snapshot is None:
+        raise RuntimeError(f"{kind.capitalize()} corrector not available")
+    return getattr(snapshot, kind)
+
+
+def service_gauges():
+    """Admission and scheduler state for /metrics."""
+    admission = limiter.stats()
+    sched = scheduler.stats()
+    return [
+        ("corrector_admission_active", "Requests holding an admission slot", (),
+         {(): admission["active"]}),
+        ("corrector_admission_queued", "Requests waiting for an admission slot", (),
+         {(): admission["queued"]}),
+        ("corrector_admission_shed", "Requests rejected by admission control, by reason", ("reason",),
+         {("queue_full",): admission["rejected_total"], ("queue_timeout",): admission["expired_total"]}),
+        ("corrector_scheduler_running", "Corrections currently running", (),
+         {(): sched["running"]}),
+        ("corrector_scheduler_queued", "Corrections waiting for a slot, by plan", ("plan",),
+         {(plan,): n for plan, n in sched["queued"].items()}),
+        ("corrector_scheduler_expired", "Corrections shed after waiting max_wait_ms for a slot, by plan",
+         ("plan",), {(plan,): n for plan, n in sched["expired"].items()}),
+    ]
+
+
+metrics_registry.add_gauges(service_gauges)
+
+
+def timed_correct(corrector, text, deadline=None, level=None, detailed=False, language=None):
+    """corrector.correct (or correct_detailed, returning a CorrectionResult)."""
+    correct = corrector.correct_detailed if detailed else corrector.correct
+    if not recorder.enabled:
+        with timed("correction"):
+            return correct(text, deadline=deadline, level=level, language=language)
+
+    with timed("correction"), collect_timings() as laps:
+        start = time.perf_counter_ns()
+        corrected = correct(text, deadline=deadline, level=level, language=language)
+        duration_ns = time.perf_counter_ns() - start
+
+    recorder.offer(request.endpoint, type(corrector).__name__, text, duration_ns, laps,
+                   level=level, language=language)
+    return corrected
+
+
+def run_correction(corrector, text, deadline=None, level=None, detailed=False, language=None):
+    """Run one correction through the plan-aware scheduler."""
+    plan = getattr(request, "current_plan", DEFAULT_PLAN)
+    return scheduler.run(plan, scheduler.estimate_cost(text), timed_correct,
+                         corrector, text, deadline, level, detailed, language)
+
+
+def request_language(text):
+    """The text's language (correctors/language_id.py); counted for /metrics."""
+    language = detect_language(text)
+    metrics_registry.inc(LANGUAGES_TOTAL, (language,))
+    return language
+
+
+def flag_requested(name):
+    """Opt-in flag: ?name=1 or {"name": true} in the JSON body."""
+    if request.args.get(name) in ("1", "true"):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and data.get(name) is True
+
+
+def timing_requested():
+    """Opt-in stage timing: ?timing=1 or {"timing": true} in the JSON body."""
+    return flag_requested("timing")
+
+
+def requested_deadline():
+    """
+    Optional time budget: ?deadline_ms=50 or {"deadline_ms": 50} in the
+    JSON body. The budget starts now, so scheduler queueing counts too.
+    JSON booleans and non-finite values (nan, inf) are rejected.
+    """
+    value = request.args.get("deadline_ms")
+    if value is None:
+        data = request.get_json(silent=True)
+        value = data.get("deadline_ms") if isinstance(data, dict) else None
+    if value is None:
+        return None
+
+    if isinstance(value, bool):
+        raise ValueError("'deadline_ms' must be a number")
+    try:
+        budget_ms = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("'deadline_ms' must be a number")
+    if not math.isfinite(budget_ms):
+        raise ValueError("'deadline_ms' must be a finite number")
+    if not 0 < budget_ms <= MAX_DEADLINE_MS:
+        raise ValueError(f"'deadline_ms' must be between 0 and {MAX_DEADLINE_MS}")
+    return Deadline(budget_ms)
+
+
+def requested_level():
+    """Correction tier: ?level=minimal or {"level": "aggressive"}; default standard."""
+    value = request.args.get("level")
+    if value is None:
+        data = request.get_json(silent=True)
+        value = data.get("level") if isinstance(data, dict) else None
+    if value is None:
+        return CorrectionLevel.STANDARD
+
+    try:
+        return CorrectionLevel(str(value).lower())
+    except ValueError:
+        raise ValueError("'level' must be one of: " + ", ".join(level.value for level in CorrectionLevel))
+
+
+def record_skipped(corrector, stages):
+    for stage in stages:
+        metrics_registry.inc(STAGES_SKIPPED_TOTAL, (type(corrector).__name__, stage))
+
+
+def server_timing(laps, total_ns):
+    """Format laps as a Server-Timing header value (durations in ms)."""
+    parts = [f"{kind}.{name};dur={ns / 1e6:.3f}" for _, kind, name, ns in laps]
+    parts.append(f"total;dur={total_ns / 1e6:.3f}")
+    return ", ".join(parts)
+
+
+def detailed_body(result):
+    """
+    JSON body for a CorrectionResult (?detailed=1).
+
+    A hit's start/end are offsets into the text as its stage received it
+    (after normalization, format preservation and the earlier stages), not
+    into "original": whitespace collapsing alone makes them drift. The
+    hit's "before"/"after" strings are exact; use them, not the offsets,
+    to show a change against the input.
+    """
+    return {
+        "original": result.original,
+        "corrected": result.corrected,
+        "changed": result.changes_made,
+        "level": result.correction_level.value,
+        "language": result.language,
+        "processing_time_ms": result.processing_time_ms,
+        "corrections_applied": result.corrections_applied,
+        "rule_hits": result.rule_hits,
+        "hits": result.hits,
+        "confidence_score": result.confidence_score,
+    }
+
+
+def correction_response(corrector, text):
+    deadline = requested_deadline()
+    level = requested_level()
+    detailed = flag_requested("detailed")
+    language = request_language(text)
+
+    laps = None
+    if timing_requested():
+        with collect_timings() as laps:
+            start = time.perf_counter_ns()
+            outcome = run_correction(corrector, text, deadline, level, detailed, language)
+            total_ns = time.perf_counter_ns() - start
+    else:
+        outcome = run_correction(corrector, text, deadline, level, detailed, language)
+
+    if detailed:
+        body = detailed_body(outcome)
+    else:
+        body = {
+            "original": text,
+            "corrected": outcome,
+            "changed": outcome != text,
+            "level": level.value,
+            "language": language
+        }
+    if deadline is not None:
+        record_skipped(corrector, deadline.skipped)
+        body["skipped_stages"] = deadline.skipped
+    if laps is not None:
+        body["timings"] = {
+            "total_ms": round(total_ns / 1e6, 3),
+            "laps": [
+                {"corrector": owner, "kind": kind, "name": name, "ms": round(ns / 1e6, 3)}
+                for owner, kind, name, ns in laps
+            ]
+        }
+
+    with timed("serialization"):
+        response = jsonify(body)
+    if laps is not None:
+        response.headers["Server-Timing"] = server_timing(laps, total_ns)
+    return response
 
 
 @app.route("/")
@@ -39,75 +254,57 @@ def home():
         "status": "running",
         "endpoints": [
             "/correct", "/correct/spelling", "/correct/grammar",
-            "/correct/batch", "/health"
+            "/correct/batch", "/health", "/metrics"
         ]
     })
 
 
 @app.route("/correct", methods=["POST"])
+@require_api_key
+@limiter.limit
 @handle_errors
 def correct_all():
     text = validate_request()
     if not text:
         return jsonify({"original": "", "corrected": "", "changed": False})
 
-    if grammar_corrector is None:
-        raise RuntimeError("Grammar corrector not available")
-
-    corrected = grammar_corrector.correct(text)
-
-    return jsonify({
-        "original": text,
-        "corrected": corrected,
-        "changed": corrected != text
-    })
+    return correction_response(current_corrector("grammar"), text)
 
 
 @app.route("/correct/spelling", methods=["POST"])
+@require_api_key
+@limiter.limit
 @handle_errors
 def correct_spelling():
     text = validate_request()
     if not text:
         return jsonify({"original": "", "corrected": "", "changed": False})
 
-    if spelling_corrector is None:
-        raise RuntimeError("Spelling corrector not available")
-
-    corrected = spelling_corrector.correct(text)
-
-    return jsonify({
-        "original": text,
-        "corrected": corrected,
-        "changed": corrected != text
-    })
+    return correction_response(current_corrector("spelling"), text)
 
 
 @app.route("/correct/grammar", methods=["POST"])
+@require_api_key
+@limiter.limit
 @handle_errors
 def correct_grammar():
     text = validate_request()
     if not text:
         return jsonify({"original": "", "corrected": "", "changed": False})
 
-    if grammar_corrector is None:
-        raise RuntimeError("Grammar corrector not available")
-
-    corrected = grammar_corrector.correct(text)
-
-    return jsonify({
-        "original": text,
-        "corrected": corrected,
-        "changed": corrected != text
-    })
+    return correction_response(current_corrector("grammar"), text)
 
 
 @app.route("/correct/batch", methods=["POST"])
+@require_api_key
+@limiter.limit
 @handle_errors
 def correct_batch():
     if not request.is_json:
         raise ValueError("Request must be JSON")
 
-    data = request.get_json()
+    with timed("parse"):
+        data = request.get_json()
     if not data or "texts" not in data:
         raise ValueError("Missing 'texts' array in request")
 
@@ -117,8 +314,13 @@ def correct_batch():
     if len(texts) > 100:
         raise ValueError("Maximum 100 texts allowed per batch")
 
-    if grammar_corrector is None:
-        raise RuntimeError("Grammar corrector not available")
+    # The whole batch runs on one rule snapshot
+    grammar_corrector = current_corrector("grammar")
+
+    # One budget for the whole batch; later texts get what is left
+    deadline = requested_deadline()
+    level = requested_level()
+    detailed = flag_requested("detailed")
 
     results = []
     for item in texts:
@@ -132,36 +334,100 @@ def correct_batch():
             continue
 
         try:
-            corrected = grammar_corrector.correct(original)
-            results.append({
-                "original": original,
-                "corrected": corrected,
-                "changed": corrected != original
-            })
+            skipped_before = len(deadline.skipped) if deadline else 0
+            language = request_language(original)
+            outcome = run_correction(grammar_corrector, original, deadline, level, detailed, language)
+            if detailed:
+                result = detailed_body(outcome)
+            else:
+                result = {
+                    "original": original,
+                    "corrected": outcome,
+                    "changed": outcome != original,
+                    "language": language
+                }
+            if deadline is not None:
+                result["skipped_stages"] = deadline.skipped[skipped_before:]
+            results.append(result)
+        except SchedulerTimeout:
+            # Overloaded: shed the whole batch (503) rather than fail items one by one
+            raise
         except Exception as e:
             results.append({"original": original, "corrected": "", "error": str(e)})
 
-    return jsonify({
-        "results": results,
-        "batch_size": len(results),
-        "timestamp": logging.Formatter("%Y-%m-%d %H:%M:%S").format(logging.LogRecord(
-            name="", level=0, pathname="", lineno=0,
-            msg="", args=(), exc_info=None
-        ).created)
-    })
+    if deadline is not None:
+        record_skipped(grammar_corrector, deadline.skipped)
+
+    with timed("serialization"):
+        return jsonify({
+            "results": results,
+            "batch_size": len(results),
+            "level": level.value,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
 
 
 @app.route("/health")
 def health():
-    correctors_ok = spelling_corrector is not None and grammar_corrector is not None
+    correctors_ok = rule_reloader.current is not None
     return jsonify({
         "status": "healthy" if correctors_ok else "degraded",
         "correctors_loaded": correctors_ok,
-        "spelling_corrector": spelling_corrector is not None,
-        "grammar_corrector": grammar_corrector is not None
+        "spelling_corrector": correctors_ok,
+        "grammar_corrector": correctors_ok,
+        "rules": rule_reloader.stats(),
+        "admission": limiter.stats(),
+        "scheduler": scheduler.stats()
     }), 200 if correctors_ok else 503
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/admin/profile", methods=["POST"])
+@require_admin_key
+@handle_errors
+def admin_profile():
+    """
+    Profile this worker for N seconds / N requests.
+    Body: {"mode": "cprofile"|"sample", "seconds": 10, "requests": 100,
+           "format": "pstats"|"raw"|"collapsed", "sort": "cumulative", "limit": 50}
+    """
+    options = request.get_json(silent=True) or {}
+    try:
+        body, mimetype = profiler.run_session(
+            mode=options.get("mode", "cprofile"),
+            seconds=float(options.get("seconds", 10)),
+            requests=int(options["requests"]) if options.get("requests") else None,
+            fmt=options.get("format"),
+            sort=options.get("sort", "cumulative"),
+            limit=int(options.get("limit", 50)),
+        )
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "status": "error"}), 409
+
+    return Response(body, mimetype=mimetype)
+
+
+@app.route("/admin/reload-rules", methods=["POST"])
+@require_admin_key
+@handle_errors
+def admin_reload_rules():
+    """Rebuild the correctors from the rule files now (even if unchanged)."""
+    swapped = rule_reloader.reload(force=True)
+    return jsonify({"reloaded": swapped, **rule_reloader.stats()}), 200 if swapped else 500
+
+
+@app.route("/admin/flight-recorder")
+@require_admin_key
+@handle_errors
+def admin_flight_recorder():
+    """Slowest requests of the current and previous window (replay: python -m app.flight_recorder)."""
+    return jsonify(recorder.dump())
+
+
 # Samo za lokalno pokretanje (u produkciji koristiš run.py + waitress)
 if __name__ == "__main__":
     logger.info("=" * 60)
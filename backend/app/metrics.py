@@ -0,0 +1,198 @@
+"""
+metrics.py - Prometheus metrics
+===============================
+Request counts, error counts and latency histograms per route, plus
+latency histograms for every BaseCorrector.correct phase and every
+core_correction_logic stage. Served in the Prometheus text format at
+/metrics (no prometheus_client dependency).
+
+Aggregation is lock-free on the hot path: every thread writes only into
+its own shard (plain dicts of lists), and a scrape sums the shards.
+Histograms use power-of-two nanosecond buckets, so an observation is
+one int.bit_length() call instead of a bucket search.
+"""
+
+import threading
+from time import perf_counter_ns
+
+from .correctors import instrumentation
+
+# Histogram buckets: le = 2**b ns for b in this range (~1us .. ~34s)
+_MIN_BUCKET = 10
+_MAX_BUCKET = 35
+_SLOTS = 64  # bit_length() of any realistic duration in ns
+_LE_INF = 'le="+Inf"'
+
+REQUESTS_TOTAL = "corrector_requests_total"
+ERRORS_TOTAL = "corrector_request_errors_total"
+REQUEST_SECONDS = "corrector_request_duration_seconds"
+PHASE_SECONDS = "corrector_phase_duration_seconds"
+STAGE_SECONDS = "corrector_stage_duration_seconds"
+BREAKDOWN_SECONDS = "corrector_request_breakdown_seconds"
+GC_PAUSE_SECONDS = "corrector_gc_pause_seconds"
+GC_COLLECTED_TOTAL = "corrector_gc_collected_total"
+STAGES_SKIPPED_TOTAL = "corrector_stages_skipped_total"
+RULE_RELOADS_TOTAL = "corrector_rule_reloads_total"
+LANGUAGES_TOTAL = "corrector_languages_total"
+
+METRICS = {
+    REQUESTS_TOTAL: ("counter", "Responses, by route and HTTP status (shed 503s and auth 401s included)",
+                     ("route", "status")),
+    ERRORS_TOTAL: ("counter", "Failed requests, by route and error type", ("route", "type")),
+    REQUEST_SECONDS: ("histogram", "Request latency inside the view, by route", ("route",)),
+    PHASE_SECONDS: ("histogram", "BaseCorrector.correct phase latency", ("corrector", "phase")),
+    STAGE_SECONDS: ("histogram", "core_correction_logic stage latency", ("corrector", "stage")),
+    BREAKDOWN_SECONDS: ("histogram", "Request time by part: queue, parse, correction, serialization, total",
+                        ("route", "part")),
+    GC_PAUSE_SECONDS: ("histogram", "Cyclic GC pause, by generation", ("generation",)),
+    GC_COLLECTED_TOTAL: ("counter", "Objects freed by the cyclic GC, by generation", ("generation",)),
+    STAGES_SKIPPED_TOTAL: ("counter", "Optional stages skipped to meet a request deadline",
+                           ("corrector", "stage")),
+    RULE_RELOADS_TOTAL: ("counter", "Rule table reloads, by result (ok/error)", ("result",)),
+    LANGUAGES_TOTAL: ("counter", "Texts corrected, by detected language (non-English is only normalized)",
+                      ("language",)),
+}
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._gauge_callbacks = []
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    # ---------------- recording (hot path) ----------------
+
+    def inc(self, name, labels, value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        cell = counters.get(key)
+        if cell is None:
+            counters[key] = [value]
+        else:
+            cell[0] += value
+
+    def observe_ns(self, name, labels, ns, histograms=None):
+        if histograms is None:
+            histograms = self._shard().histograms
+        key = (name, labels)
+        cell = histograms.get(key)
+        if cell is None:
+            # [bucket counts..., total count, sum in ns]
+            cell = histograms[key] = [0] * (_SLOTS + 2)
+        cell[min(ns.bit_length(), _SLOTS - 1)] += 1
+        cell[-2] += 1
+        cell[-1] += ns
+
+    def observe_laps(self, corrector, laps):
+        """instrumentation observer: record a whole correct() call at once."""
+        histograms = self._shard().histograms
+        for kind, name, ns in laps:
+            metric = PHASE_SECONDS if kind == "phase" else STAGE_SECONDS
+            self.observe_ns(metric, (corrector, name), ns, histograms)
+
+    def add_gauges(self, callback):
+        """Register callback() -> [(name, help, label names, {labels: value})] for scrapes."""
+        self._gauge_callbacks.append(callback)
+
+    # ---------------- scraping ----------------
+
+    def _merged(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        counters = {}
+        histograms = {}
+        for shard in shards:
+            # dict.copy() is atomic under the GIL; list reads may be a few
+            # increments stale, which is fine for monitoring
+            for key, cell in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0) + cell[0]
+            for key, cell in shard.histograms.copy().items():
+                total = histograms.get(key)
+                if total is None:
+                    histograms[key] = list(cell)
+                else:
+                    for i, v in enumerate(cell):
+                        total[i] += v
+        return counters, histograms
+
+    @staticmethod
+    def _labels(names, values, extra=""):
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self):
+        counters, histograms = self._merged()
+        lines = []
+
+        for name, (kind, help_text, label_names) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{self._labels(label_names, labels)} {value}")
+                continue
+
+            for (metric, labels), cell in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = sum(cell[:_MIN_BUCKET + 1])
+                for b in range(_MIN_BUCKET, _MAX_BUCKET + 1):
+                    if b > _MIN_BUCKET:
+                        cumulative += cell[b]
+                    le = f'le="{(2 ** b) / 1e9:.9g}"'
+                    lines.append(f"{name}_bucket{self._labels(label_names, labels, le)} {cumulative}")
+                lines.append(f"{name}_bucket{self._labels(label_names, labels, _LE_INF)} {cell[-2]}")
+                lines.append(f"{name}_sum{self._labels(label_names, labels)} {cell[-1] / 1e9:.9g}")
+                lines.append(f"{name}_count{self._labels(label_names, labels)} {cell[-2]}")
+
+        for callback in self._gauge_callbacks:
+            for name, help_text, label_names, values in callback():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in values.items():
+                    lines.append(f"{name}{self._labels(label_names, labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+instrumentation.add_observer(registry.observe_laps)
+
+
+def record_request(route, status):
+    """Called once per response by RequestTimingMiddleware, whatever answered it."""
+    registry.inc(REQUESTS_TOTAL, (route, str(status)))
+
+
+def record_view(route, start_ns, error_type=None):
+    """Called once per view call by handle_errors: view latency and the error type, if any."""
+    registry.observe_ns(REQUEST_SECONDS, (route,), perf_counter_ns() - start_ns)
+    if error_type:
+        registry.inc(ERRORS_TOTAL, (route, error_type))
@@ -0,0 +1,184 @@
+"""
+profiler.py - On-demand production profiler
+===========================================
+Profiles the running worker under real traffic, started from the admin
+endpoint /admin/profile.
+
+Modes:
+- cprofile: every request handled while the session is active runs
+  under cProfile (one request at a time, others run normally); the
+  stats are aggregated and returned as pstats text or a raw .prof dump.
+- sample:   a background thread samples the stacks of request threads
+  every few milliseconds and returns collapsed stacks, ready for
+  flamegraph.pl / speedscope.
+
+A session ends after N seconds or N profiled requests (in sample mode:
+N requests finished while it ran), whichever comes first. When no session is active the only cost on the request path is
+one attribute read in handle_errors.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_SECONDS = 60
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+SORT_KEYS = {"cumulative", "tottime", "calls", "ncalls", "pcalls", "name", "filename"}
+
+
+class RequestProfiler:
+
+    def __init__(self):
+        self.active = False
+        self._session_lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self._done = threading.Event()
+
+        self.mode = None
+        self._max_requests = None
+        self._requests = 0
+        self._stats = None
+        self._stacks = Counter()
+        self._request_threads = set()
+
+    # ---------------- request path ----------------
+
+    def call(self, f, *args, **kwargs):
+        """Run a request while a session is active (handle_errors checks .active first)."""
+        if self.mode == "sample":
+            ident = threading.get_ident()
+            self._request_threads.add(ident)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self._request_threads.discard(ident)
+                self._count_request()
+
+        # cProfile: one profiled request at a time, the rest run unprofiled
+        if not self._profile_lock.acquire(blocking=False):
+            return f(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                profile.disable()
+        finally:
+            self._add_profile(profile)
+            self._profile_lock.release()
+
+    def _add_profile(self, profile):
+        if not self.active:
+            return
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+        self._count_request()
+
+    def _count_request(self):
+        """End the session once `requests` requests have finished (both modes)."""
+        # Sampled requests finish concurrently; += alone would lose counts
+        with self._count_lock:
+            if not self.active:
+                return
+            self._requests += 1
+            if self._max_requests and self._requests >= self._max_requests:
+                self.active = False
+                self._done.set()
+
+    # ---------------- sampling ----------------
+
+    def _sample(self, interval_s):
+        own = threading.get_ident()
+        while self.active:
+            frames = sys._current_frames()
+            for ident in list(self._request_threads):
+                if ident == own or ident not in frames:
+                    continue
+                stack = []
+                frame = frames[ident]
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            time.sleep(interval_s)
+
+    # ---------------- session control ----------------
+
+    def run_session(self, mode="cprofile", seconds=10, requests=None, fmt=None,
+                    sort="cumulative", limit=50, interval_ms=DEFAULT_SAMPLE_INTERVAL_MS):
+        """
+        Run one profiling session (blocking) and return (body, mimetype).
+        Raises ValueError for bad parameters and RuntimeError if a session
+        is already running.
+        """
+        if mode not in ("cprofile", "sample"):
+            raise ValueError("mode must be 'cprofile' or 'sample'")
+        fmt = fmt or ("pstats" if mode == "cprofile" else "collapsed")
+        if (mode, fmt) not in (("cprofile", "pstats"), ("cprofile", "raw"), ("sample", "collapsed")):
+            raise ValueError(f"format '{fmt}' is not available for mode '{mode}'")
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be between 1 and {MAX_SECONDS}")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {sorted(SORT_KEYS)}")
+
+        if not self._session_lock.acquire(blocking=False):
+            raise RuntimeError("A profiling session is already running")
+
+        try:
+            self.mode = mode
+            self._max_requests = requests
+            self._requests = 0
+            self._stats = None
+            self._stacks = Counter()
+            self._done.clear()
+            self.active = True
+
+            sampler = None
+            if mode == "sample":
+                sampler = threading.Thread(
+                    target=self._sample, args=(interval_ms / 1000,), name="profiler-sampler", daemon=True
+                )
+                sampler.start()
+
+            self._done.wait(seconds)
+            self.active = False
+            if sampler:
+                sampler.join()
+
+            # Let an in-flight profiled request finish adding its stats
+            with self._profile_lock:
+                return self._render(fmt, sort, limit)
+        finally:
+            self.active = False
+            self._session_lock.release()
+
+    def _render(self, fmt, sort, limit):
+        if fmt == "collapsed":
+            lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+            return "\n".join(lines) + "\n", "text/plain"
+
+        if self._stats is None:
+            return "No requests were profiled\n", "text/plain"
+
+        if fmt == "raw":
+            return marshal.dumps(self._stats.stats), "application/octet-stream"
+
+        out = io.StringIO()
+        self._stats.stream = out
+        out.write(f"Profiled requests: {self._requests}\n")
+        self._stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue(), "text/plain"
+
+
+profiler = RequestProfiler()
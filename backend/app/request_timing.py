@@ -0,0 +1,190 @@
+"""
+request_timing.py - Where does a request spend its time?
+========================================================
+WSGI middleware that splits every request into:
+
+- queue:         time from the request being fully received (or from the
+                 proxy's X-Request-Start) until a waitress thread picks it up
+- parse:         JSON body parsing
+- correction:    time inside corrector.correct (scheduler wait excluded)
+- serialization: building the JSON response
+- total:         whole application call, queue excluded
+
+The views report parse/correction/serialization through `timed(part)`;
+the middleware owns the per-request record, publishes it to /metrics
+(corrector_request_breakdown_seconds) and, with ACCESS_LOG=1, logs one
+line per request with the parts as extra fields (see LOG_FORMAT=json).
+
+It also counts every response in corrector_requests_total: being the
+outermost layer, it sees the limiter's 503s and the auth 401/403s that
+never reach the view's handle_errors.
+
+Queue time sources, first match wins:
+    X-Request-Start: t=<unix time>   set by nginx/HAProxy/Heroku router;
+                                     seconds, ms or us are all accepted.
+                                     Read only with TRUST_REQUEST_START=1:
+                                     a client can send it too, so only
+                                     enable it behind a proxy that sets
+                                     (overwrites) the header.
+    X-Waitress-Queued                stamped by QueueStampingDispatcher
+                                     when waitress queues the task (run.py).
+                                     Read only when that dispatcher is
+                                     installed; under gunicorn or app.run
+                                     the header could only come from the
+                                     client.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from flask import request, has_request_context
+from waitress.task import ThreadedTaskDispatcher
+
+from .metrics import registry, record_request, BREAKDOWN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ENVIRON_KEY = "corrector.timings"
+QUEUED_HEADER = "X_WAITRESS_QUEUED"
+
+PARTS = ("queue", "parse", "correction", "serialization")
+
+
+class RequestTimings:
+    __slots__ = ("route", "queue", "parse", "correction", "serialization")
+
+    def __init__(self):
+        self.route = "unmatched"
+        self.queue = None
+        self.parse = 0
+        self.correction = 0
+        self.serialization = 0
+
+    def add(self, part, ns):
+        setattr(self, part, getattr(self, part) + ns)
+
+
+def parse_request_start(value, now_ns):
+    """
+    X-Request-Start ("t=1700000000.123", "1700000000123", ...) -> queue ns,
+    or None if the header is unusable. The unit is guessed from magnitude.
+    """
+    value = value.strip()
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        stamp = float(value)
+    except ValueError:
+        return None
+
+    if stamp > 1e17:      # ns
+        stamp_ns = stamp
+    elif stamp > 1e14:    # us
+        stamp_ns = stamp * 1e3
+    elif stamp > 1e11:    # ms
+        stamp_ns = stamp * 1e6
+    else:                 # s
+        stamp_ns = stamp * 1e9
+
+    queue_ns = now_ns - int(stamp_ns)
+    # Clock skew between proxy and app can make this negative
+    return max(queue_ns, 0)
+
+
+class QueueStampingDispatcher(ThreadedTaskDispatcher):
+    """
+    Waitress dispatcher that records when each task was queued.
+    Passed to serve() as `_dispatcher`, in which case waitress does not
+    start the worker threads itself.
+    """
+
+    # Set once an instance exists: from then on X-Waitress-Queued is ours
+    installed = False
+
+    def __init__(self, threads):
+        super().__init__()
+        self.set_thread_count(threads)
+        QueueStampingDispatcher.installed = True
+
+    def add_task(self, task):
+        # Overwrites any client-supplied header of the same name
+        task.request.headers[QUEUED_HEADER] = str(time.perf_counter_ns())
+        super().add_task(task)
+
+
+class RequestTimingMiddleware:
+    """Wraps app.wsgi_app; usage: app.wsgi_app = RequestTimingMiddleware(app)."""
+
+    def __init__(self, app):
+        self.wsgi_app = app.wsgi_app
+        self.access_log = os.getenv("ACCESS_LOG", "0") == "1"
+        self.trust_request_start = os.getenv("TRUST_REQUEST_START", "0") == "1"
+        app.before_request(self._tag_route)
+
+    @staticmethod
+    def _tag_route():
+        timings = request.environ.get(ENVIRON_KEY)
+        if timings is not None and request.endpoint:
+            timings.route = request.endpoint
+
+    def __call__(self, environ, start_response):
+        start_ns = time.perf_counter_ns()
+        timings = environ[ENVIRON_KEY] = RequestTimings()
+
+        proxy_start = environ.get("HTTP_X_REQUEST_START") if self.trust_request_start else None
+        if proxy_start:
+            timings.queue = parse_request_start(proxy_start, time.time_ns())
+        if timings.queue is None and QueueStampingDispatcher.installed:
+            queued = environ.get("HTTP_" + QUEUED_HEADER)
+            if queued and queued.isdigit():
+                timings.queue = max(start_ns - int(queued), 0)
+
+        status_holder = []
+
+        def timed_start_response(status, headers, exc_info=None):
+            status_holder.append(status)
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, timed_start_response)
+        finally:
+            self._record(environ, timings, time.perf_counter_ns() - start_ns, status_holder)
+
+    def _record(self, environ, timings, total_ns, status_holder):
+        route = timings.route
+        status = status_holder[0].split(" ", 1)[0] if status_holder else "500"
+        record_request(route, status)
+        registry.observe_ns(BREAKDOWN_SECONDS, (route, "total"), total_ns)
+        for part in PARTS:
+            ns = getattr(timings, part)
+            if ns:
+                registry.observe_ns(BREAKDOWN_SECONDS, (route, part), ns)
+
+        if self.access_log:
+            fields = {f"{part}_ms": round(getattr(timings, part) / 1e6, 3)
+                      for part in PARTS if getattr(timings, part) is not None}
+            fields["total_ms"] = round(total_ns / 1e6, 3)
+            fields["route"] = route
+            fields["status"] = status
+            logger.info(
+                f"{environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')} {status} "
+                f"{fields['total_ms']:.1f}ms",
+                extra=fields,
+            )
+
+
+@contextmanager
+def timed(part):
+    """Add the time spent in the block to the current request's `part`."""
+    timings = request.environ.get(ENVIRON_KEY) if has_request_context() else None
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timings.add(part, time.perf_counter_ns() - start)
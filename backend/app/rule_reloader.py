@@ -0,0 +1,155 @@
+"""
+rule_reloader.py - Hot reload of rule tables
+=============================================
+The correctors read their rule tables from versioned data files
+(correctors/rules/*.json). This module serves one immutable snapshot of
+fully built correctors and replaces it when the files change:
+
+1. a background thread polls the files' (mtime, size) every
+   RULES_RELOAD_INTERVAL_S seconds (0 disables polling; POST
+   /admin/reload-rules forces a reload);
+2. on a change it builds new correctors from the new data - off the
+   request path - and warms them up, so their first requests are not
+   slower than usual;
+3. it swaps the snapshot reference in one assignment (read-copy-update).
+   A request reads `reloader.current` once and keeps that snapshot, so
+   in-flight requests finish on the old version; the old snapshot is
+   freed when the last of them lets go.
+
+A reload that fails (bad JSON, missing table, ...) is logged once and
+the old snapshot stays active until the files change again.
+
+With GC_MODE=serving the startup snapshot is frozen by gc_tuning and is
+never collected after its replacement (the one-time cost of the freeze);
+later snapshots are collected normally.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .metrics import registry as metrics_registry, RULE_RELOADS_TOTAL
+from .correctors.base_corrector import CorrectionLevel
+from .correctors.grammar_corrector import GrammarCorrector
+from .correctors.spelling_corrector import SpellingCorrector
+from .correctors.rule_data import rules_signature
+
+logger = logging.getLogger(__name__)
+
+RULES_RELOAD_INTERVAL_S = float(os.getenv("RULES_RELOAD_INTERVAL_S", "10"))
+
+# Touches every stage; run once per level before a snapshot goes live
+WARMUP_TEXT = (
+    "i dont know where he goed yesterday... their happy and your going to "
+    "love this. me and him was at the store , we buyed a apple.she dont like "
+    "it!! mail info@example.com about THE NEW PLAN. this are bad sentence , isnt it?"
+)
+
+
+class CorrectorSnapshot:
+    """Correctors built from one version of the rule files."""
+    __slots__ = ("spelling", "grammar", "versions", "signature", "loaded_at")
+
+    def __init__(self, spelling, grammar, signature):
+        self.spelling = spelling
+        self.grammar = grammar
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.versions = {
+            rules.name: {"version": rules.version, "sha256": rules.digest[:12]}
+            for rules in (spelling.rules, grammar.rules, grammar.contextual_corrector.rules)
+        }
+
+    def info(self):
+        return {
+            "versions": self.versions,
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)),
+        }
+
+
+class RuleReloader:
+
+    def __init__(self, rules_dir=None, interval_s=RULES_RELOAD_INTERVAL_S):
+        self.rules_dir = rules_dir
+        self.interval_s = interval_s
+        self.current = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._failed_signature = None  # don't retry a broken file set until it changes
+        self._reload_lock = threading.Lock()  # one build at a time; readers never lock
+        self._thread = None
+
+    def build(self):
+        signature = rules_signature(self.rules_dir)
+        snapshot = CorrectorSnapshot(SpellingCorrector(rules_dir=self.rules_dir),
+                                     GrammarCorrector(rules_dir=self.rules_dir), signature)
+        for corrector in (snapshot.spelling, snapshot.grammar):
+            for level in CorrectionLevel:
+                corrector.correct(WARMUP_TEXT, level=level)
+        return snapshot
+
+    def load(self):
+        """Build and publish the first snapshot (at import time, in the main thread)."""
+        self.current = self.build()
+        logger.info(f"Rules loaded: {self.current.versions}")
+        return self.current
+
+    def reload(self, force=False):
+        """Rebuild and swap if the rule files changed. Returns True if swapped."""
+        with self._reload_lock:
+            old = self.current
+            signature = rules_signature(self.rules_dir)
+            if not force and old is not None and signature in (old.signature, self._failed_signature):
+                return False
+
+            start = time.perf_counter()
+            try:
+                new = self.build()
+            except Exception as e:
+                self._failed_signature = signature
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                metrics_registry.inc(RULE_RELOADS_TOTAL, ("error",))
+                logger.error(f"Rule reload failed, keeping the active rules: {self.last_error}")
+                return False
+
+            if old is not None:
+                # Keep the learned stage costs (deadline estimates)
+                new.spelling.stage_costs = old.spelling.stage_costs
+                new.grammar.stage_costs = old.grammar.stage_costs
+
+            self.current = new  # the swap: one reference assignment
+            self.reloads += 1
+            self.last_error = None
+            metrics_registry.inc(RULE_RELOADS_TOTAL, ("ok",))
+            logger.info(f"Rules reloaded in {(time.perf_counter() - start) * 1000:.0f}ms: {new.versions}")
+            return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_s)
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Rule reloader error: {e}")
+
+    def start(self):
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="rule-reloader", daemon=True)
+        self._thread.start()
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            **(snapshot.info() if snapshot else {"versions": None}),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "poll_interval_s": self.interval_s,
+        }
+
+
+reloader = RuleReloader()
@@ -0,0 +1,203 @@
+"""
+scheduler.py - Plan-aware scheduling of correction work
+=======================================================
+Sits between the routes and the correctors and decides which waiting
+request gets the next correction slot.
+
+- Every plan (basic / premium / enterprise) has its own queue.
+- Plans share the slots by weighted fair queuing: a plan with weight 4
+  gets four times the correction throughput of a plan with weight 1
+  when both are backlogged, so a basic bulk client cannot starve
+  enterprise traffic.
+- Inside a plan, the job with the smallest expected cost (text length)
+  goes first, so short interactive requests never wait behind 50k-char
+  jobs. Jobs that waited longer than `aging_ms` are served in arrival
+  order to prevent starvation of big jobs.
+
+The calling (waitress) thread runs its own job once it is granted a
+slot, so there is no extra thread hop.
+
+Admission lets more requests in than there are slots (that backlog is
+what the plans are ordered from), so waiting here is bounded too: a job
+still queued after `max_wait_ms` raises SchedulerTimeout, which the
+routes answer with 503 and Retry-After, like admission's queue timeout.
+The plan comes from the request's API key (auth.require_api_key);
+requests without one run on ANONYMOUS_PLAN (default: basic).
+
+Configuration (environment):
+    SCHEDULER_WORKERS       concurrent correction slots (default: 2)
+    SCHEDULER_AGING_MS      (default: 1000)
+    SCHEDULER_MAX_WAIT_MS   (default: 2000)
+"""
+
+import math
+import os
+import threading
+import time
+
+PLAN_WEIGHTS = {
+    "basic": 1,
+    "premium": 2,
+    "enterprise": 4,
+}
+
+DEFAULT_PLAN = "basic"
+
+# Fixed per-job cost (in characters) so tiny texts are not free
+BASE_COST = 200
+
+
+class SchedulerTimeout(Exception):
+    """A job waited longer than max_wait_ms for a correction slot."""
+
+    def __init__(self, plan, retry_after):
+        super().__init__(f"No correction slot for plan '{plan}' within the wait limit")
+        self.plan = plan
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("plan", "cost", "seq", "enqueued", "event", "granted")
+
+    def __init__(self, plan, cost, seq):
+        self.plan = plan
+        self.cost = cost
+        self.seq = seq
+        self.enqueued = time.perf_counter()
+        self.event = threading.Event()
+        self.granted = False
+
+
+class PlanScheduler:
+
+    def __init__(self, workers=2, weights=None, aging_ms=1000, max_wait_ms=2000):
+        self.workers = workers
+        self.weights = dict(weights or PLAN_WEIGHTS)
+        self.aging_s = aging_ms / 1000
+        self.max_wait_ms = max_wait_ms
+
+        self._lock = threading.Lock()
+        self._queues = {plan: [] for plan in self.weights}
+        self._finish_tags = {plan: 0.0 for plan in self.weights}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self.running = 0
+        self.completed = {plan: 0 for plan in self.weights}
+        self.expired = {plan: 0 for plan in self.weights}
+
+        # Exponentially weighted average job time, used for Retry-After
+        self._avg_service_s = 0.05
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.getenv("SCHEDULER_WORKERS", "2")),
+            aging_ms=int(os.getenv("SCHEDULER_AGING_MS", "1000")),
+            max_wait_ms=int(os.getenv("SCHEDULER_MAX_WAIT_MS", "2000")),
+        )
+
+    @staticmethod
+    def estimate_cost(text):
+        return BASE_COST + len(text)
+
+    def run(self, plan, cost, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the calling thread once scheduled.
+        Raises SchedulerTimeout if no slot came within max_wait_ms.
+        """
+        if plan not in self.weights:
+            plan = DEFAULT_PLAN
+
+        if not self._acquire(plan, cost):
+            raise SchedulerTimeout(plan, self.retry_after())
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._release(plan, time.perf_counter() - start)
+
+    def _charge(self, plan, cost):
+        """Advance the plan's virtual finish tag (weighted fair queuing)."""
+        start = max(self._finish_tags[plan], self._virtual_time)
+        self._finish_tags[plan] = start + cost / self.weights[plan]
+        self._virtual_time = start
+
+    def _acquire(self, plan, cost):
+        with self._lock:
+            if self.running < self.workers and not any(self._queues.values()):
+                self.running += 1
+                self._charge(plan, cost)
+                return True
+
+            self._seq += 1
+            job = _Job(plan, cost, self._seq)
+            self._queues[plan].append(job)
+
+        if job.event.wait(self.max_wait_ms / 1000):
+            return True
+
+        with self._lock:
+            # The slot may have been handed over right after the timeout
+            if job.granted:
+                return True
+            self._queues[plan].remove(job)
+            self.expired[plan] += 1
+            return False
+
+    def _pick_in_plan(self, queue, now):
+        """Shortest expected job first; aged jobs first in arrival order."""
+        best = None
+        best_key = None
+        for job in queue:
+            aged = now - job.enqueued >= self.aging_s
+            key = (0, job.seq) if aged else (1, job.cost, job.seq)
+            if best_key is None or key < best_key:
+                best, best_key = job, key
+        return best
+
+    def _release(self, plan, service_s):
+        with self._lock:
+            self.completed[plan] += 1
+            self._avg_service_s += 0.1 * (service_s - self._avg_service_s)
+
+            now = time.perf_counter()
+            chosen = None
+            chosen_tag = None
+            for name, queue in self._queues.items():
+                if not queue:
+                    continue
+                job = self._pick_in_plan(queue, now)
+                tag = max(self._finish_tags[name], self._virtual_time) + job.cost / self.weights[name]
+                if chosen_tag is None or tag < chosen_tag:
+                    chosen, chosen_tag = job, tag
+
+            if chosen is None:
+                self.running -= 1
+                return
+
+            # Hand the slot over directly (running stays the same)
+            self._queues[chosen.plan].remove(chosen)
+            self._charge(chosen.plan, chosen.cost)
+            chosen.granted = True
+            chosen.event.set()
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free (at least 1)."""
+        backlog = sum(len(queue) for queue in self._queues.values()) + self.running
+        return max(1, math.ceil(backlog * self._avg_service_s / self.workers))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self.running,
+                "queued": {plan: len(queue) for plan, queue in self._queues.items()},
+                "completed": dict(self.completed),
+                "expired": dict(self.expired),
+                "max_wait_ms": self.max_wait_ms,
+                "avg_service_ms": round(self._avg_service_s * 1000, 2),
+                "weights": dict(self.weights),
+            }
+
+
+scheduler = PlanScheduler.from_env()
@@ -4,39 +4,194 @@ simple_error_handler.py
 KISS principle: Simple error handling that's good enough for production
 """
 
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from functools import wraps
 from flask import request, jsonify
 import time
 import os
 
+from .metrics import record_view
+from .profiler import profiler
+from .request_timing import timed
+from .scheduler import SchedulerTimeout
 
-def setup_simple_logging():
-    """One log file. Clean, readable, no emojis."""
+# Standard LogRecord attributes; everything else is an `extra` field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-    os.makedirs('logs', exist_ok=True)
+_listener = None
+
+
+def _stop_listener():
+    """Flush queued records and stop the listener thread (runs at exit too)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Formatted by RecordQueueHandler before the record was queued
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler whose records keep message and traceback apart.
+
+    The stock prepare() formats the record, folding the traceback into
+    msg, and drops exc_info, so the listener's JsonFormatter could never
+    emit "exc" and got a multi-line "msg". Here msg is just the message
+    and the traceback travels as exc_text (tracebacks don't pickle or
+    outlive the thread, so it is formatted now); logging.Formatter
+    appends exc_text by itself, JsonFormatter puts it in "exc".
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits high-volume records. Records logged with
+    extra={"sample_key": ...} pass freely for the first `burst` per key
+    and window, then only 1 in `rate`. The next record that passes
+    carries the number of suppressed ones.
+    """
+
+    def __init__(self, burst=20, rate=100, window_s=10.0):
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._seen = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_s:
+                self._window_start = now
+                self._seen.clear()
+
+            seen = self._seen.get(key, 0) + 1
+            self._seen[key] = seen
+            if seen > self.burst and (seen - self.burst) % self.rate:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+def setup_simple_logging(mode=None, fmt=None, log_dir="logs", console=True):
+    """
+    One log file. Clean, readable, no emojis.
+
+    mode: "queue" (default) - request threads only enqueue records, a
+          background listener thread does the formatting and file I/O
+          (including rotation); "sync" - handlers write in the caller.
+    fmt:  "text" (default) or "json" (structured JSON lines).
+    Both can be set with LOG_MODE / LOG_FORMAT.
+    """
+    global _listener
+
+    mode = mode or os.getenv("LOG_MODE", "queue")
+    fmt = fmt or os.getenv("LOG_FORMAT", "text")
+
+    os.makedirs(log_dir, exist_ok=True)
 
     # File handler - always UTF-8
     handler = RotatingFileHandler(
-        'logs/api.log',
+        os.path.join(log_dir, 'api.log'),
         maxBytes=5*1024*1024,  # 5MB
         backupCount=3,
         encoding='utf-8'
     )
+    handlers = [handler]
 
     # Console handler
-    console = logging.StreamHandler()
-    console.setFormatter(logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    ))
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s | %(levelname)s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        handlers.append(console_handler)
+
+    if fmt == "json":
+        for h in handlers:
+            h.setFormatter(JsonFormatter())
+
+    sampling = SamplingFilter(
+        burst=int(os.getenv("LOG_SAMPLE_BURST", "20")),
+        rate=int(os.getenv("LOG_SAMPLE_RATE", "100")),
+        window_s=float(os.getenv("LOG_SAMPLE_WINDOW_S", "10")),
+    )
 
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    logger.handlers.clear()  # Avoid duplicate handlers in reloads
-    logger.addHandler(handler)
-    logger.addHandler(console)
+
+    # Avoid duplicate handlers/listeners in reloads
+    _stop_listener()
+    for h in logger.handlers:
+        h.close()
+    logger.handlers.clear()
+
+    if mode == "queue":
+        log_queue = queue.SimpleQueue()
+        queue_handler = RecordQueueHandler(log_queue)
+        queue_handler.addFilter(sampling)
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for h in handlers:
+            h.addFilter(sampling)
+            logger.addHandler(h)
 
     logging.info("Logging initialized successfully")  # bez emojija
 
@@ -47,22 +202,41 @@ def handle_errors(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
         start = time.time()
+        start_ns = time.perf_counter_ns()
 
         try:
-            result = f(*args, **kwargs)
+            if profiler.active:
+                result = profiler.call(f, *args, **kwargs)
+            else:
+                result = f(*args, **kwargs)
 
             duration = (time.time() - start) * 1000
             if duration > 1000:
                 logging.warning(f"SLOW REQUEST: {request.endpoint} took {duration:.0f}ms")
 
+            record_view(request.endpoint, start_ns)
             return result
 
+        except SchedulerTimeout as e:
+            logging.warning(f"Scheduler timeout in {request.endpoint}: {str(e)}",
+                            extra={"sample_key": "scheduler_timeout"})
+            record_view(request.endpoint, start_ns, "scheduler_timeout")
+            response = jsonify({
+                "error": "Server busy, please retry later",
+                "reason": "scheduler_timeout",
+                "status": "error"
+            })
+            return response, 503, {"Retry-After": str(e.retry_after)}
+
         except ValueError as e:
-            logging.warning(f"Validation error in {request.endpoint}: {str(e)}")
+            logging.warning(f"Validation error in {request.endpoint}: {str(e)}",
+                            extra={"sample_key": "validation"})
+            record_view(request.endpoint, start_ns, "validation")
             return jsonify({"error": str(e), "status": "error"}), 400
 
         except Exception as e:
             logging.error(f"UNHANDLED ERROR in {request.endpoint}: {str(e)}", exc_info=True)
+            record_view(request.endpoint, start_ns, "internal")
             return jsonify({
                 "error": "Internal server error",
                 "status": "error"
@@ -76,7 +250,8 @@ def validate_request():
     if not request.is_json:
         raise ValueError("Request must be JSON")
 
-    data = request.get_json()
+    with timed("parse"):
+        data = request.get_json()
     if not data or 'text' not in data:
         raise ValueError("Missing 'text' field in JSON")
 
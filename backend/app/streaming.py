@@ -0,0 +1,351 @@
+"""
+streaming.py - Streaming JSONL/CSV corrector
+============================================
+Corrects one text field (JSONL) or column (CSV) in files of any size.
+
+Pipeline: reader thread -> worker processes -> ordered writer.
+- The reader splits the input into chunks of raw records (bytes) and
+  pushes them into a bounded queue.
+- Worker processes decode, correct and re-encode whole chunks.
+- The main thread writes finished chunks strictly in input order and
+  periodically checkpoints the input/output byte offsets, so an
+  interrupted run resumes exactly where it stopped.
+
+Queue and in-flight sizes are bounded, and so is a single record
+(--max-record-bytes), so memory stays flat no matter how big the file is.
+
+Usage:
+    python -m app.streaming export.jsonl fixed.jsonl --field text
+    python -m app.streaming export.csv fixed.csv --field body --corrector spelling
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .correctors.grammar_corrector import GrammarCorrector
+from .correctors.language_id import detect_language
+from .correctors.spelling_corrector import SpellingCorrector
+
+logger = logging.getLogger(__name__)
+
+CORRECTORS = {
+    "grammar": GrammarCorrector,
+    "spelling": SpellingCorrector,
+}
+
+DEFAULT_CHUNK_RECORDS = 500
+DEFAULT_CHECKPOINT_EVERY = 10000
+# The API takes up to 50,000 characters per text; a record can't need much more
+DEFAULT_MAX_RECORD_BYTES = 1024 * 1024
+
+
+# ================================
+# WORKER SIDE
+# ================================
+
+_worker_corrector = None
+
+
+def _init_worker(corrector_name):
+    """Build one corrector per worker process (not per chunk)."""
+    global _worker_corrector
+    _worker_corrector = CORRECTORS[corrector_name]()
+
+
+def _correct_jsonl_chunk(lines, field):
+    out = []
+    for raw in lines:
+        line = raw.decode("utf-8")
+        if not line.strip():
+            out.append(line)
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Keep malformed lines untouched instead of failing the whole run
+            out.append(line)
+            continue
+
+        value = record.get(field) if isinstance(record, dict) else None
+        if isinstance(value, str):
+            record[field] = _worker_corrector.correct(value, language=detect_language(value))
+
+        ending = "\r\n" if line.endswith("\r\n") else "\n"
+        out.append(json.dumps(record, ensure_ascii=False) + ending)
+
+    return "".join(out).encode("utf-8")
+
+
+def _correct_csv_chunk(lines, column, lineterminator):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=lineterminator)
+
+    text = b"".join(lines).decode("utf-8")
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if column < len(row) and row[column]:
+            row[column] = _worker_corrector.correct(row[column], language=detect_language(row[column]))
+        writer.writerow(row)
+
+    return buffer.getvalue().encode("utf-8")
+
+
+def _correct_chunk(fmt, lines, field, column, lineterminator):
+    if fmt == "jsonl":
+        return _correct_jsonl_chunk(lines, field)
+    return _correct_csv_chunk(lines, column, lineterminator)
+
+
+# ================================
+# READER SIDE
+# ================================
+
+def _read_record(f, fmt, max_bytes=DEFAULT_MAX_RECORD_BYTES):
+    """
+    Read one raw record (bytes) from a binary file.
+
+    CSV fields may contain quoted newlines, so a CSV record keeps reading
+    lines until the number of quote characters is even (RFC 4180 escapes
+    quotes by doubling them, which keeps the parity intact).
+
+    A record longer than max_bytes raises ValueError: one stray quote
+    would otherwise make the rest of the file a single record.
+    """
+    start = f.tell()
+    line = f.readline(max_bytes + 1)
+    if fmt == "csv":
+        while line.count(b'"') % 2 and len(line) <= max_bytes:
+            more = f.readline(max_bytes + 1 - len(line))
+            if not more:
+                break
+            line += more
+
+    if len(line) > max_bytes:
+        hint = " (unbalanced quote?)" if fmt == "csv" else ""
+        raise ValueError(f"Record at byte {start} is longer than {max_bytes} bytes{hint}")
+    return line
+
+
+def _reader(f, fmt, chunk_records, out_queue, stop, max_record_bytes=DEFAULT_MAX_RECORD_BYTES):
+    """Reader thread: push (lines, end_offset) chunks into a bounded queue."""
+    try:
+        while not stop.is_set():
+            lines = []
+            while len(lines) < chunk_records:
+                record = _read_record(f, fmt, max_record_bytes)
+                if not record:
+                    break
+                lines.append(record)
+
+            if not lines:
+                break
+            out_queue.put((lines, f.tell()))
+        out_queue.put(None)
+    except Exception as e:
+        out_queue.put(e)
+
+
+# ================================
+# CHECKPOINTS
+# ================================
+
+def _checkpoint_path(output_path):
+    return output_path + ".ckpt"
+
+
+def load_checkpoint(output_path):
+    path = _checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(output_path, state):
+    """Write the checkpoint atomically (write temp file, then rename)."""
+    path = _checkpoint_path(output_path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ================================
+# PIPELINE
+# ================================
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot detect format of '{path}' (use --format)")
+
+
+def stream_correct(input_path, output_path, field, corrector="grammar", fmt=None,
+                   workers=None, chunk_records=DEFAULT_CHUNK_RECORDS,
+                   checkpoint_every=DEFAULT_CHECKPOINT_EVERY, resume=True,
+                   max_record_bytes=DEFAULT_MAX_RECORD_BYTES):
+    """
+    Correct `field` in every record of `input_path` and write `output_path`.
+
+    Returns a dict with the number of records processed in this run, the
+    total record count and the elapsed time.
+    """
+    if corrector not in CORRECTORS:
+        raise ValueError(f"Unknown corrector '{corrector}' (use one of {sorted(CORRECTORS)})")
+
+    fmt = fmt or detect_format(input_path)
+    workers = workers or os.cpu_count() or 1
+    max_inflight = workers * 2
+
+    state = load_checkpoint(output_path) if resume else None
+    if state and state.get("input") != os.path.abspath(input_path):
+        raise ValueError("Checkpoint belongs to a different input file")
+
+    start = time.time()
+    processed = 0
+
+    with open(input_path, "rb") as src:
+        column = None
+        lineterminator = "\n"
+        header = b""
+
+        if fmt == "csv":
+            header = _read_record(src, fmt, max_record_bytes)
+            lineterminator = "\r\n" if header.endswith(b"\r\n") else "\n"
+            names = next(csv.reader(io.StringIO(header.decode("utf-8"), newline="")), [])
+            if field not in names:
+                raise ValueError(f"Column '{field}' not found in CSV header")
+            column = names.index(field)
+
+        if state:
+            dst = open(output_path, "r+b")
+            dst.truncate(state["output_offset"])
+            dst.seek(state["output_offset"])
+            src.seek(state["input_offset"])
+            records = state["records"]
+            logger.info(f"Resuming {input_path} at byte {state['input_offset']} ({records} records done)")
+        else:
+            dst = open(output_path, "wb")
+            dst.write(header)
+            records = 0
+
+        input_offset = src.tell()
+        since_checkpoint = 0
+
+        chunks = queue.Queue(maxsize=max_inflight)
+        stop = threading.Event()
+        reader = threading.Thread(
+            target=_reader, args=(src, fmt, chunk_records, chunks, stop, max_record_bytes),
+            name="stream-reader", daemon=True
+        )
+
+        def checkpoint():
+            dst.flush()
+            os.fsync(dst.fileno())
+            _save_checkpoint(output_path, {
+                "input": os.path.abspath(input_path),
+                "input_offset": input_offset,
+                "output_offset": dst.tell(),
+                "records": records,
+            })
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(corrector,))
+        pending = deque()
+
+        def write_oldest():
+            nonlocal input_offset, records, processed, since_checkpoint
+            future, end_offset, count = pending.popleft()
+            dst.write(future.result())
+            input_offset = end_offset
+            records += count
+            processed += count
+            since_checkpoint += count
+            if since_checkpoint >= checkpoint_every:
+                checkpoint()
+                since_checkpoint = 0
+
+        try:
+            reader.start()
+
+            while True:
+                item = chunks.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                lines, end_offset = item
+                future = pool.submit(_correct_chunk, fmt, lines, field, column, lineterminator)
+                pending.append((future, end_offset, len(lines)))
+
+                # Ordered writer: always wait for the oldest chunk first
+                while len(pending) >= max_inflight or (pending and pending[0][0].done()):
+                    write_oldest()
+
+            while pending:
+                write_oldest()
+
+        except BaseException:
+            # Persist progress of everything already written, then re-raise
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            checkpoint()
+            dst.close()
+            raise
+
+        pool.shutdown()
+        dst.close()
+
+    ckpt = _checkpoint_path(output_path)
+    if os.path.exists(ckpt):
+        os.remove(ckpt)
+
+    return {
+        "records_processed": processed,
+        "records_total": records,
+        "elapsed_s": round(time.time() - start, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream-correct a text field in a JSONL or CSV file")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--field", required=True, help="JSON field or CSV column to correct")
+    parser.add_argument("--corrector", choices=sorted(CORRECTORS), default="grammar")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-records", type=int, default=DEFAULT_CHUNK_RECORDS)
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    parser.add_argument("--max-record-bytes", type=int, default=DEFAULT_MAX_RECORD_BYTES,
+                        help="Fail on a record longer than this (e.g. an unbalanced CSV quote)")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    result = stream_correct(
+        args.input, args.output, args.field,
+        corrector=args.corrector, fmt=args.format, workers=args.workers,
+        chunk_records=args.chunk_records, checkpoint_every=args.checkpoint_every,
+        resume=not args.no_resume, max_record_bytes=args.max_record_bytes,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+cold_start_benchmark.py
+=======================
+Worker cold-start benchmark: time to import the correctors and build
+GrammarCorrector + SpellingCorrector in a fresh interpreter, with the
+on-disk pattern cache (correctors/pattern_cache.py)
+
+- off      PATTERN_CACHE=0, every pattern compiled from scratch
+- cold     cache enabled but empty (first worker after a rule change:
+           compiles and writes the cache)
+- warm     cache filled by a previous worker
+
+Every mode runs --runs fresh subprocesses and reports the median. With
+--scale N the rule tables are grown by N synthetic entries per table
+(in a temporary RULES_DIR), to show how start-up grows with the rules.
+
+Usage (from backend/):
+    python -m app.tests.cold_start_benchmark [--runs 7] [--scale 0,2000,10000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from app.correctors.rule_data import RULES_DIR
+
+CHILD = """
+import time
+start = time.perf_counter()
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.spelling_corrector import SpellingCorrector
+imported = time.perf_counter()
+GrammarCorrector()
+SpellingCorrector()
+built = time.perf_counter()
+print((imported - start) * 1000, (built - imported) * 1000)
+"""
+
+GROWN_TABLES = {
+    "spelling": ("spelling_rules",),
+    "grammar": ("irregular_verbs", "verb_agreements", "word_order_rules", "preposition_rules"),
+}
+
+
+def grow_rules(directory, extra):
+    """Copy the rule files into `directory`, adding `extra` synthetic rules per table."""
+    for name in ("spelling", "grammar", "contextual"):
+        with open(os.path.join(RULES_DIR, f"{name}.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for table in GROWN_TABLES.get(name, ()):
+            rules = data["tables"][table]
+            for i in range(extra):
+                rules[f"{table[:4]}{i}x{'q' * (i % 7)}"] = f"{table[:4]}{i}"
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+def run_child(env):
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=backend, env=env,
+                         capture_output=True, text=True, check=True)
+    import_ms, build_ms = map(float, out.stdout.split()[-2:])
+    return import_ms, build_ms
+
+
+def measure(mode, rules_dir, cache_dir, runs):
+    env = dict(os.environ, RULES_DIR=rules_dir, PATTERN_CACHE_DIR=cache_dir,
+               PATTERN_CACHE="0" if mode == "off" else "1")
+    samples = []
+    for _ in range(runs):
+        if mode == "cold":
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        samples.append(run_child(env))
+    return (statistics.median(s[0] for s in samples),
+            statistics.median(s[1] for s in samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corrector cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--scale", default="0,2000,10000", help="synthetic rules added per table")
+    args = parser.parse_args()
+
+    print("\n=== COLD START BENCHMARK ===\n")
+    print(f"{'extra rules':>12} {'mode':<6} {'import ms':>10} {'build ms':>10} {'total ms':>10}")
+
+    for extra in [int(n) for n in args.scale.split(",") if n]:
+        work = tempfile.mkdtemp(prefix="cold-start-")
+        try:
+            rules_dir = os.path.join(work, "rules")
+            cache_dir = os.path.join(work, "cache")
+            os.makedirs(rules_dir)
+            grow_rules(rules_dir, extra)
+
+            results = {}
+            for mode in ("off", "cold", "warm"):
+                import_ms, build_ms = measure(mode, rules_dir, cache_dir, args.runs)
+                results[mode] = build_ms
+                print(f"{extra:>12} {mode:<6} {import_ms:>10.1f} {build_ms:>10.1f} "
+                      f"{import_ms + build_ms:>10.1f}")
+            print(f"{'':>12} warm cache builds the correctors "
+                  f"{results['off'] / max(results['warm'], 1e-9):.1f}x faster than no cache\n")
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
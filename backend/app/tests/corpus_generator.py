@@ -0,0 +1,307 @@
+"""
+corpus_generator.py
+===================
+Synthetic error-injected corpora for combined speed + accuracy runs.
+
+Takes clean text and injects errors by inverting the correctors' own
+rule tables, so every injected error is one the engine is supposed to
+fix:
+
+- spelling     SpellingCorrector.spelling_rules   "believe" -> "beleive"
+- contractions GrammarCorrector.contractions      "don't"   -> "dont"
+- verbs        GrammarCorrector.verb_agreements   "he has"  -> "he have"
+- articles     GrammarCorrector.article_corrections "an apple" -> "a apple"
+- homophones   ContextualCorrector indicator lists "you're going" -> "your going"
+
+Density is errors per 100 words (capped by how many eligible sites the
+text has). Documents are built from the clean sentences up to each size
+class, from tweet size to 50k characters, and every line carries the
+clean text as "expected" plus the list of injected errors.
+
+Output is JSON lines ({"id", "size", "text", "expected", "errors"}),
+usable directly with load_generator.py --corpus.
+
+Usage (from backend/):
+    python -m app.tests.corpus_generator generate corpus.jsonl [--density 5] [--count 20]
+           [--sizes tweet,paragraph,document,long,max] [--input clean.txt] [--seed 1]
+    python -m app.tests.corpus_generator evaluate corpus.jsonl [--corrector grammar]
+
+The clean input should already be written the way the corrector writes
+(sentence case, standard spacing); `evaluate` reports how much of it
+the corrector changes on its own, as the accuracy floor.
+"""
+
+import argparse
+import difflib
+import json
+import random
+import re
+import sys
+import time
+
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.spelling_corrector import SpellingCorrector
+from app.correctors.contextual_corrector import ContextualCorrector
+
+SIZES = {
+    "tweet": 280,
+    "paragraph": 1500,
+    "document": 8000,
+    "long": 25000,
+    "max": 50000,
+}
+
+# Contractions whose apostrophe-less form is itself a word; the grammar
+# corrector leaves those alone on purpose, so they are not injected.
+AMBIGUOUS_CONTRACTIONS = {"were", "well", "hell", "shell", "ill", "id", "its"}
+
+# Words the corrector reads as "it's" (ContextualCorrector.correct_its_its)
+ITS_CONTRACTION_NEXT = ["a", "the", "not", "been", "going", "time", "okay", "fine", "good", "bad"]
+
+CLEAN_SENTENCES = [
+    "I don't know where he went yesterday.",
+    "She has a lot of work to do before the meeting.",
+    "They're happy about the news from the office.",
+    "You're going to love this new feature.",
+    "He doesn't believe that the report is correct.",
+    "We have an apple and an orange for lunch.",
+    "It's not the first time we have seen this problem.",
+    "They have a house near the river and their car is new.",
+    "I can't say that the government made a terrible decision.",
+    "She doesn't have an umbrella, so she waits for an hour.",
+    "We weren't sure which answer was correct.",
+    "Your phone is on the table next to your book.",
+    "He has a friend who lives in a foreign country.",
+    "I didn't receive the address until the next day.",
+    "They haven't seen the environment report yet.",
+    "It's a great idea and we should definitely try it.",
+    "You're welcome to join us tomorrow if you're free.",
+    "She isn't ready, but they're coming at noon.",
+    "I wouldn't recommend that plan to a friend.",
+    "The dog wagged its tail when their children came home.",
+]
+
+
+def _match_case(source, replacement):
+    if source[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class ErrorInjector:
+    """Finds eligible sites in clean text and corrupts some of them."""
+
+    def __init__(self, seed=1):
+        self.random = random.Random(seed)
+
+        spelling = SpellingCorrector()
+        grammar = GrammarCorrector()
+        contextual = ContextualCorrector()
+
+        # (table, compiled pattern for the correct form, [wrong forms])
+        self.rules = []
+        self._invert("spelling", spelling.spelling_rules)
+        self._invert("contractions", {
+            wrong: right for wrong, right in grammar.contractions.items()
+            if wrong not in AMBIGUOUS_CONTRACTIONS
+        })
+        self._invert("verbs", grammar.verb_agreements)
+        self._invert("articles", grammar.article_corrections)
+
+        # Homophones: only contexts the contextual corrector resolves
+        for wrong, right, indicators in (
+            ("your", "you're", contextual.youre_indicators),
+            ("you're", "your", contextual.your_indicators),
+            ("their", "they're", contextual.theyre_indicators),
+            ("they're", "their", contextual.their_indicators),
+            ("its", "it's", ITS_CONTRACTION_NEXT),
+        ):
+            pattern = re.compile(
+                r"\b" + re.escape(right) + r"(?=\s+(?:" + "|".join(map(re.escape, indicators)) + r")\b)",
+                re.IGNORECASE,
+            )
+            self.rules.append(("homophones", pattern, [wrong]))
+
+    def _invert(self, table, mapping):
+        inverted = {}
+        for wrong, right in mapping.items():
+            inverted.setdefault(right.lower(), []).append(wrong)
+        for right, wrongs in inverted.items():
+            pattern = re.compile(r"(?<![\w'])" + re.escape(right) + r"(?![\w'])", re.IGNORECASE)
+            self.rules.append((table, pattern, sorted(wrongs)))
+
+    def sites(self, text):
+        """All (start, end, table, wrong forms) where an error can go."""
+        found = []
+        for table, pattern, wrongs in self.rules:
+            for match in pattern.finditer(text):
+                found.append((match.start(), match.end(), table, wrongs))
+        return found
+
+    def inject(self, text, density):
+        """Return (noisy text, errors) with ~density errors per 100 words."""
+        words = len(text.split())
+        target = max(0, round(words * density / 100))
+
+        candidates = self.sites(text)
+        self.random.shuffle(candidates)
+
+        chosen = []
+        taken = []
+        for start, end, table, wrongs in candidates:
+            if len(chosen) >= target:
+                break
+            if any(start < t_end and t_start < end for t_start, t_end in taken):
+                continue
+            taken.append((start, end))
+            chosen.append((start, end, table, self.random.choice(wrongs)))
+
+        chosen.sort()
+        parts = []
+        errors = []
+        last = 0
+        for start, end, table, wrong in chosen:
+            right = text[start:end]
+            wrong = _match_case(right, wrong)
+            parts.append(text[last:start])
+            parts.append(wrong)
+            errors.append({"table": table, "offset": start, "right": right, "wrong": wrong})
+            last = end
+        parts.append(text[last:])
+        return "".join(parts), errors
+
+
+def build_document(sentences, size, rng):
+    """Clean sentences, starting at a random one, up to `size` characters."""
+    i = rng.randrange(len(sentences))
+    parts = []
+    length = 0
+    while True:
+        sentence = sentences[i % len(sentences)]
+        if parts and length + 1 + len(sentence) > size:
+            break
+        parts.append(sentence)
+        length += len(sentence) + 1
+        i += 1
+    return " ".join(parts)
+
+
+def generate(args):
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", f.read()) if s.strip()]
+    else:
+        sentences = CLEAN_SENTENCES
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    for size in sizes:
+        if size not in SIZES:
+            sys.exit(f"unknown size '{size}' (use {', '.join(SIZES)})")
+
+    injector = ErrorInjector(args.seed)
+    rng = random.Random(args.seed)
+
+    written = 0
+    injected = 0
+    with open(args.output, "w", encoding="utf-8") as out:
+        for size in sizes:
+            for n in range(args.count):
+                expected = build_document(sentences, SIZES[size], rng)
+                text, errors = injector.inject(expected, args.density)
+                out.write(json.dumps({
+                    "id": f"{size}-{n}",
+                    "size": size,
+                    "density": args.density,
+                    "text": text,
+                    "expected": expected,
+                    "errors": errors,
+                }, ensure_ascii=False) + "\n")
+                written += 1
+                injected += len(errors)
+
+    print(f"Wrote {written} documents with {injected} injected errors to {args.output}")
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def word_errors(output, expected):
+    """
+    Word-level edit count (substitutions + insertions + deletions).
+    Long corpora repeat the same sentences, which confuses a global diff,
+    so sentences are aligned pairwise whenever their counts agree.
+    """
+    out_sentences = _SENTENCE_END.split(output)
+    exp_sentences = _SENTENCE_END.split(expected)
+    if len(out_sentences) == len(exp_sentences) and len(exp_sentences) > 1:
+        return sum(word_errors(o, e) for o, e in zip(out_sentences, exp_sentences))
+
+    a, b = output.split(), expected.split()
+    errors = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+        if tag != "equal":
+            errors += max(i2 - i1, j2 - j1)
+    return errors
+
+
+def evaluate(args):
+    corrector = GrammarCorrector() if args.corrector == "grammar" else SpellingCorrector()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        docs = [json.loads(line) for line in f if line.strip()]
+
+    by_size = {}
+    for doc in docs:
+        stats = by_size.setdefault(doc["size"], {
+            "docs": 0, "chars": 0, "seconds": 0.0, "exact": 0,
+            "words": 0, "wer_before": 0, "wer_after": 0, "wer_clean": 0,
+        })
+        start = time.perf_counter()
+        output = corrector.correct(doc["text"])
+        stats["seconds"] += time.perf_counter() - start
+
+        stats["docs"] += 1
+        stats["chars"] += len(doc["text"])
+        stats["exact"] += output == doc["expected"]
+        stats["words"] += len(doc["expected"].split())
+        stats["wer_before"] += word_errors(doc["text"], doc["expected"])
+        stats["wer_after"] += word_errors(output, doc["expected"])
+        stats["wer_clean"] += word_errors(corrector.correct(doc["expected"]), doc["expected"])
+
+    print(f"\n=== CORPUS EVALUATION ({args.corrector}) ===\n")
+    print(f"{'size':<10} {'docs':>5} {'chars/s':>12} {'exact':>7} "
+          f"{'WER in':>8} {'WER out':>8} {'WER clean':>10}")
+    for size, s in by_size.items():
+        words = s["words"] or 1
+        print(f"{size:<10} {s['docs']:>5} {s['chars'] / s['seconds']:>12,.0f} "
+              f"{s['exact'] / s['docs']:>7.1%} {s['wer_before'] / words:>8.2%} "
+              f"{s['wer_after'] / words:>8.2%} {s['wer_clean'] / words:>10.2%}")
+    print("\nWER in: noisy input vs expected; WER out: corrected vs expected;"
+          "\nWER clean: what the corrector changes in already-clean text.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error-injected corpus generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write a JSON lines corpus")
+    gen.add_argument("output")
+    gen.add_argument("--input", help="clean text file (default: built-in sentences)")
+    gen.add_argument("--density", type=float, default=5.0, help="errors per 100 words")
+    gen.add_argument("--count", type=int, default=20, help="documents per size class")
+    gen.add_argument("--sizes", default=",".join(SIZES))
+    gen.add_argument("--seed", type=int, default=1)
+
+    ev = sub.add_parser("evaluate", help="speed + accuracy of a corrector on a corpus")
+    ev.add_argument("corpus")
+    ev.add_argument("--corrector", choices=("grammar", "spelling"), default="grammar")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args)
+    else:
+        evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
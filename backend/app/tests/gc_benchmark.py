@@ -0,0 +1,106 @@
+"""
+gc_benchmark.py
+===============
+Request latency under GC_MODE=default vs GC_MODE=serving.
+
+Each mode runs in a fresh interpreter (the GC mode is applied when the
+app is imported), drives the Flask app in-process with a mix of short
+and long texts, and reports p50/p99/p99.9 latency together with the GC
+pauses recorded by gc_tuning's gc.callbacks hook during the run.
+
+Usage (from backend/):
+    python -m app.tests.gc_benchmark [--requests 3000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+TEXTS = [
+    "i dont know where he goed",
+    "their happy about the news and your going to love this",
+    "yesterday i go to store and i think i found what i was looking for. " * 10,
+    "this are bad sentence... he dont like it... " * 40,
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def child(total):
+    """Runs inside the subprocess: measure and print one JSON line."""
+    import logging
+    from app.main import app
+    from app.gc_tuning import telemetry
+
+    logging.disable(logging.CRITICAL)
+    client = app.test_client()
+
+    for text in TEXTS * 20:
+        client.post("/correct", json={"text": text})
+
+    telemetry.keep_pauses = True
+    times = []
+    for i in range(total):
+        start = time.perf_counter()
+        client.post("/correct", json={"text": TEXTS[i % len(TEXTS)]})
+        times.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        "mode": os.getenv("GC_MODE", "default"),
+        "requests": total,
+        "p50_ms": round(percentile(times, 50), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "p999_ms": round(percentile(times, 99.9), 3),
+        "max_ms": round(max(times), 3),
+        "gc": telemetry.summary(),
+    }))
+
+
+def run_mode(mode, total):
+    env = dict(os.environ, GC_MODE=mode)
+    out = subprocess.run(
+        [sys.executable, "-m", "app.tests.gc_benchmark", "--child", "--requests", str(total)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GC mode latency benchmark")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.requests)
+        return
+
+    print("\n=== GC BENCHMARK ===\n")
+    results = []
+    for mode in ("default", "serving"):
+        result = run_mode(mode, args.requests)
+        results.append(result)
+        gcs = ", ".join(f"gen{g}: {s['count']}x max {s['max_ms']}ms" for g, s in result["gc"].items())
+        print(f"{mode:>8}: p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+              f"p99.9 {result['p999_ms']:.3f}ms  max {result['max_ms']:.3f}ms")
+        print(f"          GC {gcs}")
+
+    default, serving = results
+    if default["p99_ms"]:
+        print(f"\np99 change (serving vs default): {(serving['p99_ms'] / default['p99_ms'] - 1) * 100:+.1f}%")
+
+    filename = f"gc_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {filename}")
+
+
+if __name__ == "__main__":
+    main()
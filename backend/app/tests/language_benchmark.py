@@ -0,0 +1,201 @@
+"""
+language_benchmark.py
+=====================
+Benchmark for the language gate (correctors/language_id.py) on a
+mixed-language workload:
+
+1. Detection: detect_language() accuracy per language and microseconds
+   per call, on sentences that are not in the embedded model.
+2. Workload: English documents from corpus_generator (error-injected)
+   mixed with Serbian (Latin and Cyrillic), German, French, Spanish,
+   Italian and Russian ones. GrammarCorrector.correct runs them with the
+   gate (detect_language() per text, as the routes do, timed with the
+   correction) and without it (language="en": every text through the
+   English rules), reporting time per text and how many non-English
+   texts the English rules changed.
+
+Exits with 1 if an English text is classified as anything else - that
+would silently turn its corrections off.
+
+Usage (from backend/):
+    python -m app.tests.language_benchmark [--texts 300] [--english-share 0.6] [--sizes tweet,paragraph]
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.language_id import ENGLISH, detect_language
+from app.tests.corpus_generator import CLEAN_SENTENCES, SIZES, ErrorInjector, build_document
+from app.tests.micro_benchmark import SEED
+
+# Held out from the model's samples
+SENTENCES = {
+    "sr": [
+        "Danas je lep dan i idemo u šetnju sa decom.",
+        "Molim vas da mi pošaljete izveštaj do srede jer moramo da završimo projekat.",
+        "Kupio sam novi telefon, ali baterija ne traje ni jedan dan.",
+        "U subotu idemo kod bake na selo i ostajemo do nedelje uveče.",
+        "Sastanak je pomeren za četvrtak u deset sati ujutru.",
+        "Ne znam da li ću stići na vreme, saobraćaj je užasan.",
+        "Здраво, како си? Ја сам добро, хвала на питању.",
+        "Јуче смо гледали утакмицу и наш тим је победио у последњем минуту.",
+        "Морам да завршим посао пре него што одем на одмор.",
+    ],
+    "de": [
+        "Können Sie mir bitte sagen, wie spät es ist? Ich habe meine Uhr vergessen.",
+        "Am Wochenende fahren wir zu meinen Eltern aufs Land.",
+        "Die Besprechung wurde auf Donnerstag um zehn Uhr verschoben.",
+        "Ich habe ein neues Handy gekauft, aber der Akku hält nicht einmal einen Tag.",
+        "Wir müssen die Aufgabe bis Freitag erledigen, sonst wird der Chef wütend.",
+    ],
+    "fr": [
+        "Bonjour, je voudrais réserver une table pour deux personnes ce soir.",
+        "Ce week-end, nous allons chez mes parents à la campagne.",
+        "La réunion a été reportée à jeudi à dix heures.",
+        "J'ai acheté un nouveau téléphone, mais la batterie ne tient pas une journée.",
+        "Nous devons terminer le travail avant vendredi, sinon le directeur sera fâché.",
+    ],
+    "es": [
+        "Hola, ¿cómo estás? Hoy vamos a la playa con mis amigos.",
+        "Este fin de semana vamos a casa de mis padres en el campo.",
+        "La reunión se ha cambiado al jueves a las diez.",
+        "Compré un teléfono nuevo, pero la batería no dura ni un día.",
+        "Tenemos que terminar el trabajo antes del viernes o el jefe se enfadará.",
+    ],
+    "it": [
+        "Ciao, come stai? Oggi andiamo al mare con gli amici.",
+        "Questo fine settimana andiamo dai miei genitori in campagna.",
+        "La riunione è stata spostata a giovedì alle dieci.",
+        "Ho comprato un telefono nuovo, ma la batteria non dura neanche un giorno.",
+        "Dobbiamo finire il lavoro entro venerdì, altrimenti il capo si arrabbia.",
+    ],
+    "ru": [
+        "Привет, как дела? Сегодня мы идём на пляж с друзьями.",
+        "В эти выходные мы поедем к родителям в деревню.",
+        "Встречу перенесли на четверг на десять часов.",
+        "Я купил новый телефон, но батарея не держит даже один день.",
+        "Мы должны закончить работу до пятницы, иначе начальник рассердится.",
+    ],
+}
+
+
+def english_texts(seed, sizes):
+    injector = ErrorInjector(seed)
+    rng = random.Random(seed)
+    for size in sizes:
+        for density in (0, 5, 20):
+            text, _ = injector.inject(build_document(CLEAN_SENTENCES, SIZES[size], rng), density)
+            yield text
+    for sentence in CLEAN_SENTENCES:
+        yield injector.inject(sentence, 20)[0]
+    yield SEED
+
+
+def workload(count, english_share, sizes, seed):
+    """[(language, text)], shuffled: ~english_share English, the rest spread over SENTENCES."""
+    rng = random.Random(seed)
+    english = list(english_texts(seed, sizes))
+    others = sorted(SENTENCES)
+    texts = []
+    for _ in range(count):
+        if rng.random() < english_share:
+            texts.append((ENGLISH, rng.choice(english)))
+        else:
+            language = rng.choice(others)
+            texts.append((language, build_document(SENTENCES[language], SIZES[rng.choice(sizes)], rng)))
+    return texts
+
+
+def check_detection(seed, sizes, repeats):
+    """{language: (correct, total)}, misclassified [(expected, detected, text)], µs per call by size."""
+    rng = random.Random(seed)
+    samples = [(ENGLISH, text) for text in english_texts(seed, sizes)]
+    for language, sentences in SENTENCES.items():
+        samples += [(language, sentence) for sentence in sentences]
+        samples += [(language, build_document(sentences, SIZES[size], rng)) for size in sizes]
+
+    accuracy = {}
+    wrong = []
+    for expected, text in samples:
+        detected = detect_language(text)
+        right, total = accuracy.get(expected, (0, 0))
+        accuracy[expected] = (right + (detected == expected), total + 1)
+        if detected != expected:
+            wrong.append((expected, detected, text))
+
+    timings = {}
+    for size in ("sentence", *sizes):
+        text = SEED[:80] if size == "sentence" else build_document(CLEAN_SENTENCES, SIZES[size], rng)
+        start = time.perf_counter_ns()
+        for _ in range(repeats):
+            detect_language(text)
+        timings[size] = (len(text), (time.perf_counter_ns() - start) / repeats / 1e3)
+    return accuracy, wrong, timings
+
+
+def run_workload(grammar, texts, gate):
+    """(seconds, per-language Counter of texts changed)."""
+    changed = Counter()
+    start = time.perf_counter()
+    for language, text in texts:
+        # The gate's cost includes detection, as at the request boundary
+        corrected = grammar.correct(text, language=detect_language(text) if gate else ENGLISH)
+        if corrected != text:
+            changed[language] += 1
+    return time.perf_counter() - start, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Language gate benchmark (mixed-language workload)")
+    parser.add_argument("--texts", type=int, default=300, help="texts in the mixed workload")
+    parser.add_argument("--english-share", type=float, default=0.6)
+    parser.add_argument("--sizes", default="tweet,paragraph", help=f"comma separated: {', '.join(SIZES)}")
+    parser.add_argument("--repeats", type=int, default=2000, help="detect_language() calls per timing")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    for size in sizes:
+        if size not in SIZES:
+            sys.exit(f"unknown size '{size}' (use {', '.join(SIZES)})")
+
+    print("\n=== LANGUAGE GATE ===\n")
+    accuracy, wrong, timings = check_detection(args.seed, sizes, args.repeats)
+
+    print("DETECTION")
+    for language, (right, total) in sorted(accuracy.items()):
+        print(f"  {language:4} {right:4}/{total:<4} {100 * right / total:6.1f}%")
+    for expected, detected, text in wrong[:10]:
+        print(f"  {expected} -> {detected}: {text[:80]!r}")
+    for size, (chars, us) in timings.items():
+        print(f"  {size:10} {chars:6} chars  {us:8.1f} µs/call")
+
+    grammar = GrammarCorrector()
+    texts = workload(args.texts, args.english_share, sizes, args.seed)
+    languages = Counter(language for language, _ in texts)
+    print(f"\nWORKLOAD: {len(texts)} texts, " + ", ".join(f"{l} {n}" for l, n in sorted(languages.items())))
+
+    for text in texts[:20]:  # warm-up
+        grammar.correct(text[1])
+    gated_s, gated_changed = run_workload(grammar, texts, gate=True)
+    plain_s, plain_changed = run_workload(grammar, texts, gate=False)
+
+    non_english = len(texts) - languages[ENGLISH]
+    print(f"{'':14}{'ms/text':>10}{'total s':>10}{'en changed':>12}{'other changed':>15}")
+    for name, seconds, changed in (("english rules", plain_s, plain_changed), ("language gate", gated_s, gated_changed)):
+        other = sum(n for language, n in changed.items() if language != ENGLISH)
+        print(f"{name:14}{1000 * seconds / len(texts):10.3f}{seconds:10.3f}"
+              f"{changed[ENGLISH]:12}{other:9}/{non_english}")
+    print(f"speedup: {plain_s / gated_s:.2f}x")
+
+    english_misses = [w for w in wrong if w[0] == ENGLISH]
+    print("\nFAIL: English text classified as another language" if english_misses else "\nOK")
+    sys.exit(1 if english_misses else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+load_generator.py
+=================
+Open-loop HTTP load generator with HDR-style latency histograms.
+
+production_benchmark.py sends requests one after another (or in a small
+burst) and waits for each answer before sending the next. When the
+server stalls, the benchmark stalls with it and simply does not send
+the requests that real users would have sent meanwhile - coordinated
+omission - so the measured latency looks far better than it is.
+
+This tool works the other way around:
+
+- Requests are *scheduled* at a fixed arrival rate (or Poisson arrivals
+  with --poisson), independently of how fast answers come back.
+- A pool of worker threads with keep-alive connections (http.client)
+  sends them. If every connection is busy, requests wait in the
+  generator, exactly like users waiting on a slow server.
+- Latency is measured from the *scheduled* send time ("response time",
+  corrected for coordinated omission) and, for comparison, from the
+  actual send time ("service time", what a closed-loop tool reports).
+- Both go into log-linear histograms with <1% relative error
+  (HdrHistogram layout: exact below 256 us, then 128 sub-buckets per
+  power of two).
+- Only 2xx answers are latencies and count as completed; any other
+  status (400, 429, a shed 503, ...) or a connection failure is an
+  error. A 401/403 aborts the step: the server wants an API key
+  (--api-key), and timing the rejection path says nothing.
+
+Endpoint and text-length mixes are drawn from weighted tables (below),
+or texts come from a corpus file (JSON lines with a "text" field).
+
+A sweep runs one step per rate, lowest first, and reports the highest
+rate below the first failing step that meets the target p99 with <1%
+errors and >=95% of the offered rate actually completed. A rate that
+passes again after a failure is noise, not headroom.
+
+Usage (server running, from backend/):
+    python -m app.tests.load_generator --rates 10,20,50,100 --duration 20 --target-p99-ms 200
+    python -m app.tests.load_generator --rates 50 --poisson --api-key premium_key_456
+"""
+
+import argparse
+import http.client
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+# (endpoint, weight)
+ENDPOINT_MIX = [
+    ("/correct", 70),
+    ("/correct/grammar", 10),
+    ("/correct/spelling", 10),
+    ("/correct/batch", 10),
+]
+
+# (name, min chars, max chars, weight) - roughly what customers send
+LENGTH_MIX = [
+    ("tweet", 20, 280, 50),
+    ("paragraph", 280, 2000, 35),
+    ("document", 2000, 10000, 12),
+    ("long", 10000, 50000, 3),
+]
+
+BATCH_SIZE = (2, 20)
+
+SENTENCES = [
+    "i dont think this is corect",
+    "she dont know where he goed yesterday",
+    "this are bad sentence but we can fix it",
+    "your going to love this new feature",
+    "their happy about the news from the office",
+    "me and him was at the store and we buyed a apple",
+    "i think i should tell you that i have been thinking about this for a while",
+    "the meeting is at 10:30 so please send the report to info@example.com",
+    "well... i guess its fine, isnt it?",
+    "we was planning to go there but it rained alot",
+]
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of integer microsecond values: exact below 256,
+    then 128 linear sub-buckets per power of two (<0.8% relative error).
+    """
+
+    SUB_BUCKET_BITS = 8
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    HALF = SUB_BUCKETS >> 1
+    MAX_SHIFT = 40
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS + self.MAX_SHIFT * self.HALF)
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value):
+        if value < self.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        return self.SUB_BUCKETS + (shift - 1) * self.HALF + ((value >> shift) - self.HALF)
+
+    def _value(self, index):
+        """Highest value that maps to `index`."""
+        if index < self.SUB_BUCKETS:
+            return index
+        shift = (index - self.SUB_BUCKETS) // self.HALF + 1
+        sub = (index - self.SUB_BUCKETS) % self.HALF + self.HALF
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_us, count=1):
+        value_us = max(0, int(value_us))
+        self.counts[self._index(value_us)] += count
+        self.total += count
+        if value_us > self.max:
+            self.max = value_us
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        rank = max(1, int(self.total * p / 100 + 0.5))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._value(i), self.max)
+        return self.max
+
+    def summary_ms(self):
+        return {
+            "count": self.total,
+            "p50_ms": round(self.percentile(50) / 1000, 3),
+            "p90_ms": round(self.percentile(90) / 1000, 3),
+            "p99_ms": round(self.percentile(99) / 1000, 3),
+            "p999_ms": round(self.percentile(99.9) / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+
+
+class RequestMix:
+
+    def __init__(self, corpus=None, seed=1):
+        self.random = random.Random(seed)
+        self.corpus = corpus
+
+    def _text(self):
+        if self.corpus:
+            return self.random.choice(self.corpus)
+        _, low, high, _ = self.random.choices(LENGTH_MIX, weights=[m[3] for m in LENGTH_MIX])[0]
+        target = self.random.randint(low, high)
+        parts = []
+        size = 0
+        while size < target:
+            sentence = self.random.choice(SENTENCES)
+            parts.append(sentence)
+            size += len(sentence) + 2
+        return (". ".join(parts) + ".")[:target]
+
+    def next(self):
+        """(endpoint, JSON body bytes)"""
+        endpoint = self.random.choices(ENDPOINT_MIX, weights=[m[1] for m in ENDPOINT_MIX])[0][0]
+        if endpoint == "/correct/batch":
+            texts = [self._text()[:2000] for _ in range(self.random.randint(*BATCH_SIZE))]
+            body = {"texts": texts}
+        else:
+            body = {"text": self._text()}
+        return endpoint, json.dumps(body).encode("utf-8")
+
+
+class AuthRejected(Exception):
+    """The server answered 401/403: the run needs a (valid) --api-key."""
+
+
+class Worker(threading.Thread):
+    """Owns one keep-alive connection and sends whatever is queued."""
+
+    def __init__(self, host, port, headers, jobs, timeout, abort):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.headers = headers
+        self.jobs = jobs
+        self.timeout = timeout
+        # Set by any worker on 401/403; the rest drop their queued jobs
+        self.abort = abort
+        self.rejected = None
+        self.response = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+        self.conn = None
+
+    def _send(self, endpoint, body):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self.conn.request("POST", endpoint, body=body, headers=self.headers)
+        response = self.conn.getresponse()
+        response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            self.conn.close()
+            self.conn = None
+        return response.status
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if self.abort.is_set():
+                continue
+            scheduled, endpoint, body = job
+            sent = time.perf_counter()
+            try:
+                status = self._send(endpoint, body)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                if self.conn is not None:
+                    self.conn.close()
+                self.conn = None
+                continue
+            done = time.perf_counter()
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status in (401, 403):
+                self.rejected = (status, endpoint)
+                self.abort.set()
+            if not 200 <= status < 300:
+                self.errors += 1
+                continue
+            self.response.record((done - scheduled) * 1e6)
+            self.service.record((done - sent) * 1e6)
+
+
+def run_step(url, rate, duration, connections, mix, poisson=False, api_key=None, timeout=30):
+    """
+    Offer `rate` requests/s for `duration` seconds; return the step report.
+    Raises AuthRejected if the server answers 401/403.
+    """
+    parsed = urlparse(url)
+    headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+    if api_key:
+        headers["X-API-Key"] = api_key
+
+    jobs = queue.SimpleQueue()
+    abort = threading.Event()
+    workers = [Worker(parsed.hostname, parsed.port or 80, headers, jobs, timeout, abort)
+               for _ in range(connections)]
+    for worker in workers:
+        worker.start()
+
+    # Pre-build requests so generating text does not delay the schedule
+    planned = []
+    offset = 0.0
+    while offset < duration:
+        planned.append((offset, *mix.next()))
+        offset += mix.random.expovariate(rate) if poisson else 1.0 / rate
+
+    start = time.perf_counter() + 0.05
+    behind_max = 0.0
+    for offset, endpoint, body in planned:
+        if abort.is_set():
+            break
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            behind_max = max(behind_max, -delay)
+        jobs.put((scheduled, endpoint, body))
+
+    for _ in workers:
+        jobs.put(None)
+    for worker in workers:
+        worker.join(timeout + duration)
+    elapsed = time.perf_counter() - start
+
+    rejected = next((worker.rejected for worker in workers if worker.rejected), None)
+    if rejected:
+        for worker in workers:
+            if worker.conn is not None:
+                worker.conn.close()
+        status, endpoint = rejected
+        raise AuthRejected(f"HTTP {status} from {url}{endpoint}: the server requires a valid API key "
+                           f"(pass --api-key); not measuring the rejection path")
+
+    response = LatencyHistogram()
+    service = LatencyHistogram()
+    statuses = {}
+    errors = 0
+    for worker in workers:
+        response.merge(worker.response)
+        service.merge(worker.service)
+        errors += worker.errors
+        for status, count in worker.statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+        if worker.conn is not None:
+            worker.conn.close()
+
+    completed = response.total
+    return {
+        "offered_rps": rate,
+        "sent": len(planned),
+        "completed": completed,
+        "achieved_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(planned), 4) if planned else 0.0,
+        "statuses": statuses,
+        "generator_behind_ms": round(behind_max * 1000, 3),
+        "response_time": response.summary_ms(),
+        "service_time": service.summary_ms(),
+    }
+
+
+def sustainable(step, target_p99_ms):
+    return (step["response_time"]["p99_ms"] <= target_p99_ms
+            and step["error_rate"] < 0.01
+            and step["achieved_rps"] >= 0.95 * step["offered_rps"])
+
+
+def load_corpus(path):
+    texts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                texts.append(json.loads(line)["text"])
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop HTTP load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--rates", default="10,20,50,100", help="comma separated requests/s to sweep")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per rate step")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--target-p99-ms", type=float, default=500)
+    parser.add_argument("--poisson", action="store_true", help="Poisson instead of uniform arrivals")
+    parser.add_argument("--api-key")
+    parser.add_argument("--corpus", help="JSON lines file with a 'text' field per line")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else None
+    rates = sorted(float(r) for r in args.rates.split(",") if r)
+
+    print("\n=== OPEN-LOOP LOAD TEST ===\n")
+    print(f"{args.url}, {args.connections} connections, {args.duration:.0f}s per step, "
+          f"target p99 {args.target_p99_ms:.0f}ms\n")
+
+    steps = []
+    best = None
+    failed = False
+    for rate in rates:
+        try:
+            step = run_step(args.url, rate, args.duration, args.connections, RequestMix(corpus, args.seed),
+                            poisson=args.poisson, api_key=args.api_key)
+        except AuthRejected as e:
+            print(f"ABORTED at {rate:.1f} rps: {e}")
+            return 2
+        steps.append(step)
+        ok = sustainable(step, args.target_p99_ms)
+        if not ok:
+            failed = True
+        elif not failed:
+            best = step
+
+        rt, st = step["response_time"], step["service_time"]
+        status = "OK  " if ok else "FAIL"
+        print(f"{status} {rate:>8.1f} rps -> {step['achieved_rps']:>8.1f} rps  "
+              f"p50 {rt['p50_ms']:>8.1f}  p99 {rt['p99_ms']:>8.1f}  p99.9 {rt['p999_ms']:>8.1f}  "
+              f"max {rt['max_ms']:>8.1f} ms  (service p99 {st['p99_ms']:.1f} ms)  "
+              f"errors {step['error_rate']:.2%}")
+        if step["generator_behind_ms"] > 10:
+            print(f"     generator fell behind by up to {step['generator_behind_ms']:.0f}ms - "
+                  f"results at this rate are a lower bound")
+
+    print()
+    if best:
+        print(f"Max sustainable throughput at p99 <= {args.target_p99_ms:.0f}ms: {best['offered_rps']:.1f} rps")
+    else:
+        print(f"No tested rate met p99 <= {args.target_p99_ms:.0f}ms")
+
+    filename = f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(filename, "w") as f:
+        json.dump({
+            "url": args.url,
+            "connections": args.connections,
+            "duration_s": args.duration,
+            "target_p99_ms": args.target_p99_ms,
+            "poisson": args.poisson,
+            "max_sustainable_rps": best["offered_rps"] if best else None,
+            "steps": steps,
+        }, f, indent=2)
+    print(f"Results saved to {filename}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+logging_benchmark.py
+====================
+Request latency with synchronous vs queue-based logging.
+
+Runs the Flask app in-process (test client, no network) with a mix of
+valid and invalid requests, so the validation-warning path that floods
+the log under bad traffic is exercised, and compares p50/p99 latency
+for LOG_MODE=sync and LOG_MODE=queue.
+
+Usage (from backend/):
+    python -m app.tests.logging_benchmark [--requests 2000] [--format text|json]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from app.main import app
+from app.simple_error_handler import setup_simple_logging
+
+VALID = {"text": "i dont know where he goed"}
+INVALID = {"txt": "missing text field"}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_mode(mode, fmt, total, invalid_every):
+    with tempfile.TemporaryDirectory() as log_dir:
+        setup_simple_logging(mode=mode, fmt=fmt, log_dir=log_dir, console=False)
+        client = app.test_client()
+
+        # Warmup
+        for _ in range(50):
+            client.post("/correct", json=VALID)
+
+        times = []
+        for i in range(total):
+            payload = INVALID if i % invalid_every == 0 else VALID
+            start = time.perf_counter()
+            client.post("/correct", json=payload)
+            times.append((time.perf_counter() - start) * 1000)
+
+        # Stop the listener before the temp dir goes away
+        setup_simple_logging(mode="sync", fmt=fmt, log_dir=log_dir, console=False)
+
+    return {
+        "mode": mode,
+        "requests": total,
+        "p50_ms": round(percentile(times, 50), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "mean_ms": round(statistics.mean(times), 3),
+        "max_ms": round(max(times), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--invalid-every", type=int, default=4,
+                        help="every N-th request is invalid (logs a warning)")
+    args = parser.parse_args()
+
+    print("\n=== LOGGING BENCHMARK ===\n")
+
+    results = []
+    for mode in ("sync", "queue"):
+        result = run_mode(mode, args.format, args.requests, args.invalid_every)
+        results.append(result)
+        print(f"{mode:>5}: p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+              f"mean {result['mean_ms']:.3f}ms  max {result['max_ms']:.3f}ms")
+
+    sync, queued = results
+    if sync["p99_ms"]:
+        print(f"\np99 change (queue vs sync): {(queued['p99_ms'] / sync['p99_ms'] - 1) * 100:+.1f}%")
+
+    filename = f"logging_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(filename, "w") as f:
+        json.dump({"format": args.format, "results": results}, f, indent=2)
+    print(f"Results saved to {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+memory_benchmark.py
+===================
+In-process memory benchmark for the correctors (tracemalloc).
+
+staro/memory_monitor.py samples the RSS of its own process, which says
+nothing about the service. This measures, inside one interpreter:
+
+1. Steady-state footprint: bytes still allocated after importing the
+   corrector modules and building GrammarCorrector + SpellingCorrector,
+   with the share that belongs to compiled regex patterns (allocations
+   made by the re compiler, or by the pattern cache rebuilding them).
+2. Per correct() call, for several input sizes (after a warmup call):
+   - peak:     high-water mark above the pre-call heap (working set)
+   - stages:   sum of every core stage's own peak - a lower bound for
+               the total bytes allocated during the call (tracemalloc
+               cannot count freed allocations cumulatively)
+   - retained: bytes still allocated after the call (should be ~0)
+   and peak bytes per input character.
+
+The run fails (exit code 1) when peak bytes per input char exceeds
+--budget for any size of at least --budget-min-chars characters (tiny
+inputs are dominated by fixed per-call overhead).
+
+Usage (from backend/):
+    python -m app.tests.memory_benchmark [--budget 64] [--sizes 100,1000,10000,50000]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from datetime import datetime
+
+SEED = (
+    "i dont know where he goed yesterday... their happy about the news and your "
+    "going to love this. me and him was at the store , we buyed a apple and "
+    "alot of stuff.she dont like it!! check https://example.com/page or mail "
+    "info@example.com about THE NEW PLAN. this are bad sentence , isnt it? "
+)
+
+# pattern_cache.py: warm-cache patterns are built by its _sre.compile call
+RE_FILES = ("re/_compiler.py", "re/_parser.py", "re/__init__.py", "sre_compile.py", "sre_parse.py",
+            "correctors/pattern_cache.py")
+
+
+def make_input(size):
+    return (SEED * (size // len(SEED) + 1))[:size]
+
+
+def fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+def footprint():
+    """Load the correctors under tracemalloc; return (correctors, report)."""
+    gc.collect()
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot()
+
+    from app.correctors.grammar_corrector import GrammarCorrector
+    from app.correctors.spelling_corrector import SpellingCorrector
+    grammar = GrammarCorrector()
+    spelling = SpellingCorrector()
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    diff = after.compare_to(before, "filename")
+    total = sum(stat.size_diff for stat in diff)
+    patterns = sum(stat.size_diff for stat in diff
+                   if stat.traceback[0].filename.replace("\\", "/").endswith(RE_FILES))
+    return (grammar, spelling), {"total_bytes": total, "compiled_patterns_bytes": patterns}
+
+
+def measure_call(fn, text):
+    """(peak, retained) bytes above the heap level at call time."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    result = fn(text)
+    current, peak = tracemalloc.get_traced_memory()
+    del result
+    gc.collect()
+    end, _ = tracemalloc.get_traced_memory()
+    return peak - start, max(end - start, 0)
+
+
+def stage_peaks(corrector, text):
+    """[(stage, peak bytes)] for every core stage, fed like the real pipeline."""
+    peaks = []
+    for name, label, stage in corrector.stages:
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        text = stage(text)
+        if isinstance(label, tuple):  # fused stage: (text, labels)
+            text = text[0]
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append((name, peak - start))
+    return peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corrector memory benchmark (tracemalloc)")
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--budget", type=float, default=64.0, help="max peak bytes per input char")
+    parser.add_argument("--budget-min-chars", type=int, default=1000)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    print("\n=== MEMORY BENCHMARK ===\n")
+    (grammar, spelling), loaded = footprint()
+    print(f"Loaded correctors:   {fmt_bytes(loaded['total_bytes'])}")
+    print(f"  compiled patterns: {fmt_bytes(loaded['compiled_patterns_bytes'])}\n")
+
+    results = []
+    over_budget = []
+    print(f"{'corrector':<18} {'chars':>7} {'peak':>10} {'peak/char':>10} {'stages':>10} {'retained':>10}")
+    for name, corrector in (("GrammarCorrector", grammar), ("SpellingCorrector", spelling)):
+        for size in sizes:
+            text = make_input(size)
+            corrector.correct(text)  # warmup: fills regex/format caches
+
+            peak, retained = measure_call(corrector.correct, text)
+            stages = stage_peaks(corrector, text)
+            stage_total = sum(p for _, p in stages)
+            per_char = peak / size
+
+            results.append({
+                "corrector": name,
+                "chars": size,
+                "peak_bytes": peak,
+                "peak_bytes_per_char": round(per_char, 2),
+                "stage_peaks_bytes": dict(stages),
+                "stage_peaks_sum_bytes": stage_total,
+                "retained_bytes": retained,
+            })
+            flag = ""
+            if size >= args.budget_min_chars and per_char > args.budget:
+                over_budget.append(f"{name} [{size} chars]: {per_char:.1f} B/char")
+                flag = "  OVER BUDGET"
+            print(f"{name:<18} {size:>7} {fmt_bytes(peak):>10} {per_char:>9.1f}B "
+                  f"{fmt_bytes(stage_total):>10} {fmt_bytes(retained):>10}{flag}")
+
+    largest = max(sizes)
+    heaviest = sorted(
+        next(r for r in results if r["corrector"] == "GrammarCorrector" and r["chars"] == largest)
+        ["stage_peaks_bytes"].items(), key=lambda kv: kv[1], reverse=True)[:5]
+    print(f"\nHeaviest GrammarCorrector stages at {largest} chars: " +
+          ", ".join(f"{stage}={fmt_bytes(b)}" for stage, b in heaviest))
+
+    tracemalloc.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(timespec="seconds"),
+                       "budget_bytes_per_char": args.budget,
+                       "loaded": loaded, "results": results}, f, indent=2)
+
+    if over_budget:
+        print(f"\nFAIL: peak memory above {args.budget:.0f} bytes/char:")
+        for item in over_budget:
+            print(f"  - {item}")
+        return 1
+
+    print(f"\nOK: all inputs >= {args.budget_min_chars} chars within {args.budget:.0f} bytes/char")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+micro_benchmark.py
+==================
+In-process micro-benchmarks for every corrector stage.
+
+performance_benchmark.py and production_benchmark.py time HTTP round
+trips, where network and Flask noise hide the engine's own cost. This
+suite calls the stages directly:
+
+- TextNormalizer.*, TextPreservation.*, SentenceCapitalizer.smart_capitalize,
+  PunctuationHandler.add_proper_spacing
+- every GrammarCorrector core stage (the correct_* methods and the
+  pattern-table stages), SpellingCorrector.correct_spelling,
+  ContextualCorrector.correct
+- the full GrammarCorrector/SpellingCorrector.correct as reference, and
+  GrammarCorrector.correct at the MINIMAL and AGGRESSIVE levels
+- the rule-table callbacks at high match density (text made only of rule
+  keys): callbacks.<table>[compute] works every replacement out per match,
+  callbacks.<table>[lookup] uses the precomputed casing-aware table
+  (correctors/replacements.py); the match rates are printed at the end
+
+on controlled inputs of several sizes. Every case is warmed up, then
+timed in `--repeats` batches with the GC disabled (each batch loops long
+enough to be well above timer resolution, batches run round-robin across
+all cases); the report shows the mean
+per call with a 95% confidence interval, and the change of the median
+against the baseline.
+
+With a stored baseline (app/tests/baselines/micro_benchmark.json), a
+case fails when its median is more than `--threshold` slower than the
+baseline AND the confidence intervals do not overlap; the exit code is
+then 1. Baselines are machine specific - regenerate with --save-baseline
+on the machine that runs the comparison.
+
+Usage (from backend/):
+    python -m app.tests.micro_benchmark [--filter grammar.] [--sizes small,medium]
+    python -m app.tests.micro_benchmark --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+from app.correctors.base_corrector import (
+    TextNormalizer, TextPreservation, SentenceCapitalizer, PunctuationHandler
+)
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.spelling_corrector import SpellingCorrector
+from app.correctors.contextual_corrector import ContextualCorrector
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "micro_benchmark.json")
+
+# A paragraph that touches every stage: spelling, contractions, pronouns,
+# verb agreement, articles, word order, ellipses, URLs/emails, odd case.
+SEED = (
+    "i dont know where he goed yesterday... their happy about the news and your "
+    "going to love this. me and him was at the store , we buyed a apple and "
+    "alot of stuff.she dont like it!! check https://example.com/page or mail "
+    "info@example.com about THE NEW PLAN. this are bad sentence , isnt it? "
+)
+
+SIZES = {
+    "small": 40,
+    "medium": 1000,
+    "large": 10000,
+}
+
+# t-distribution critical values (two-sided 95%) by degrees of freedom
+_T95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26,
+        10: 2.23, 12: 2.18, 15: 2.13, 20: 2.09, 25: 2.06, 30: 2.04}
+
+
+def t95(df):
+    for limit in sorted(_T95):
+        if df <= limit:
+            return _T95[limit]
+    return 1.96
+
+
+def make_input(size):
+    text = (SEED * (size // len(SEED) + 1))[:size]
+    return text.rsplit(" ", 1)[0] if size > len(SEED) else text
+
+
+# (case name, size) -> matches per call, for the callbacks.* cases
+DENSE_MATCHES = {}
+
+
+def dense_input(pattern, replacements, size):
+    """Rule keys only, cycling lowercase/Capitalized/UPPER, about `size` characters."""
+    keys = sorted({key.lower() for key in replacements.exact})
+    casings = (str.lower, lambda k: k[:1].upper() + k[1:], str.upper)
+    words = []
+    length = 0
+    i = 0
+    while length < size:
+        word = casings[i % 3](keys[i % len(keys)])
+        words.append(word)
+        length += len(word) + 2
+        i += 1
+    text = ", ".join(words)[:size]
+    return text, len(pattern.findall(text))
+
+
+def callback_cases(grammar, spelling):
+    tables = [("spelling", spelling.combined_spelling_pattern, spelling.spelling_replacements)]
+    tables += [(name, pattern, grammar.replacements[name]) for name, pattern in (
+        ("contractions", grammar.contractions_pattern),
+        ("pronouns", grammar.pronoun_pattern),
+        ("verb_agreement", grammar.combined_verb_pattern),
+        ("irregular_verbs", grammar.combined_irregular_pattern),
+        ("compound_subject", grammar.compound_subject_pattern),
+        ("word_order", grammar.combined_word_order_pattern),
+        ("prepositions", grammar.combined_preposition_pattern),
+    )]
+
+    def dense(name, pattern, replacements, callback):
+        def setup(text):
+            dense_text, matches = dense_input(pattern, replacements, len(text))
+            DENSE_MATCHES[(name, len(text))] = matches
+            return lambda: pattern.sub(callback, dense_text)
+        return setup
+
+    cases = []
+    for table, pattern, replacements in tables:
+        compute = (lambda replace: lambda m: replace(m.group()))(replacements.replace)
+        cases += [
+            (f"callbacks.{table}[compute]", dense(f"callbacks.{table}[compute]", pattern, replacements, compute)),
+            (f"callbacks.{table}[lookup]", dense(f"callbacks.{table}[lookup]", pattern, replacements,
+                                                 replacements.callback)),
+        ]
+    return cases
+
+
+def print_match_rates(results, inputs):
+    rows = []
+    for name in results:
+        if name.startswith("callbacks.") and name.endswith("[lookup]"):
+            table = name[len("callbacks."):-len("[lookup]")]
+            compute = results.get(f"callbacks.{table}[compute]", {})
+            for size, lookup in results[name].items():
+                if size in compute:
+                    rows.append((table, size, DENSE_MATCHES[(name, len(inputs[size]))],
+                                 compute[size]["median_us"], lookup["median_us"]))
+    if not rows:
+        return
+    print("\n=== CALLBACK MATCH RATE (matches per second, medians) ===\n")
+    print(f"{'table':<20} {'size':<7} {'matches':>8} {'compute':>12} {'lookup':>12} {'speedup':>8}")
+    for table, size, matches, compute_us, lookup_us in rows:
+        print(f"{table:<20} {size:<7} {matches:>8} {matches / compute_us * 1e6:>12,.0f} "
+              f"{matches / lookup_us * 1e6:>12,.0f} {compute_us / lookup_us:>7.2f}x")
+
+
+def build_cases():
+    """[(case name, setup(text) -> zero-arg callable)]"""
+    grammar = GrammarCorrector()
+    spelling = SpellingCorrector()
+    contextual = ContextualCorrector()
+
+    def direct(fn):
+        return lambda text: (lambda: fn(text))
+
+    def restore(text):
+        preserved_text, preserved = TextPreservation.preserve_special_formats(text)
+        return lambda: TextPreservation.restore_special_formats(preserved_text, preserved)
+
+    cases = [
+        ("normalizer.normalize_quotes", direct(TextNormalizer.normalize_quotes)),
+        ("normalizer.normalize_whitespace", direct(TextNormalizer.normalize_whitespace)),
+        ("normalizer.remove_zero_width", direct(TextNormalizer.remove_zero_width)),
+        ("normalizer.fix_all_caps", direct(TextNormalizer.fix_all_caps)),
+        ("normalizer.mild_random_case_fix", direct(TextNormalizer.mild_random_case_fix)),
+        ("preservation.preserve_special_formats", direct(TextPreservation.preserve_special_formats)),
+        ("preservation.restore_special_formats", restore),
+        ("capitalizer.smart_capitalize", direct(SentenceCapitalizer.smart_capitalize)),
+        ("punctuation.add_proper_spacing", direct(PunctuationHandler.add_proper_spacing)),
+        ("contextual.correct", direct(contextual.correct)),
+        ("spelling.correct_spelling", direct(spelling.correct_spelling)),
+    ]
+    cases += [(f"grammar.{name}", direct(stage)) for name, _, stage in grammar.stages]
+    cases += [
+        ("grammar.correct", direct(grammar.correct)),
+        ("grammar.correct[minimal]", direct(lambda t: grammar.correct(t, level="minimal"))),
+        ("grammar.correct[aggressive]", direct(lambda t: grammar.correct(t, level="aggressive"))),
+        ("spelling.correct", direct(spelling.correct)),
+    ]
+    cases += callback_cases(grammar, spelling)
+    return cases
+
+
+def calibrate(call, batch_s=0.02, warmup_s=0.05):
+    """Warm up `call` and return how many loops make one ~batch_s batch."""
+    deadline = time.perf_counter() + warmup_s
+    loops = 0
+    while time.perf_counter() < deadline:
+        call()
+        loops += 1
+    return max(1, int(loops * batch_s / warmup_s))
+
+
+def measure(calls, repeats):
+    """
+    Per-call seconds for every call, `repeats` batches each (GC off,
+    like timeit). Batches run round-robin across all calls, so slow
+    phases of a noisy machine spread over every case instead of skewing
+    one of them, and show up in the confidence intervals.
+    """
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = [calibrate(call) for call in calls]
+        samples = [[] for _ in calls]
+        for _ in range(repeats):
+            for call, n, out in zip(calls, loops, samples):
+                start = time.perf_counter()
+                for _ in range(n):
+                    call()
+                out.append((time.perf_counter() - start) / n)
+        return samples
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def summarize(samples):
+    mean = statistics.mean(samples)
+    sd = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    half = t95(len(samples) - 1) * sd / math.sqrt(len(samples))
+    return {
+        "mean_us": round(mean * 1e6, 3),
+        "ci95_us": round(half * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+    }
+
+
+def compare(result, base, threshold, min_delta_us=1.0):
+    """
+    'regression', 'improvement' or 'ok' against one baseline entry.
+    Medians are compared (robust to the odd preempted batch), and the
+    change must also be outside both confidence intervals and larger
+    than min_delta_us (sub-microsecond cases are mostly call overhead).
+    """
+    if abs(result["median_us"] - base["median_us"]) < min_delta_us:
+        return "ok"
+    if result["median_us"] > base["median_us"] * (1 + threshold) and \
+            result["mean_us"] - result["ci95_us"] > base["mean_us"] + base["ci95_us"]:
+        return "regression"
+    if result["median_us"] < base["median_us"] * (1 - threshold) and \
+            result["mean_us"] + result["ci95_us"] < base["mean_us"] - base["ci95_us"]:
+        return "improvement"
+    return "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process corrector stage micro-benchmarks")
+    parser.add_argument("--filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma separated: " + ",".join(SIZES))
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-us", type=float, default=1.0, help="ignore smaller absolute changes")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size '{size}'")
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print("\n=== MICRO BENCHMARK ===\n")
+    inputs = {size: make_input(SIZES[size]) for size in sizes}
+    results = {}
+    regressions = []
+
+    cases = [(name, size, setup(inputs[size]))
+             for name, setup in build_cases() if args.filter in name
+             for size in sizes]
+    samples = measure([call for _, _, call in cases], args.repeats)
+
+    for (name, size, _), case_samples in zip(cases, samples):
+        result = summarize(case_samples)
+        results.setdefault(name, {})[size] = result
+
+        base = baseline.get(name, {}).get(size)
+        verdict = compare(result, base, args.threshold, args.min_delta_us) if base else "new"
+        if verdict == "regression":
+            regressions.append(f"{name} [{size}]")
+        delta = f"{(result['median_us'] / base['median_us'] - 1) * 100:+6.1f}%" if base else "      "
+        print(f"{name:<42} {size:<7} {result['mean_us']:>11.2f}us ±{result['ci95_us']:<9.2f} "
+              f"{delta} {verdict}")
+
+    print_match_rates(results, inputs)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeats": args.repeats,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for item in regressions:
+            print(f"  - {item}")
+        return 1
+
+    print("\nOK" + ("" if baseline else " (no baseline to compare against)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
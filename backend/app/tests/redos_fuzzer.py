@@ -0,0 +1,316 @@
+"""
+redos_fuzzer.py
+===============
+Worst-case input fuzzer for every regex the correctors use.
+
+Takes every pattern from the pattern registry (correctors/patterns.py)
+- the named ones, and the shared ones built from the rule tables while
+the correctors it builds hold them. test_pattern_registry.py makes sure
+the correctors compile nothing outside the registry, so this is the
+full set. Then for each one:
+
+1. builds adversarial motifs from the pattern itself - runs of its
+   literal characters and character-class representatives, pairs of
+   them, and repeated literal prefixes such as "<script" - each with
+   and without a non-matching tail;
+2. times pattern.findall (which, like sub/finditer, scans every start
+   position) on growing repetitions of every motif;
+3. fits log(time) against log(length); the slope is the growth
+   exponent (1 = linear, 2 = quadratic). Patterns whose worst motif
+   grows with an exponent above --max-exponent are flagged.
+
+Stored results (app/tests/baselines/redos.json) keep every pattern's
+worst motif and its time at a fixed input length. `--check` re-times
+only those inputs and fails when a pattern got slower than
+--slowdown x its stored time or exceeds --budget-ms, so the check runs
+in a fixed, short time budget. It also fails when a stored pattern is
+gone or a pattern has no stored result - both mean the baseline no
+longer covers the code; re-run with --save-baseline.
+
+Pattern ids are stable across edits: the registry name for named
+patterns, "shared." plus a hash of (pattern, flags) for patterns built
+from rule tables (a changed table is a new pattern).
+
+Usage (from backend/):
+    python -m app.tests.redos_fuzzer                 # full fuzz, report
+    python -m app.tests.redos_fuzzer --save-baseline # full fuzz, store results
+    python -m app.tests.redos_fuzzer --check         # quick regression check
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.patterns import PATTERNS
+from app.correctors.spelling_corrector import SpellingCorrector
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "redos.json")
+
+CHECK_LENGTH = 20000
+LENGTHS = (1000, 2000, 4000, 8000)
+PROBE_LENGTHS = (500, 4000)
+MAX_CHARSET = 16
+UNIVERSAL_CHARS = "a0 .@-'<"
+TAILS = ("", "!", "☃")
+
+
+# ---------------- pattern collection ----------------
+
+def pattern_hash(pattern, flags):
+    """Short stable id for a (pattern, flags) pair."""
+    return hashlib.sha256(f"{int(flags)}:{pattern}".encode("utf-8")).hexdigest()[:12]
+
+
+def collect_patterns():
+    """{pattern id: compiled pattern} for the registry, de-duplicated by (pattern, flags)."""
+    # Building the correctors registers (and, while they live, holds) the
+    # shared patterns; the returned dict keeps them alive after that
+    correctors = [GrammarCorrector(), SpellingCorrector()]  # noqa: F841
+
+    found = {}
+    seen = set()
+    for name in PATTERNS.names():
+        pattern = PATTERNS[name]
+        seen.add((pattern.pattern, pattern.flags))
+        found[name] = pattern
+    for pattern in sorted(PATTERNS.shared_patterns(), key=lambda p: (p.pattern, p.flags)):
+        key = (pattern.pattern, pattern.flags)
+        if key not in seen:
+            seen.add(key)
+            found[f"shared.{pattern_hash(*key)}"] = pattern
+    return found
+
+
+# ---------------- adversarial inputs ----------------
+
+_CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: "0",
+    sre_constants.CATEGORY_NOT_DIGIT: "a",
+    sre_constants.CATEGORY_SPACE: " ",
+    sre_constants.CATEGORY_NOT_SPACE: "a",
+    sre_constants.CATEGORY_WORD: "a",
+    sre_constants.CATEGORY_NOT_WORD: " ",
+}
+
+
+def _walk(parsed, chars, literals):
+    """Collect characters and literal runs that the pattern can match."""
+    run = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            chars.append(chr(av))
+            run.append(chr(av))
+            continue
+        if len(run) > 1:
+            literals.append("".join(run))
+        run = []
+
+        if op is sre_constants.IN:
+            for item_op, item in av:
+                if item_op is sre_constants.LITERAL:
+                    chars.append(chr(item))
+                elif item_op is sre_constants.RANGE:
+                    chars.extend((chr(item[0]), chr(item[1])))
+                elif item_op is sre_constants.CATEGORY:
+                    chars.append(_CATEGORY_CHARS.get(item, "a"))
+        elif op is sre_constants.ANY:
+            chars.append("x")
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            _walk(av[2], chars, literals)
+        elif op is sre_constants.SUBPATTERN:
+            _walk(av[-1], chars, literals)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1][:20]:
+                _walk(branch, chars, literals)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _walk(av[1], chars, literals)
+    if len(run) > 1:
+        literals.append("".join(run))
+
+
+def motifs(pattern):
+    chars, literals = [], []
+    try:
+        _walk(sre_parse.parse(pattern.pattern, pattern.flags), chars, literals)
+    except Exception:
+        pass
+
+    charset = []
+    for c in chars + list(UNIVERSAL_CHARS):
+        if c not in charset:
+            charset.append(c)
+    charset = charset[:MAX_CHARSET]
+
+    units = set(charset)
+    units.update(a + b for a in charset[:6] for b in charset[:6] if a != b)
+    # A letter against every punctuation/space char: inputs like "a.a.a."
+    # are full of word boundaries, where \b-anchored patterns restart
+    letter = next((c for c in charset if c.isalpha()), "a")
+    for c in charset:
+        if not c.isalnum():
+            units.update((letter + c, c + letter))
+    for literal in sorted(set(literals), key=len, reverse=True)[:5]:
+        units.add(literal)
+        units.add(literal + " ")
+    return sorted(units)
+
+
+def make_input(unit, tail, length):
+    return unit * max(1, (length - len(tail)) // len(unit)) + tail
+
+
+def time_findall(pattern, text, min_time=0.002):
+    """Best-of-3 seconds for pattern.findall(text), looping tiny inputs."""
+    best = None
+    for _ in range(3):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            pattern.findall(text)
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time or loops >= 1000:
+                break
+        per_call = elapsed / loops
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def growth_exponent(pattern, unit, tail, lengths=LENGTHS):
+    xs, ys = [], []
+    for length in lengths:
+        xs.append(math.log(length))
+        ys.append(math.log(max(time_findall(pattern, make_input(unit, tail, length)), 1e-9)))
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den
+
+
+def fuzz_pattern(pattern):
+    """Find the motif with the worst growth; returns the result dict."""
+    short, long_ = PROBE_LENGTHS
+    probes = []
+    for unit in motifs(pattern):
+        for tail in TAILS:
+            t_short = time_findall(pattern, make_input(unit, tail, short))
+            t_long = time_findall(pattern, make_input(unit, tail, long_))
+            ratio_exponent = math.log(max(t_long, 1e-9) / max(t_short, 1e-9)) / math.log(long_ / short)
+            probes.append((ratio_exponent, t_long, unit, tail))
+
+    # Confirm the most suspicious motifs with a proper fit
+    probes.sort(reverse=True)
+    worst = None
+    for _, _, unit, tail in probes[:3]:
+        exponent = growth_exponent(pattern, unit, tail)
+        if worst is None or exponent > worst["exponent"]:
+            worst = {"exponent": round(exponent, 2), "unit": unit, "tail": tail}
+
+    worst["check_length"] = CHECK_LENGTH
+    worst["check_ms"] = round(time_findall(pattern, make_input(worst["unit"], worst["tail"], CHECK_LENGTH)) * 1000, 4)
+    return worst
+
+
+# ---------------- CLI ----------------
+
+def run_fuzz(patterns, args):
+    results = {}
+    flagged = []
+    print(f"Fuzzing {len(patterns)} patterns...\n")
+    for pattern_id, pattern in patterns.items():
+        result = fuzz_pattern(pattern)
+        result["pattern"] = pattern.pattern[:200]
+        result["flags"] = pattern.flags
+        results[pattern_id] = result
+        superlinear = result["exponent"] > args.max_exponent
+        if superlinear:
+            flagged.append(pattern_id)
+        mark = "SUPERLINEAR" if superlinear else "ok"
+        print(f"{pattern_id:<55} n^{result['exponent']:<5} {result['check_ms']:>9.3f}ms @{CHECK_LENGTH}  "
+              f"{mark}  worst: {result['unit']!r}*k+{result['tail']!r}")
+    return results, flagged
+
+
+def run_check(patterns, baseline, args):
+    failures = []
+    print(f"Checking {len(baseline)} stored worst cases at {CHECK_LENGTH} chars...\n")
+    for pattern_id, stored in baseline.items():
+        pattern = patterns.get(pattern_id)
+        if pattern is None:
+            print(f"{pattern_id:<55} GONE (stale baseline)")
+            failures.append(pattern_id)
+            continue
+        text = make_input(stored["unit"], stored["tail"], stored["check_length"])
+        ms = time_findall(pattern, text) * 1000
+        limit = max(stored["check_ms"] * args.slowdown, 0.05)
+        status = "ok"
+        if ms > args.budget_ms:
+            status = f"OVER BUDGET ({args.budget_ms}ms)"
+        elif ms > limit:
+            status = f"REGRESSION (stored {stored['check_ms']}ms)"
+        if status != "ok":
+            failures.append(pattern_id)
+        print(f"{pattern_id:<55} {ms:>9.3f}ms  {status}")
+
+    new = sorted(set(patterns) - set(baseline))
+    for pattern_id in new:
+        print(f"{pattern_id:<55} NEW (not fuzzed)")
+    failures.extend(new)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReDoS / worst-case input fuzzer for corrector regexes")
+    parser.add_argument("--filter", default="", help="only pattern ids containing this")
+    parser.add_argument("--max-exponent", type=float, default=1.5, help="flag growth above n^x")
+    parser.add_argument("--check", action="store_true", help="quick regression check against stored results")
+    parser.add_argument("--slowdown", type=float, default=3.0, help="allowed slowdown in --check")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="hard limit per pattern in --check")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    patterns = {k: v for k, v in collect_patterns().items() if args.filter in k}
+    print("\n=== REDOS FUZZER ===\n")
+
+    if args.check:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {k: v for k, v in json.load(f)["patterns"].items() if args.filter in k}
+        failures = run_check(patterns, baseline, args)
+        if failures:
+            print(f"\nFAIL: {len(failures)} pattern(s) regressed, gone or not fuzzed"
+                  " (re-run with --save-baseline after checking new patterns)")
+            return 1
+        print("\nOK")
+        return 0
+
+    results, flagged = run_fuzz(patterns, args)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "patterns": results}, f, indent=2, sort_keys=True)
+        print(f"\nResults saved to {args.baseline}")
+
+    if flagged:
+        print(f"\nFAIL: {len(flagged)} superlinear pattern(s): {', '.join(flagged)}")
+        return 1
+    print("\nOK: no superlinear patterns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
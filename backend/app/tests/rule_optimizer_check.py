@@ -0,0 +1,157 @@
+"""
+rule_optimizer_check.py
+=======================
+Checks that the rule analyzer (correctors/rule_analyzer.py) changes
+nothing but speed: builds GrammarCorrector with and without rule
+optimization and compares correct_detailed() at every CorrectionLevel
+(corrected text, change labels, per-rule hit counts) on
+
+- error-injected documents from corpus_generator, every size class
+- the micro-benchmark paragraph (micro_benchmark.SEED)
+- rule soup: random runs of every key and value of every rule table, in
+  random case - the text most likely to expose an interaction between
+  stages (e.g. a fused stage writing a later stage's key)
+- JSON-lines corpora given with --corpus (their "text" field)
+
+It also checks that the optimizer leaves the public side alone: the
+rule tables and the per-stage methods (correct_common_phrases, ...)
+keep every rule, dead ones included, and give the same output on the
+same texts - only the pipeline's own passes are pruned.
+
+Prints the plan (dead rules, fused stages, passes over the text saved)
+and exits with 1 on the first differences.
+
+Usage (from backend/):
+    python -m app.tests.rule_optimizer_check [--seed 1] [--soup 2000] [--corpus corpus.jsonl]
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from app.correctors.base_corrector import CorrectionLevel
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.tests.corpus_generator import CLEAN_SENTENCES, SIZES, ErrorInjector, build_document
+from app.tests.micro_benchmark import SEED
+
+
+def generated_corpus(seed):
+    injector = ErrorInjector(seed)
+    rng = random.Random(seed)
+    for size, chars in SIZES.items():
+        for density in (5, 20):
+            text, _ = injector.inject(build_document(CLEAN_SENTENCES, chars, rng), density)
+            yield f"{size}-d{density}", text
+
+
+def rule_soup(grammar, count, seed):
+    """Texts made of rule keys and values (every table, dead rules included)."""
+    rng = random.Random(seed)
+    phrases = []
+    for table in (grammar.rules.tables, grammar.spelling_corrector.rules.tables):
+        for rules in table.values():
+            if isinstance(rules, dict):
+                phrases += [*rules.keys(), *rules.values()]
+            else:
+                phrases += rules
+    phrases += [*grammar.ARTICLE_OVERCORRECTIONS, *grammar.contextual_corrector.WRITES]
+    separators = [" ", " ", " ", ", ", ". ", "\n", "  "]
+
+    for n in range(count):
+        words = []
+        for _ in range(rng.randint(2, 12)):
+            phrase = rng.choice(phrases)
+            style = rng.random()
+            if style < 0.15:
+                phrase = phrase.upper()
+            elif style < 0.35:
+                phrase = phrase.capitalize()
+            words.append(phrase)
+            words.append(rng.choice(separators))
+        yield f"soup-{n}", "".join(words).strip()
+
+
+def file_corpora(paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                if line.strip():
+                    yield f"{path}:{n + 1}", json.loads(line)["text"]
+
+
+# Public per-stage methods; each must keep every rule of its table
+STAGE_METHODS = ("correct_contractions", "prevent_well_correction", "correct_pronouns",
+                 "correct_common_phrases", "correct_articles", "add_missing_articles",
+                 "fix_overcorrection_articles")
+
+TABLES = ("contractions", "irregular_verbs", "verb_agreements", "compound_subject_fixes",
+          "pronoun_corrections", "article_corrections", "word_order_rules", "preposition_rules",
+          "common_phrases")
+
+
+def public_differences(optimized, plain, texts):
+    """(what, text, plain, optimized) for tables and per-stage methods that differ."""
+    differences = [(f"table {name}", "", len(getattr(plain, name)), len(getattr(optimized, name)))
+                   for name in TABLES if getattr(optimized, name) != getattr(plain, name)]
+    for _, text in texts:
+        for method in STAGE_METHODS:
+            expected = getattr(plain, method)(text)
+            actual = getattr(optimized, method)(text)
+            if actual != expected:
+                differences.append((method, text, expected, actual))
+    return differences
+
+
+def outcome(corrector, text, level):
+    result = corrector.correct_detailed(text, level=level)
+    return result.corrected, result.corrections_applied, result.rule_hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule optimizer equivalence check")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--soup", type=int, default=2000, help="rule-soup texts to generate")
+    parser.add_argument("--corpus", action="append", default=[], help="JSON-lines corpus (repeatable)")
+    args = parser.parse_args()
+
+    optimized = GrammarCorrector(optimize_rules=True)
+    plain = GrammarCorrector(optimize_rules=False)
+    plan = optimized.rule_plan.summary()
+
+    print("\n=== RULE OPTIMIZER CHECK ===\n")
+    for stage, keys in plan["dead_rules"].items():
+        print(f"dead rules in {stage}: {', '.join(keys)}")
+    for group in plan["fused_stages"]:
+        print(f"fused: {group}")
+    print(f"passes over the text per correction: {plan['passes_before']} -> {plan['passes_after']}\n")
+
+    texts = [("seed", SEED), *generated_corpus(args.seed),
+             *rule_soup(plain, args.soup, args.seed), *file_corpora(args.corpus)]
+
+    differences = []
+    for name, text in texts:
+        for level in CorrectionLevel:
+            expected = outcome(plain, text, level)
+            actual = outcome(optimized, text, level)
+            if actual != expected:
+                differences.append((name, level.value, text, expected, actual))
+
+    print(f"{len(texts)} texts x {len(CorrectionLevel)} levels, {len(differences)} differences")
+    for name, level, text, expected, actual in differences[:10]:
+        print(f"\n{name} [{level}]: {text[:200]!r}")
+        print(f"  plain:     {expected}")
+        print(f"  optimized: {actual}")
+
+    public = public_differences(optimized, plain, texts)
+    print(f"\npublic tables and {len(STAGE_METHODS)} per-stage methods: {len(public)} differences")
+    for what, text, expected, actual in public[:10]:
+        print(f"\n{what}: {text[:200]!r}")
+        print(f"  plain:     {expected!r}")
+        print(f"  optimized: {actual!r}")
+
+    sys.exit(1 if differences or public else 0)
+
+
+if __name__ == "__main__":
+    main()
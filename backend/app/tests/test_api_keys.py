@@ -0,0 +1,88 @@
+"""
+test_api_keys.py
+================
+Checks API keys and usage metering (auth.py, usage.py) through the real
+/correct* routes, with Flask's test client:
+
+1. Requests without a key are served by default and metered as
+   "anonymous" on the basic plan; with REQUIRE_API_KEY on they get 401.
+2. Requests with an unknown key get 401 and are not metered.
+3. A valid key's requests are metered under sha256(key)[:16] with its
+   plan, request count and characters (batch texts summed).
+4. The plan reaches the scheduler: its completed count for the key's
+   plan goes up.
+
+Usage (from backend/):
+    python -m app.tests.test_api_keys
+"""
+
+import os
+import sys
+import tempfile
+
+# Keep the usage file of this run out of the working tree
+os.environ["USAGE_FILE"] = os.path.join(tempfile.mkdtemp(), "usage.json")
+
+from app import auth  # noqa: E402
+from app.auth import ANONYMOUS_KEY_ID, VALID_API_KEYS, key_digest  # noqa: E402
+from app.main import app  # noqa: E402
+from app.scheduler import scheduler  # noqa: E402
+from app.usage import usage_meter  # noqa: E402
+
+TEXT = "i dont know where he goed"
+BATCH = ["their happy about it", "me and him was there"]
+
+
+def main():
+    print("\n=== API KEYS ===\n")
+    client = app.test_client()
+    key = VALID_API_KEYS["premium"]
+    key_id = key_digest(key)[:16]
+    failures = []
+
+    def check(name, ok):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    for route in ("/correct", "/correct/spelling", "/correct/grammar"):
+        check(f"{route} without a key -> 200", client.post(route, json={"text": TEXT}).status_code == 200)
+    anonymous = usage_meter.snapshot().get(ANONYMOUS_KEY_ID, {})
+    check("no key: metered as anonymous on the basic plan",
+          anonymous.get("plan") == "basic" and anonymous.get("requests") == 3)
+
+    before = usage_meter.snapshot()
+    auth.REQUIRE_API_KEY = True
+    try:
+        for route in ("/correct", "/correct/spelling", "/correct/grammar"):
+            response = client.post(route, json={"text": TEXT})
+            check(f"{route} without a key, REQUIRE_API_KEY=1 -> 401", response.status_code == 401)
+    finally:
+        auth.REQUIRE_API_KEY = False
+    for route in ("/correct", "/correct/spelling", "/correct/grammar"):
+        response = client.post(route, json={"text": TEXT}, headers={"X-API-Key": "not-a-key"})
+        check(f"{route} with an unknown key -> 401", response.status_code == 401)
+    check("rejected requests are not metered", usage_meter.snapshot() == before)
+
+    completed = scheduler.stats()["completed"]["premium"]
+    for route in ("/correct", "/correct/spelling", "/correct/grammar"):
+        response = client.post(route, json={"text": TEXT}, headers={"X-API-Key": key})
+        check(f"{route} with a premium key -> 200", response.status_code == 200)
+    response = client.post("/correct/batch", json={"texts": BATCH}, headers={"X-API-Key": key})
+    check("/correct/batch with a premium key -> 200", response.status_code == 200)
+
+    entry = usage_meter.snapshot().get(key_id, {})
+    print(f"     usage[{key_id}] = {entry}")
+    check("metered under the key's hash and plan", entry.get("plan") == "premium")
+    check("request count", entry.get("requests") == 4)
+    check("characters (batch texts summed)", entry.get("chars") == 3 * len(TEXT) + sum(map(len, BATCH)))
+
+    completed = scheduler.stats()["completed"]["premium"] - completed
+    check(f"scheduled on the premium plan ({completed} corrections)", completed == 3 + len(BATCH))
+
+    print("\nFAIL" if failures else "\nOK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
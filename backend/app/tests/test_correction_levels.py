@@ -0,0 +1,90 @@
+"""
+test_correction_levels.py
+=========================
+Checks that the CorrectionLevel pipelines (BaseCorrector.build_pipeline)
+do different work:
+
+1. MINIMAL runs spelling only: grammar errors stay.
+2. STANDARD leaves the aggressive-only heuristics alone (repeated
+   words, final period).
+3. AGGRESSIVE applies them, and its re-runs pick up the fixes they
+   expose ("me and and him was" -> "He and I were").
+4. Words a writer usually repeats on purpose ("had had") stay.
+5. With a deadline, AGGRESSIVE lists each skipped stage once, and not
+   at all when a later pass ran it.
+
+Usage (from backend/):
+    python -m app.tests.test_correction_levels
+"""
+
+import sys
+
+from app.correctors.base_corrector import CorrectionLevel
+from app.correctors.deadline import Deadline
+from app.correctors.grammar_corrector import GrammarCorrector
+
+# (text, level, expected)
+CASES = [
+    ("i dont know where he goed", CorrectionLevel.MINIMAL, "I dont know where he goed"),
+    ("i went to the the store", CorrectionLevel.STANDARD, "I went to the the store"),
+    ("i went to the the store", CorrectionLevel.AGGRESSIVE, "I went to the store."),
+    ("me and and him was there", CorrectionLevel.STANDARD, "Me and and him was there"),
+    ("me and and him was there", CorrectionLevel.AGGRESSIVE, "He and I were there."),
+    ("he had had enough", CorrectionLevel.AGGRESSIVE, "He had had enough."),
+]
+
+
+class ScriptedDeadline(Deadline):
+    """A deadline that refuses the first `refusals` optional stages, then allows all."""
+
+    def __init__(self, refusals):
+        super().__init__(60_000)
+        self.refusals = refusals
+        self.asked = 0
+
+    def allows(self, cost_ns):
+        self.asked += 1
+        return self.asked > self.refusals
+
+
+def skipped_under_deadline(grammar, refusals):
+    deadline = ScriptedDeadline(refusals)
+    grammar.correct("me and and him was there", deadline=deadline, level=CorrectionLevel.AGGRESSIVE)
+    return deadline.skipped
+
+
+def main():
+    print("\n=== CORRECTION LEVELS ===\n")
+    grammar = GrammarCorrector()
+    failures = 0
+    for text, level, expected in CASES:
+        actual = grammar.correct(text, level=level)
+        ok = actual == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} [{level.value}] {text!r} -> {actual!r}"
+              + ("" if ok else f" (expected {expected!r})"))
+
+    applied = grammar.correct_detailed("i went to the the store", level=CorrectionLevel.AGGRESSIVE)
+    ok = {"repeated word", "final period"} <= set(applied.corrections_applied)
+    failures += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} aggressive change labels: {applied.corrections_applied}")
+
+    # One pass asks once per optional stage; "He was there." needs one pass
+    per_pass = ScriptedDeadline(0)
+    grammar.correct("He was there.", deadline=per_pass, level=CorrectionLevel.AGGRESSIVE)
+    every_pass = skipped_under_deadline(grammar, float("inf"))
+    ok = sorted(every_pass) == sorted(GrammarCorrector.optional_stages)
+    failures += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} skipped in every pass, listed once: {every_pass}")
+
+    first_pass = skipped_under_deadline(grammar, per_pass.asked)
+    ok = first_pass == []
+    failures += not ok
+    print(f"{'ok  ' if ok else 'FAIL'} skipped in pass 1 only, not listed: {first_pass}")
+
+    print("\nFAIL" if failures else "\nOK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
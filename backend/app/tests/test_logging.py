@@ -0,0 +1,63 @@
+"""
+test_logging.py
+===============
+Checks that queued logging (LOG_MODE=queue, the default) keeps the
+exception of a record: with LOG_FORMAT=json the line has a one-line
+"msg" and the traceback in "exc"; in text mode the traceback follows
+the message.
+
+Usage (from backend/):
+    python -m app.tests.test_logging
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from app.simple_error_handler import setup_simple_logging, _stop_listener
+
+
+def log_exception(log_dir, fmt):
+    """Log one exception through the queue listener; returns the log file's lines."""
+    setup_simple_logging(mode="queue", fmt=fmt, log_dir=log_dir, console=False)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("test").error("Correction failed for %s", "req-1", exc_info=True,
+                                        extra={"route": "correct_all"})
+    _stop_listener()  # drains the queue
+    with open(os.path.join(log_dir, "api.log"), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def main():
+    print("\n=== QUEUED LOGGING ===\n")
+    failures = []
+
+    lines = log_exception(tempfile.mkdtemp(), "json")
+    entry = json.loads(lines[-1])
+    print(f"json: {json.dumps(entry)[:200]}")
+    if entry.get("msg") != "Correction failed for req-1":
+        failures.append("json msg is not just the message")
+    if "ZeroDivisionError" not in entry.get("exc", ""):
+        failures.append("json exc missing")
+    if entry.get("route") != "correct_all":
+        failures.append("json extra field missing")
+
+    lines = log_exception(tempfile.mkdtemp(), "text")
+    print(f"text: {lines[-3:]}")
+    if not any("Correction failed for req-1" in line for line in lines):
+        failures.append("text message missing")
+    if "ZeroDivisionError" not in lines[-1]:
+        failures.append("text traceback missing")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("\nFAIL" if failures else "\nOK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
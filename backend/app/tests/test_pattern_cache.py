@@ -0,0 +1,102 @@
+"""
+test_pattern_cache.py
+=====================
+Checks for the on-disk pattern cache (correctors/pattern_cache.py):
+
+1. A second cache on the same file rebuilds patterns from it (hits),
+   and they match like re.compile's.
+2. An entry whose program was altered is rejected - the pattern is
+   compiled from scratch and still matches correctly.
+3. An entry stored under another pattern's key is rejected.
+4. The file is written 0600; a directory writable by group or others
+   is not used at all.
+
+Usage (from backend/):
+    python -m app.tests.test_pattern_cache
+"""
+
+import json
+import os
+import re
+import stat
+import sys
+import tempfile
+
+from app.correctors.pattern_cache import PatternCache
+
+PATTERN = r'\b(goed|runned|eated)\b'
+TEXT = "he goed and runned, then EATED"
+
+
+def fresh(directory):
+    """A cache on `directory` that compiles outside the shared registry."""
+    cache = PatternCache("test", "0" * 64, directory=directory)
+    return cache, lambda pattern: cache._compile(pattern, re.IGNORECASE)
+
+
+def rewrite(path, change):
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    change(entries)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+
+def main():
+    print("\n=== PATTERN CACHE ===\n")
+    failures = []
+    expected = re.compile(PATTERN, re.IGNORECASE).findall(TEXT)
+
+    def check(name, ok):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    directory = os.path.join(tempfile.mkdtemp(), "patterns")
+    cache, compile_ = fresh(directory)
+    compile_(PATTERN)
+    cache.save()
+    check("cache file is 0600", stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600)
+    check("cache directory is 0700", stat.S_IMODE(os.stat(directory).st_mode) == 0o700)
+
+    cache, compile_ = fresh(directory)
+    compiled = compile_(PATTERN)
+    check("warm cache hit", cache.hits == 1 and compiled.findall(TEXT) == expected)
+
+    def alter_program(entries):
+        for entry in entries.values():
+            entry[1][1][-1] = 0  # last opcode of the program
+    rewrite(cache.path, alter_program)
+    cache, compile_ = fresh(directory)
+    compiled = compile_(PATTERN)
+    check("altered program rejected", cache.hits == 0 and cache.rejected == 1
+          and compiled.findall(TEXT) == expected)
+
+    cache, compile_ = fresh(directory)
+    compile_(PATTERN)
+    cache.save()
+    other = r'\b(?:x)\b'
+    cache, compile_ = fresh(directory)
+    compile_(other)
+    cache.save()
+
+    def swap_entries(entries):
+        keys = list(entries)
+        entries[keys[0]], entries[keys[1]] = entries[keys[1]], entries[keys[0]]
+    rewrite(cache.path, swap_entries)
+    cache, compile_ = fresh(directory)
+    compiled = compile_(PATTERN)
+    check("entry under another pattern's key rejected", cache.hits == 0 and cache.rejected == 1
+          and compiled.findall(TEXT) == expected)
+
+    shared = tempfile.mkdtemp()
+    os.chmod(shared, 0o777)
+    cache, _ = fresh(shared)
+    check("group/world-writable directory not used", not cache.enabled)
+
+    print("\nFAIL" if failures else "\nOK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+test_pattern_registry.py
+========================
+Checks for the central pattern registry (correctors/patterns.py):
+
+1. No regex is compiled on the hot path: the correctors are built first,
+   then every level of correct() / correct_detailed(), with and without
+   a deadline and stage timing, runs under record_compiles() - which also
+   sees the implicit compilation of re.sub(str, ...).
+2. common_phrases and the article overcorrections, now a few combined
+   alternations, give the same text as the old one re.sub per entry.
+3. Correctors built from the same rules share their compiled patterns.
+
+Usage (from backend/):
+    python -m app.tests.test_pattern_registry
+"""
+
+import random
+import re
+import sys
+
+from app.correctors.base_corrector import CorrectionLevel
+from app.correctors.deadline import Deadline
+from app.correctors.grammar_corrector import GrammarCorrector
+from app.correctors.instrumentation import collect_timings
+from app.correctors.patterns import PATTERNS, record_compiles
+from app.correctors.spelling_corrector import SpellingCorrector
+from app.tests.micro_benchmark import SEED
+
+TEXTS = [
+    SEED,
+    "We'll see. We'll go! well, We'll stay? maybe, We'll leave",
+    "it's me and you, more better than alot of people. She was a young girl, an old man",
+    "mail me at someone@example.org or visit http://example.com #tag @user",
+    "SELECT * FROM users; <script>alert(1)</script> hello.. world!!! ok???",
+    "",
+]
+
+
+def check_hot_path(grammar, spelling):
+    with record_compiles() as compiled:
+        for text in TEXTS:
+            for level in CorrectionLevel:
+                grammar.correct(text, level=level)
+                grammar.correct_detailed(text, level=level)
+                grammar.correct(text, deadline=Deadline(1000), level=level)
+                spelling.correct(text, level=level)
+                spelling.correct_detailed(text, level=level)
+                with collect_timings():
+                    grammar.correct(text, level=level)
+    return compiled
+
+
+def one_by_one(text, rules):
+    """The pre-registry implementation: one re.sub per entry."""
+    for wrong, correct in rules.items():
+        text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text, flags=re.IGNORECASE)
+    return text
+
+
+def check_folded_tables(grammar, count=3000, seed=1):
+    rng = random.Random(seed)
+    differences = []
+    for name, rules, method in (
+        ("common_phrases", grammar.common_phrases, grammar.correct_common_phrases),
+        ("article_overcorrection", grammar.ARTICLE_OVERCORRECTIONS, grammar.fix_overcorrection_articles),
+    ):
+        phrases = [*rules.keys(), *rules.values(), "and", "me", "a", "an", "the"]
+        for _ in range(count):
+            text = " ".join(rng.choice(phrases) for _ in range(rng.randint(1, 10)))
+            if rng.random() < 0.3:
+                text = text.upper()
+            expected = one_by_one(text, rules)
+            actual = method(text)
+            if actual != expected:
+                differences.append((name, text, expected, actual))
+    return differences
+
+
+def main():
+    print("\n=== PATTERN REGISTRY ===\n")
+    grammar = GrammarCorrector()
+    spelling = SpellingCorrector()
+    failed = False
+
+    compiled = check_hot_path(grammar, spelling)
+    print(f"Compilations on the hot path: {len(compiled)}")
+    for pattern, flags in compiled[:10]:
+        print(f"  {pattern!r} (flags={flags})")
+    failed |= bool(compiled)
+
+    differences = check_folded_tables(grammar)
+    print(f"Folded tables vs one re.sub per entry: {len(differences)} differences")
+    for name, text, expected, actual in differences[:10]:
+        print(f"  {name}: {text!r}\n    expected {expected!r}\n    actual   {actual!r}")
+    failed |= bool(differences)
+
+    shared = grammar.spelling_corrector.combined_spelling_pattern is spelling.combined_spelling_pattern
+    print(f"Spelling pattern shared between correctors: {shared}")
+    failed |= not shared
+
+    print(f"Registry: {PATTERNS.stats()}")
+    print("\nFAIL" if failed else "\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+test_scheduler.py
+=================
+Checks for the plan-aware scheduler (scheduler.py), on a private
+PlanScheduler with one slot:
+
+1. Weighted shares: with basic (weight 1) and premium (weight 2) both
+   backlogged with equal-cost jobs, premium gets ~2/3 of the slots
+   until its backlog runs out.
+2. Shortest job first inside a plan.
+3. Bounded wait: a job that gets no slot within max_wait_ms raises
+   SchedulerTimeout (the routes' 503) and leaves the queue.
+
+Usage (from backend/):
+    python -m app.tests.test_scheduler
+"""
+
+import sys
+import threading
+import time
+
+from app.scheduler import PlanScheduler, SchedulerTimeout
+
+
+def backlog(scheduler, jobs):
+    """
+    Hold the only slot, queue `jobs` [(plan, cost, tag)], then let them
+    run. Returns the tags in the order they got the slot.
+    """
+    hold = threading.Event()
+    order = []
+    threads = [threading.Thread(target=scheduler.run, args=("basic", 1, hold.wait))]
+    threads[0].start()
+    while scheduler.stats()["running"] == 0:
+        time.sleep(0.001)
+
+    for plan, cost, tag in jobs:
+        thread = threading.Thread(target=scheduler.run, args=(plan, cost, order.append, tag))
+        thread.start()
+        threads.append(thread)
+    while sum(scheduler.stats()["queued"].values()) < len(jobs):
+        time.sleep(0.001)
+
+    hold.set()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def check_weighted_shares():
+    scheduler = PlanScheduler(workers=1, aging_ms=60000, max_wait_ms=60000)
+    jobs = [(plan, 1000, plan) for _ in range(30) for plan in ("basic", "premium")]
+    order = backlog(scheduler, jobs)
+    first = order[:30]
+    premium = first.count("premium")
+    print(f"First 30 slots: premium {premium}, basic {first.count('basic')} (weights 2:1)")
+    return 18 <= premium <= 22
+
+
+def check_shortest_first():
+    scheduler = PlanScheduler(workers=1, aging_ms=60000, max_wait_ms=60000)
+    order = backlog(scheduler, [("basic", cost, cost) for cost in (50000, 300, 8000, 20)])
+    print(f"Costs in service order: {order}")
+    return order == [20, 300, 8000, 50000]
+
+
+def check_bounded_wait():
+    scheduler = PlanScheduler(workers=1, max_wait_ms=50)
+    hold = threading.Event()
+    holder = threading.Thread(target=scheduler.run, args=("basic", 1, hold.wait))
+    holder.start()
+    while scheduler.stats()["running"] == 0:
+        time.sleep(0.001)
+
+    start = time.perf_counter()
+    try:
+        scheduler.run("enterprise", 1, lambda: None)
+        timed_out = False
+    except SchedulerTimeout as e:
+        timed_out = e.retry_after >= 1
+    waited_ms = (time.perf_counter() - start) * 1000
+    hold.set()
+    holder.join()
+
+    stats = scheduler.stats()
+    print(f"Timed out after {waited_ms:.0f} ms; expired {stats['expired']}, queued {stats['queued']}")
+    return (timed_out and stats["expired"]["enterprise"] == 1
+            and not any(stats["queued"].values()) and stats["running"] == 0)
+
+
+def main():
+    print("\n=== PLAN SCHEDULER ===\n")
+    failed = False
+    for check in (check_weighted_shares, check_shortest_first, check_bounded_wait):
+        ok = check()
+        print(f"  {'ok' if ok else 'FAIL'}")
+        failed |= not ok
+    print("\nFAIL" if failed else "\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
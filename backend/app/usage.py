@@ -0,0 +1,155 @@
+"""
+usage.py - Low-overhead usage metering
+======================================
+Per-API-key counters (requests, CPU time, characters) for billing and
+throttling.
+
+Each request thread writes into its own shard, guarded by its own lock
+that only the background flusher ever contends for, so recording costs
+a dict lookup and three additions. The flusher thread periodically
+drains all shards into the totals and writes them to a local JSON file
+(atomically), completely off the request path.
+
+The file is billing data, so it lives in the user's data directory,
+not wherever the service was started from.
+
+Configuration (environment):
+    USAGE_FILE             (default: $XDG_DATA_HOME or ~/.local/share,
+                           then corrector/usage.json)
+    USAGE_FLUSH_INTERVAL   seconds between flushes (default: 10)
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USAGE_FILE = os.path.join(
+    os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "corrector", "usage.json")
+
+
+class _Shard:
+    __slots__ = ("lock", "data")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+
+class UsageMeter:
+
+    def __init__(self, path=DEFAULT_USAGE_FILE, flush_interval_s=10.0):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stop = threading.Event()
+
+        self.totals = self._load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.getenv("USAGE_FILE") or DEFAULT_USAGE_FILE,
+            flush_interval_s=float(os.getenv("USAGE_FLUSH_INTERVAL", "10")),
+        )
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read usage file {self.path}: {e}")
+            return {}
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+                if self._flusher is None:
+                    self._start_flusher()
+        return shard
+
+    def record(self, key_id, plan, cpu_ns, chars):
+        """Add one request to the calling thread's shard."""
+        shard = self._shard()
+        with shard.lock:
+            counters = shard.data.get(key_id)
+            if counters is None:
+                counters = shard.data[key_id] = [plan, 0, 0, 0]
+            counters[1] += 1
+            counters[2] += cpu_ns
+            counters[3] += chars
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Usage flush failed: {e}")
+
+    def _drain(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        changed = False
+        for shard in shards:
+            with shard.lock:
+                data, shard.data = shard.data, {}
+
+            for key_id, (plan, requests, cpu_ns, chars) in data.items():
+                entry = self.totals.setdefault(key_id, {
+                    "plan": plan, "requests": 0, "cpu_ms": 0.0, "chars": 0
+                })
+                entry["plan"] = plan
+                entry["requests"] += requests
+                entry["cpu_ms"] = round(entry["cpu_ms"] + cpu_ns / 1e6, 3)
+                entry["chars"] += chars
+                changed = True
+        return changed
+
+    def flush(self):
+        """Merge all shards into the totals and persist them."""
+        with self._flush_lock:
+            if not self._drain():
+                return
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.totals, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def snapshot(self):
+        """Current totals including not yet flushed shard data."""
+        with self._flush_lock:
+            self._drain()
+            return {key_id: dict(entry) for key_id, entry in self.totals.items()}
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+usage_meter = UsageMeter.from_env()
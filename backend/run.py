@@ -1,7 +1,13 @@
 # backend/run.py
 from app.main import app
+from app.admission import limiter
+from app.request_timing import QueueStampingDispatcher
 
 if __name__ == '__main__':
     print("AI Text Corrector API pokrenut na http://0.0.0.0:5000")
     from waitress import serve
-    serve(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    # Enough threads for every admitted + queued request; the limiter sheds the rest
+    threads = limiter.thread_budget()
+    # The dispatcher stamps queued tasks so /metrics can show waitress queue time
+    serve(app, host="0.0.0.0", port=5000, threads=threads,
+          _dispatcher=QueueStampingDispatcher(threads))
\ No newline at end of file